@@ -0,0 +1,75 @@
+#!/usr/bin/env node
+// Print the Doubao prompts for a collector snapshot as JSON, for the server's AI precompute queue.
+// Builds the record the same way daily_autorun.mjs does, so the prompts (and their cache keys)
+// match what the daily job and the dashboard send for that date.
+import fs from "node:fs";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+import { buildAiPayload } from "../src/ai/payload.js";
+import { buildRecordFromCollectorPayload, mergeHistory, readHistorySeed } from "./daily_autorun.mjs";
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const ROOT = path.resolve(__dirname, "..");
+const DATA_DIR = path.join(ROOT, "src", "data");
+
+function parseArgs(argv) {
+  const args = {
+    auto: path.join(DATA_DIR, "auto.json"),
+    history: path.join(DATA_DIR, "history.seed.json"),
+    date: null,
+    fields: false,
+  };
+  for (let i = 0; i < argv.length; i += 1) {
+    const token = argv[i];
+    if (token === "--auto") args.auto = argv[++i] || args.auto;
+    else if (token === "--history") args.history = argv[++i] || args.history;
+    else if (token === "--date") args.date = argv[++i] || null;
+    else if (token === "--fields") args.fields = true;
+  }
+  return args;
+}
+
+function localDateKey(date) {
+  const y = date.getFullYear();
+  const m = String(date.getMonth() + 1).padStart(2, "0");
+  const d = String(date.getDate()).padStart(2, "0");
+  return `${y}-${m}-${d}`;
+}
+
+export function buildPromptItems(snapshot, history, date, options = {}) {
+  const prior = (history || [])
+    .filter((item) => item && typeof item.date === "string" && item.input && item.output && item.date < date)
+    .sort((a, b) => a.date.localeCompare(b.date));
+  const record = buildRecordFromCollectorPayload(snapshot, date, prior);
+  const payload = buildAiPayload(record, mergeHistory(prior, record));
+  const items = [
+    { kind: "summary", id: "summary", prompt: payload.summary.prompt },
+    { kind: "overall", id: "overall", prompt: payload.overall.prompt },
+    ...(payload.gates || []).map((gate) => ({ kind: "gate", id: gate.id, prompt: gate.prompt })),
+  ];
+  if (options.fields) {
+    items.push(...(payload.fields || []).map((field) => ({ kind: "field", id: field.key, prompt: field.prompt })));
+  }
+  return { date, promptVersion: payload.promptVersion || null, items };
+}
+
+function main() {
+  const args = parseArgs(process.argv.slice(2));
+  const snapshot = JSON.parse(fs.readFileSync(args.auto, "utf-8"));
+  const date = args.date || snapshot.targetDate || localDateKey(new Date(snapshot.generatedAt || Date.now()));
+  if (!/^\d{4}-\d{2}-\d{2}$/.test(date)) {
+    throw new Error(`invalid date: ${date}`);
+  }
+  const { history } = readHistorySeed(args.history);
+  process.stdout.write(JSON.stringify(buildPromptItems(snapshot, history, date, { fields: args.fields })));
+}
+
+try {
+  const entry = process.argv[1] ? fs.realpathSync(path.resolve(process.argv[1])) : "";
+  if (entry && fileURLToPath(import.meta.url) === entry) {
+    main();
+  }
+} catch (error) {
+  console.error(error?.message || error);
+  process.exitCode = 1;
+}
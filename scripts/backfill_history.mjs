@@ -14,6 +14,10 @@ const COLLECTOR = path.join(ROOT, "scripts", "collector.py");
 const DEFAULT_OUTPUT = path.join(ROOT, "src", "data", "history.seed.json");
 const DEFAULT_STATUS_OUTPUT = path.join(ROOT, "run", "backfill_status.json");
 const LOCK_PATH = path.join(ROOT, "run", "backfill_history.lock");
+// Written (and touched every poll) by the server's BackfillGovernor while interactive or daily
+// collection runs; a file that stopped being touched is left over from a server that went away.
+const PAUSE_PATH = path.join(ROOT, "run", "backfill.pause");
+const PAUSE_STALE_MS = Math.max(1, Number(process.env.BACKFILL_PAUSE_STALE_SEC || 30)) * 1000;
 const EXECUTION_COST_BPS = 12;
 const inputSchema = {
   dxy5d: "number",
@@ -74,6 +78,7 @@ function parseArgs(argv) {
     statusOutput: DEFAULT_STATUS_OUTPUT,
     timeoutSec: 600,
     resume: true,
+    payloadDir: null,
   };
   for (let i = 0; i < argv.length; i += 1) {
     const token = argv[i];
@@ -85,6 +90,7 @@ function parseArgs(argv) {
     else if (token === "--status-output") args.statusOutput = path.resolve(ROOT, argv[++i] || args.statusOutput);
     else if (token === "--timeout") args.timeoutSec = Number(argv[++i] || args.timeoutSec);
     else if (token === "--no-resume") args.resume = false;
+    else if (token === "--payload-dir") args.payloadDir = path.resolve(ROOT, argv[++i] || ".");
   }
   args.days = Number.isFinite(args.days) && args.days > 0 ? Math.floor(args.days) : 365;
   args.step = Number.isFinite(args.step) && args.step > 0 ? Math.floor(args.step) : 7;
@@ -275,7 +281,34 @@ function sleepMs(ms) {
   Atomics.wait(view, 0, 0, ms);
 }
 
-function runCollectorForDate(date, timeoutSec) {
+// Block between dates while the server asks the backfill to yield; returns the milliseconds waited.
+function waitWhilePaused(onPause) {
+  const started = Date.now();
+  let announced = false;
+  for (;;) {
+    let stat;
+    try {
+      stat = fs.statSync(PAUSE_PATH);
+    } catch {
+      return Date.now() - started;
+    }
+    if (Date.now() - stat.mtimeMs > PAUSE_STALE_MS) return Date.now() - started;
+    if (!announced && typeof onPause === "function") onPause();
+    announced = true;
+    sleepMs(500);
+  }
+}
+
+// Snapshot collected ahead of time by backfill_parallel.py (<payloadDir>/<date>.json), if any.
+function readCollectedPayload(payloadDir, date) {
+  if (!payloadDir) return null;
+  const payload = readJson(path.join(payloadDir, `${date}.json`), null);
+  return payload && typeof payload === "object" && payload.data ? payload : null;
+}
+
+function runCollectorForDate(date, timeoutSec, payloadDir = null) {
+  const collected = readCollectedPayload(payloadDir, date);
+  if (collected) return collected;
   const retries = 2;
   let lastError = null;
   for (let attempt = 0; attempt <= retries; attempt += 1) {
@@ -458,8 +491,10 @@ function main() {
         console.log(`${progress} 跳过（已存在）`);
         continue;
       }
+      const pausedMs = waitWhilePaused(() => console.log(`${progress} 暂停：等待交互/日任务采集完成`));
+      if (pausedMs >= 1000) console.log(`${progress} 继续（暂停 ${Math.round(pausedMs / 1000)}s）`);
       try {
-        const payload = runCollectorForDate(date, args.timeoutSec);
+        const payload = runCollectorForDate(date, args.timeoutSec, args.payloadDir);
         const normalized = normalizeInputForRun({ ...(payload.data || {}) }, history, date);
         hydrateMetadata(normalized, payload);
         coerceInputTypes(normalized);
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Sharded parallel history backfill on top of collector.collect().
+
+backfill_history.mjs collects one date at a time, spawning a collector per date. This driver splits
+the same date range into contiguous shards and collects them on a process pool. Workers share the
+disk cache (scripts/.cache) and the per-host rate limiter (run/ratelimit), and write each snapshot
+to <payload-dir>/<date>.json. Every shard keeps a checkpoint in <checkpoint-dir>, so rerunning the
+same command resumes where an interrupted run stopped. When collection is done,
+`backfill_history.mjs --payload-dir` replays the snapshots in date order to compute the records and
+merge them into history.seed.json.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date as date_cls, datetime, timedelta, timezone
+
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
+
+import scripts.collector as collector  # noqa: E402
+
+BACKFILL_SCRIPT = os.path.join(APP_ROOT, "scripts", "backfill_history.mjs")
+DEFAULT_PAYLOAD_DIR = os.path.join(collector.RUN_DIR, "backfill_payloads")
+DEFAULT_CHECKPOINT_DIR = os.path.join(collector.RUN_DIR, "backfill_shards")
+# Same cooperative pause as backfill_history.mjs: the server's BackfillGovernor keeps this file
+# fresh while interactive or daily collection runs; a file older than PAUSE_STALE_SEC is ignored.
+PAUSE_PATH = os.path.join(collector.RUN_DIR, "backfill.pause")
+PAUSE_STALE_SEC = max(1.0, float(os.environ.get("BACKFILL_PAUSE_STALE_SEC", "30")))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect history snapshots in parallel shards, then merge them")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--horizon", type=int, default=14)
+    parser.add_argument("--as-of", dest="as_of", default=datetime.now(timezone.utc).date().isoformat())
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--shard-size", dest="shard_size", type=int, default=14, help="dates per shard")
+    parser.add_argument("--payload-dir", dest="payload_dir", default=DEFAULT_PAYLOAD_DIR)
+    parser.add_argument("--checkpoint-dir", dest="checkpoint_dir", default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument("--timeout", dest="timeout_sec", type=int, default=600, help="per-date collect deadline")
+    parser.add_argument("--output", default=None, help="history file for the merge step (backfill_history.mjs default)")
+    parser.add_argument("--no-resume", dest="resume", action="store_false", help="drop checkpoints and recollect")
+    parser.add_argument("--no-merge", dest="merge", action="store_false", help="only collect snapshots")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+    args.days = args.days if args.days > 0 else 365
+    args.step = args.step if args.step > 0 else 1
+    args.horizon = args.horizon if args.horizon > 0 else 14
+    args.workers = max(1, args.workers)
+    args.shard_size = max(1, args.shard_size)
+    args.timeout_sec = args.timeout_sec if args.timeout_sec > 0 else 600
+    return args
+
+
+def build_backfill_dates(days, as_of, horizon, step):
+    """Same sampling as backfill_history.mjs: every `step` days back to `days + horizon`, plus the
+    newest matured date (`as_of - horizon`), ascending."""
+    base = date_cls.fromisoformat(as_of)
+    dates = {(base - timedelta(days=offset)).isoformat() for offset in range(days + horizon, horizon - 1, -step)}
+    dates.add((base - timedelta(days=horizon)).isoformat())
+    return sorted(dates)
+
+
+def split_shards(dates, shard_size):
+    shards = []
+    for start in range(0, len(dates), shard_size):
+        chunk = dates[start : start + shard_size]
+        shards.append({"id": f"{chunk[0]}_{chunk[-1]}", "dates": chunk})
+    return shards
+
+
+def payload_path(payload_dir, date):
+    return os.path.join(payload_dir, f"{date}.json")
+
+
+def checkpoint_path(checkpoint_dir, shard_id):
+    return os.path.join(checkpoint_dir, f"{shard_id}.json")
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            payload = json.load(fp)
+    except (OSError, ValueError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def wait_while_paused(path=PAUSE_PATH, stale_sec=PAUSE_STALE_SEC, poll_sec=0.5):
+    """Block while a fresh pause file exists; returns the seconds waited."""
+    started = time.monotonic()
+    while True:
+        try:
+            age = time.time() - os.stat(path).st_mtime
+        except OSError:
+            break
+        if age > stale_sec:
+            break
+        time.sleep(poll_sec)
+    return time.monotonic() - started
+
+
+def collect_shard(shard, payload_dir, checkpoint_dir, timeout_sec, collect=None):
+    """Collect the dates of one shard that have no snapshot yet; runs inside a pool worker.
+
+    The checkpoint is rewritten after every date, so a killed worker loses at most the date it was
+    on. Returns {"id", "collected", "skipped", "failed": {date: error}, "seconds"}.
+    """
+    collect = collect or collector.collect
+    path = checkpoint_path(checkpoint_dir, shard["id"])
+    checkpoint = load_checkpoint(path)
+    done = set(checkpoint.get("done") or [])
+    failed = {}
+    collected = 0
+    skipped = 0
+    started = time.monotonic()
+    for date in shard["dates"]:
+        target = payload_path(payload_dir, date)
+        if os.path.isfile(target):
+            done.add(date)
+            skipped += 1
+            continue
+        wait_while_paused()
+        try:
+            payload = collect(date, {"deadline": time.monotonic() + timeout_sec})
+            collector.write_json_atomic(target, payload)
+            done.add(date)
+            collected += 1
+        except Exception as exc:
+            failed[date] = str(exc) or exc.__class__.__name__
+        collector.write_json_atomic(
+            path,
+            {
+                "id": shard["id"],
+                "dates": shard["dates"],
+                "done": sorted(done),
+                "failed": failed,
+                "updatedAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            },
+        )
+    try:
+        collector.save_dns_cache()
+    except OSError:
+        pass
+    return {
+        "id": shard["id"],
+        "collected": collected,
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def run_backfill(
+    dates,
+    workers,
+    shard_size,
+    payload_dir=DEFAULT_PAYLOAD_DIR,
+    checkpoint_dir=DEFAULT_CHECKPOINT_DIR,
+    timeout_sec=600,
+    resume=True,
+    collect=None,
+    executor_factory=ProcessPoolExecutor,
+    progress=None,
+):
+    """Collect snapshots for `dates` on `workers` processes and return a throughput summary.
+
+    `collect` and `executor_factory` exist for tests; a custom `collect` must be picklable when the
+    default process pool is used.
+    """
+    os.makedirs(payload_dir, exist_ok=True)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    shards = split_shards(dates, shard_size)
+    if not resume:
+        for shard in shards:
+            for target in [checkpoint_path(checkpoint_dir, shard["id"])] + [
+                payload_path(payload_dir, date) for date in shard["dates"]
+            ]:
+                try:
+                    os.unlink(target)
+                except FileNotFoundError:
+                    pass
+    pending = [s for s in shards if any(not os.path.isfile(payload_path(payload_dir, d)) for d in s["dates"])]
+    summary = {
+        "total": len(dates),
+        "shards": len(shards),
+        "pendingShards": len(pending),
+        "workers": workers,
+        "collected": 0,
+        "skipped": len(dates) - sum(
+            1 for s in pending for d in s["dates"] if not os.path.isfile(payload_path(payload_dir, d))
+        ),
+        "failed": 0,
+        "failures": {},
+        "seconds": 0.0,
+        "datesPerMin": 0.0,
+    }
+    started = time.monotonic()
+    if pending:
+        with executor_factory(max_workers=min(workers, len(pending))) as pool:
+            futures = [
+                pool.submit(collect_shard, shard, payload_dir, checkpoint_dir, timeout_sec, collect)
+                for shard in pending
+            ]
+            for finished, future in enumerate(as_completed(futures), start=1):
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = {"id": "?", "collected": 0, "skipped": 0, "failed": {"?": str(exc)}, "seconds": 0}
+                summary["collected"] += result["collected"]
+                summary["failures"].update(result["failed"])
+                summary["failed"] = len(summary["failures"])
+                elapsed = time.monotonic() - started
+                summary["seconds"] = round(elapsed, 3)
+                summary["datesPerMin"] = round(summary["collected"] / (elapsed / 60), 2) if elapsed > 0 else 0.0
+                if progress:
+                    progress(finished, len(pending), result, summary)
+    return summary
+
+
+def merge_history(args):
+    """Replay the collected snapshots through backfill_history.mjs (date order, single writer)."""
+    cmd = [
+        "node",
+        BACKFILL_SCRIPT,
+        "--payload-dir",
+        args.payload_dir,
+        "--days",
+        str(args.days),
+        "--step",
+        str(args.step),
+        "--horizon",
+        str(args.horizon),
+        "--as-of",
+        args.as_of,
+    ]
+    if args.output:
+        cmd += ["--output", args.output]
+    if not args.resume:
+        cmd.append("--no-resume")
+    return subprocess.run(cmd, cwd=APP_ROOT).returncode
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    dates = build_backfill_dates(args.days, args.as_of, args.horizon, args.step)
+
+    def report(finished, total, result, summary):
+        if args.json:
+            return
+        print(
+            f"[{finished}/{total}] {result['id']}: +{result['collected']} 失败 {len(result['failed'])}"
+            f" ({result['seconds']:.0f}s) | 累计 {summary['collected']}，{summary['datesPerMin']:.1f} dates/min",
+            flush=True,
+        )
+
+    if not args.json:
+        print(
+            f"并行回抓: as-of={args.as_of}, samples={len(dates)}, shard={args.shard_size}, workers={args.workers}",
+            flush=True,
+        )
+    summary = run_backfill(
+        dates,
+        args.workers,
+        args.shard_size,
+        payload_dir=args.payload_dir,
+        checkpoint_dir=args.checkpoint_dir,
+        timeout_sec=args.timeout_sec,
+        resume=args.resume,
+        progress=report,
+    )
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print(
+            f"采集完成：新增 {summary['collected']}，已存在 {summary['skipped']}，失败 {summary['failed']}，"
+            f"{summary['seconds']:.0f}s，{summary['datesPerMin']:.1f} dates/min",
+            flush=True,
+        )
+    if args.merge:
+        code = merge_history(args)
+        if code:
+            sys.exit(code)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Compare transfer size and modelled first-render time with and without gzip / modulepreload.
+
+Starts the dashboard server on an ephemeral port, fetches what a cold page load needs (the HTML
+entry point, the ES module graph reachable from app.js, the stylesheet and the startup JSON) once
+with `Accept-Encoding: gzip` and once without, then models a throttled link: every level of the
+module waterfall costs one round trip and all bytes share the link bandwidth.
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
+
+STARTUP_DATA = (
+    "/data/auto.json",
+    "/data/history.seed.json",
+    "/data/latest.seed.json",
+    "/data/ai.seed.json",
+    "/data/eth.price.seed.json",
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gzip transfer for a cold dashboard load")
+    # Defaults follow the common "slow 4G" mobile preset.
+    parser.add_argument("--kbps", type=float, default=1600.0, help="link bandwidth in kbit/s")
+    parser.add_argument("--rtt-ms", type=float, default=150.0, help="round-trip time in ms")
+    parser.add_argument("--precompress", action="store_true", help="write level-9 .gz siblings for startup JSON first")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    return parser.parse_args(argv)
+
+
+def module_levels(server):
+    """Breadth-first levels of the module graph starting at app.js (level 0 = index.html)."""
+    manifest = server.ASSETS
+    manifest.refresh(force=True)
+    levels = [["/index.html"], ["/app.js", "/styles.css"]]
+    seen = set(levels[0] + levels[1])
+    frontier = ["/app.js"]
+    while frontier:
+        nxt = []
+        for url in frontier:
+            asset = manifest.lookup(url)
+            for dep in asset.deps if asset else ():
+                if dep not in seen:
+                    seen.add(dep)
+                    nxt.append(dep)
+        if nxt:
+            levels.append(sorted(nxt))
+        frontier = nxt
+    return levels
+
+
+def precompress(server):
+    for url in STARTUP_DATA:
+        path = os.path.join(server.ROOT, url.lstrip("/"))
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as fp:
+            body = gzip.compress(fp.read(), compresslevel=9, mtime=0)
+        with open(path + ".gz", "wb") as fp:
+            fp.write(body)
+
+
+def fetch_bytes(port, path, encoding):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    started = time.perf_counter()
+    conn.request("GET", path, headers=headers)
+    resp = conn.getresponse()
+    body = resp.read()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return resp.status, len(body), elapsed
+
+
+def run_variant(port, levels, encoding, kbps, rtt_ms, preload=False):
+    total = 0
+    server_sec = 0.0
+    files = {}
+    for level in levels:
+        for path in level:
+            status, size, elapsed = fetch_bytes(port, path, encoding)
+            if status != 200:
+                continue
+            files[path] = size
+            total += size
+            server_sec += elapsed
+    data = 0
+    for path in STARTUP_DATA:
+        status, size, elapsed = fetch_bytes(port, path, encoding)
+        if status != 200:
+            continue
+        files[path] = size
+        data += size
+        server_sec += elapsed
+    bytes_per_sec = kbps * 1000 / 8
+    # HTML, then one round trip per module level, then auto.json once app.js runs. With
+    # modulepreload the whole graph is requested right after the HTML.
+    rounds = 3 if preload else len(levels) + 1
+    first_render = rounds * rtt_ms / 1000 + (total + files.get("/data/auto.json", 0)) / bytes_per_sec
+    return {
+        "encoding": (encoding or "identity") + ("+preload" if preload else ""),
+        "moduleBytes": total,
+        "dataBytes": data,
+        "totalBytes": total + data,
+        "firstRenderSec": round(first_render, 3),
+        "allDataSec": round(first_render + data / bytes_per_sec, 3),
+        "localServeMs": round(server_sec * 1000, 1),
+        "files": files,
+    }
+
+
+def quiet_handler(server):
+    class Handler(server.Handler):
+        def log_message(self, format, *args):
+            return
+
+    return Handler
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    import scripts.server as server
+
+    if args.precompress:
+        precompress(server)
+    httpd = server.PooledHTTPServer(("127.0.0.1", 0), quiet_handler(server), workers=4)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        levels = module_levels(server)
+        port = httpd.server_address[1]
+        # Warm the manifest and gzip memo so both variants measure steady state.
+        run_variant(port, levels, "gzip", args.kbps, args.rtt_ms)
+        results = [
+            run_variant(port, levels, None, args.kbps, args.rtt_ms),
+            run_variant(port, levels, "gzip", args.kbps, args.rtt_ms),
+            run_variant(port, levels, "gzip", args.kbps, args.rtt_ms, preload=True),
+        ]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    if args.json:
+        print(json.dumps({"kbps": args.kbps, "rttMs": args.rtt_ms, "levels": len(levels), "results": results}, indent=2))
+        return
+    print(f"link: {args.kbps:.0f} kbit/s, rtt {args.rtt_ms:.0f} ms, module waterfall depth {len(levels)}")
+    for item in results:
+        print(
+            f"{item['encoding']:>12}: modules {item['moduleBytes'] / 1024:8.1f} KiB"
+            f"  data {item['dataBytes'] / 1024:8.1f} KiB"
+            f"  first render ~{item['firstRenderSec']:.2f}s"
+            f"  all data ~{item['allDataSec']:.2f}s"
+            f"  (local serve {item['localServeMs']:.0f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
+import bisect
 import json
 import hashlib
 import math
 import os
 import time
 import subprocess
+import threading
 import urllib.request
 from urllib.parse import urlparse
 from urllib.error import HTTPError, URLError
@@ -19,10 +21,19 @@ DOH_RESOLVERS = [
     ("cloudflare-dns.com", "1.1.1.1"),
 ]
 DNS_CACHE = {}
+# host -> epoch seconds of the DoH answer in DNS_CACHE; persisted so short-lived CLI runs reuse it.
+DNS_RESOLVED_AT = {}
+DNS_CACHE_TTL_SEC = int(os.environ.get("COLLECTOR_DNS_TTL", str(6 * 3600)))
 
 CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".cache"))
 CACHE_TTL_SEC = int(os.environ.get("COLLECTOR_CACHE_TTL", "3600"))  # 1h default
 os.makedirs(CACHE_DIR, exist_ok=True)
+# In-process memo of parsed responses on top of the disk cache. Only useful for long-lived callers
+# (server.py calling collect()); the CLI process exits after one run.
+MEMO_MAX_ENTRIES = 64
+MEMO_MAX_CHARS = 8_000_000
+_MEMO = {}
+_MEMO_LOCK = threading.Lock()
 
 REQUIRED_FIELDS = [
     "dxy5d",
@@ -70,6 +81,8 @@ REQUIRED_FIELDS = [
     "srfChange",
     "ism",
 ]
+# Everything a snapshot carries per field (required inputs plus the price/TVL extras).
+SNAPSHOT_FIELDS = list(dict.fromkeys(REQUIRED_FIELDS + ["ethSpotPrice", "cexTvl"]))
 
 # Half-life governance (days). Stale threshold uses 2x half-life (aligns with frontend policy).
 HALF_LIFE_DAYS = {
@@ -111,9 +124,69 @@ HALF_LIFE_DAYS = {
     "cexTvl": 7,
 }
 
+# Fields whose sources can only return "now" (no as-of query). Historical runs get the value of
+# the day they were collected, so re-running later never makes them more correct.
+LATEST_ONLY_FIELDS = {
+    "exchBalanceTrend",
+    "exchStableDelta",
+    "cexTvl",
+    "liquidationUsd",
+    "distributionGateCount",
+}
+
+# --refresh-policy=stale-only refetches a field once its age reaches this share of the staleness
+# cutoff (2 x HALF_LIFE_DAYS, see is_stale); younger fields keep their previous value and stamps.
+REFRESH_POLICIES = ("full", "stale-only")
+REFRESH_STALE_RATIO = float(os.environ.get("COLLECTOR_REFRESH_RATIO", "0.5"))
+
 AUTO_JSON_PATH = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "src", "data", "auto.json")
 )
+HISTORY_SEED_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "src", "data", "history.seed.json")
+)
+RUN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "run"))
+# Per-field fallback index: newest observations first, capped so lookups stay O(1) per field.
+FIELD_INDEX_PATH = os.path.join(RUN_DIR, "field_index.json")
+FIELD_INDEX_DEPTH = 8
+DNS_CACHE_PATH = os.path.join(RUN_DIR, "dns_cache.json")
+# Farside ETF flows merged from every fetch (see EtfFlowStore); rows whose total differs from the
+# sum of issuer columns by more than the tolerance are flagged.
+ETF_FLOW_PATH = os.path.join(RUN_DIR, "etf_flows.json")
+FARSIDE_CHECKSUM_TOLERANCE = 0.1
+FARSIDE_PAGES = (
+    ("ethereum", "https://farside.co.uk/ethereum-etf-flow/", "Farside: ethereum-etf-flow"),
+    ("bitcoin", "https://farside.co.uk/bitcoin-etf-flow/", "Farside: bitcoin-etf-flow"),
+)
+# Daily captures of latest-only sources (see CaptureStore), kept for a little over two years.
+CAPTURE_DIR = os.path.join(RUN_DIR, "captures")
+CAPTURE_RETAIN_DAYS = int(os.environ.get("COLLECTOR_CAPTURE_RETAIN_DAYS", "800"))
+# Hosts the sources below talk to; resolved ahead of the daily run by prewarm_dns().
+UPSTREAM_HOSTS = (
+    "api.stlouisfed.org",
+    "fred.stlouisfed.org",
+    "api.llama.fi",
+    "stablecoins.llama.fi",
+    "farside.co.uk",
+    "r.jina.ai",
+    "api.coingecko.com",
+    "open-api-v4.coinglass.com",
+    "www.coinglass.com",
+    "api-pub.bitfinex.com",
+    "api.alternative.me",
+    "api.gdeltproject.org",
+)
+# Minimum spacing between requests to one upstream host, shared by every collector process on the
+# machine through lock files in RATE_LIMIT_DIR (parallel backfill workers included). Hosts not
+# listed use COLLECTOR_HOST_INTERVAL_MS (default 0 = unthrottled); COLLECTOR_RATE_LIMIT=0 disables.
+RATE_LIMIT_DIR = os.path.join(RUN_DIR, "ratelimit")
+HOST_MIN_INTERVAL_SEC = {
+    "api.coingecko.com": 2.5,
+    "api-pub.bitfinex.com": 2.0,
+    "r.jina.ai": 1.0,
+    "api.gdeltproject.org": 1.0,
+}
+HOST_DEFAULT_INTERVAL_SEC = max(0, int(os.environ.get("COLLECTOR_HOST_INTERVAL_MS", "0"))) / 1000
 
 PROXY_CANDIDATES = ["direct"]
 
@@ -228,11 +301,43 @@ def _cache_write(url, suffix, text):
         return
 
 
+def _memo_get(url, suffix):
+    if (os.environ.get("COLLECTOR_NO_CACHE") or "").lower() in ("1", "true", "yes", "on"):
+        return None
+    with _MEMO_LOCK:
+        entry = _MEMO.get((url, suffix))
+        if not entry:
+            return None
+        stored_at, value = entry
+        if CACHE_TTL_SEC > 0 and (time.time() - stored_at) > CACHE_TTL_SEC:
+            _MEMO.pop((url, suffix), None)
+            return None
+        # Re-insert to keep dict order as LRU order.
+        _MEMO.pop((url, suffix), None)
+        _MEMO[(url, suffix)] = entry
+        return value
+
+
+def _memo_put(url, suffix, value, size):
+    if size > MEMO_MAX_CHARS:
+        return
+    with _MEMO_LOCK:
+        _MEMO.pop((url, suffix), None)
+        _MEMO[(url, suffix)] = (time.time(), value)
+        while len(_MEMO) > MEMO_MAX_ENTRIES:
+            _MEMO.pop(next(iter(_MEMO)))
+
+
 def fetch_json(url, timeout=12):
+    memo = _memo_get(url, "json")
+    if memo is not None:
+        return memo
     cached = _cache_read(url, "json")
     if cached:
         try:
-            return json.loads(cached)
+            parsed = json.loads(cached)
+            _memo_put(url, "json", parsed, len(cached))
+            return parsed
         except json.JSONDecodeError:
             pass
     for proxy in PROXY_CANDIDATES:
@@ -241,6 +346,7 @@ def fetch_json(url, timeout=12):
             try:
                 parsed = json.loads(text)
                 _cache_write(url, "json", text)
+                _memo_put(url, "json", parsed, len(text))
                 return parsed
             except json.JSONDecodeError:
                 continue
@@ -248,13 +354,18 @@ def fetch_json(url, timeout=12):
 
 
 def fetch_text(url, timeout=12):
+    memo = _memo_get(url, "txt")
+    if memo is not None:
+        return memo
     cached = _cache_read(url, "txt")
     if cached:
+        _memo_put(url, "txt", cached, len(cached))
         return cached
     for proxy in PROXY_CANDIDATES:
         text = curl_fetch(url, proxy, timeout=timeout)
         if text:
             _cache_write(url, "txt", text)
+            _memo_put(url, "txt", text, len(text))
             return text
     return ""
 
@@ -270,6 +381,7 @@ def curl_fetch(url, proxy=None, timeout=12):
             resolve_args = ["--resolve", f"{host}:{port}:{ip}"]
 
     def run(extra_args):
+        HOST_LIMITER.wait(host)
         cmd = ["curl", "-sSL", "--connect-timeout", str(timeout), "--max-time", str(timeout)]
         cmd += extra_args
         if proxy and proxy.lower() != "direct":
@@ -322,11 +434,147 @@ def resolve_host(host):
         for answer in answers:
             if answer.get("type") == 1 and answer.get("data"):
                 DNS_CACHE[host] = answer["data"]
+                DNS_RESOLVED_AT[host] = time.time()
                 return DNS_CACHE[host]
     DNS_CACHE[host] = None
     return None
 
 
+def load_dns_cache(path=DNS_CACHE_PATH, ttl_sec=DNS_CACHE_TTL_SEC):
+    """Seed DNS_CACHE with answers saved by an earlier process that are younger than `ttl_sec`."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except Exception:
+        return 0
+    now = time.time()
+    loaded = 0
+    for host, entry in (payload.get("hosts") or {}).items():
+        if not isinstance(entry, dict) or not entry.get("ip"):
+            continue
+        resolved_at = entry.get("resolvedAt") or 0
+        if now - resolved_at > ttl_sec or host in DNS_CACHE:
+            continue
+        DNS_CACHE[host] = entry["ip"]
+        DNS_RESOLVED_AT[host] = resolved_at
+        loaded += 1
+    return loaded
+
+
+def save_dns_cache(path=DNS_CACHE_PATH):
+    hosts = {
+        host: {"ip": ip, "resolvedAt": DNS_RESOLVED_AT.get(host) or time.time()}
+        for host, ip in list(DNS_CACHE.items())
+        if ip
+    }
+    if hosts:
+        write_json_atomic(path, {"hosts": hosts})
+
+
+def prewarm_dns(hosts=UPSTREAM_HOSTS, path=DNS_CACHE_PATH):
+    """Resolve upstream hosts through the system resolver and DoH, then persist the DoH answers.
+
+    Returns {host: {"system": bool, "doh": ip or None}}. Failed DoH lookups are forgotten again so
+    the next real fetch retries them instead of inheriting a cached miss.
+    """
+    import socket
+
+    result = {}
+    for host in hosts:
+        try:
+            socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+            system_ok = True
+        except OSError:
+            system_ok = False
+        ip = resolve_host(host)
+        if ip is None:
+            DNS_CACHE.pop(host, None)
+        result[host] = {"system": system_ok, "doh": ip}
+    try:
+        save_dns_cache(path)
+    except OSError:
+        pass
+    return result
+
+
+load_dns_cache()
+
+
+class HostRateLimiter:
+    """Per-host request spacing that holds across processes.
+
+    Each host has a small file under `directory` holding the epoch of the latest reserved request
+    slot; `wait()` takes an exclusive flock on it, reserves `max(now, last + interval)`, releases the
+    lock and only then sleeps until its slot, so concurrent callers queue up instead of bursting and
+    a caller that is stopped or killed while waiting never holds the lock. Without fcntl (non-POSIX)
+    it degrades to a per-process lock.
+    """
+
+    def __init__(self, directory=RATE_LIMIT_DIR, intervals=None, default_sec=HOST_DEFAULT_INTERVAL_SEC, enabled=True):
+        self.directory = directory
+        self.intervals = dict(HOST_MIN_INTERVAL_SEC if intervals is None else intervals)
+        self.default_sec = default_sec
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._last = {}
+        self.waited = {}
+
+    def interval(self, host):
+        if not self.enabled or not host:
+            return 0.0
+        return float(self.intervals.get(host, self.default_sec) or 0.0)
+
+    def wait(self, host):
+        """Block until a request to `host` is allowed; returns the seconds slept."""
+        interval = self.interval(host)
+        if interval <= 0:
+            return 0.0
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        if fcntl is None:
+            with self._lock:
+                slot = max(time.time(), self._last.get(host, 0.0) + interval)
+                self._last[host] = slot
+        else:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                fd = os.open(os.path.join(self.directory, f"{host}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError:
+                return 0.0
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.pread(fd, 64, 0).decode("ascii", "ignore").strip()
+                try:
+                    last = float(raw) if raw else 0.0
+                except ValueError:
+                    last = 0.0
+                slot = max(time.time(), last + interval)
+                os.ftruncate(fd, 0)
+                os.pwrite(fd, f"{slot:.6f}".encode("ascii"), 0)
+            finally:
+                os.close(fd)
+        slept = self._sleep_until(slot)
+        if slept:
+            with self._lock:
+                self.waited[host] = self.waited.get(host, 0.0) + slept
+        return slept
+
+    @staticmethod
+    def _sleep_until(ready_at):
+        delay = ready_at - time.time()
+        if delay <= 0:
+            return 0.0
+        time.sleep(delay)
+        return delay
+
+
+HOST_LIMITER = HostRateLimiter(
+    enabled=(os.environ.get("COLLECTOR_RATE_LIMIT") or "1").lower() not in ("0", "false", "no", "off")
+)
+
+
 def parse_date_like(value):
     if not value:
         return None
@@ -361,6 +609,33 @@ def is_stale(observed_at, as_of, key):
     return age_days > resolve_half_life_days(key) * 2
 
 
+def fields_due_for_refresh(previous, as_of=None, ratio=REFRESH_STALE_RATIO):
+    """Snapshot fields of `previous` that are missing, undated or at least `ratio` of the way to
+    the is_stale() cutoff (2 x half-life) as of `as_of` (default now)."""
+    keys = list(SNAPSHOT_FIELDS)
+    if not previous:
+        return keys
+    data = previous.get("data") or {}
+    observed = previous.get("fieldObservedAt") or {}
+    as_of_dt = parse_date_like(as_of) or datetime.now(timezone.utc)
+    due = []
+    for key in keys:
+        stamp = parse_date_like(observed.get(key))
+        if data.get(key) is None or stamp is None:
+            due.append(key)
+            continue
+        age_days = max(0.0, (as_of_dt - stamp).total_seconds() / 86400.0)
+        if age_days >= resolve_half_life_days(key) * 2 * ratio:
+            due.append(key)
+    return due
+
+
+def select_refresh_fields(fields, previous):
+    """The part of `fields` (None = all) that stale-only refresh has to fetch."""
+    due = fields_due_for_refresh(previous)
+    return due if fields is None else [key for key in fields if key in due]
+
+
 def load_previous_snapshot(path=AUTO_JSON_PATH):
     try:
         if not path or not os.path.exists(path):
@@ -371,9 +646,101 @@ def load_previous_snapshot(path=AUTO_JSON_PATH):
         return None
 
 
-def backfill_from_previous(payload, previous, as_of_date=None):
-    if not payload or not previous:
+def write_json_atomic(path, payload, indent=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per thread too: the server runs collect() on several pool threads in one process.
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        fp.write(json.dumps(payload, ensure_ascii=False, indent=indent))
+    os.replace(tmp_path, path)
+
+
+def load_field_index(path=FIELD_INDEX_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            payload = json.load(fp)
+        fields = payload.get("fields") if isinstance(payload, dict) else None
+        return fields if isinstance(fields, dict) else {}
+    except Exception:
+        return {}
+
+
+def save_field_index(index, path=FIELD_INDEX_PATH):
+    try:
+        write_json_atomic(path, {"version": 1, "fields": index})
+    except Exception:
+        return
+
+
+def record_field_observation(index, key, value, observed_at, source=None):
+    observed = parse_date_like(observed_at)
+    if value is None or not observed:
+        return
+    entries = [item for item in index.get(key) or [] if item.get("observedAt") != observed_at]
+    entries.append({"value": value, "observedAt": observed_at, "source": source})
+    entries.sort(key=lambda item: parse_date_like(item.get("observedAt")) or observed, reverse=True)
+    index[key] = entries[:FIELD_INDEX_DEPTH]
+
+
+def index_snapshot(index, snapshot):
+    """Fold a collector payload (auto.json shape) into the per-field fallback index."""
+    if not isinstance(snapshot, dict):
+        return index
+    data = snapshot.get("data") or {}
+    sources = snapshot.get("sources") or {}
+    observed = snapshot.get("fieldObservedAt") or {}
+    updated = snapshot.get("fieldUpdatedAt") or {}
+    for key, value in data.items():
+        stamp = observed.get(key) or updated.get(key) or snapshot.get("generatedAt")
+        record_field_observation(index, key, value, stamp, sources.get(key))
+    return index
+
+
+def index_history_records(index, records):
+    """Seed the index from history.seed.json records ({date, input: {..., __fieldObservedAt}})."""
+    for record in records or []:
+        if not isinstance(record, dict) or not isinstance(record.get("input"), dict):
+            continue
+        row = record["input"]
+        observed = row.get("__fieldObservedAt") or {}
+        sources = row.get("__sources") or {}
+        fallback = f"{record.get('date')}T00:00:00Z" if record.get("date") else None
+        for key in REQUIRED_FIELDS + ["ethSpotPrice", "cexTvl"]:
+            record_field_observation(index, key, row.get(key), observed.get(key) or fallback, sources.get(key))
+    return index
+
+
+def rebuild_field_index(path=FIELD_INDEX_PATH, history_path=HISTORY_SEED_PATH, auto_path=AUTO_JSON_PATH):
+    index = {}
+    try:
+        with open(history_path, "r", encoding="utf-8") as fp:
+            seed = json.load(fp)
+        records = seed if isinstance(seed, list) else (seed or {}).get("history")
+        index_history_records(index, records)
+    except Exception:
+        pass
+    index_snapshot(index, load_previous_snapshot(auto_path))
+    save_field_index(index, path)
+    return index
+
+
+def lookup_field_index(index, key, as_of):
+    """Newest observation visible at `as_of` that is still within 2x half-life, else None."""
+    as_of_dt = parse_date_like(as_of) or datetime.now(timezone.utc)
+    for entry in (index or {}).get(key) or []:
+        observed = parse_date_like(entry.get("observedAt"))
+        if not observed or observed > as_of_dt:
+            continue
+        if is_stale(entry.get("observedAt"), as_of_dt, key):
+            return None
+        return entry
+    return None
+
+
+def backfill_from_previous(payload, previous, as_of_date=None, field_index=None):
+    if not payload or not (previous or field_index):
         return []
+    previous = previous or {}
     data = payload.get("data") or {}
     sources = payload.get("sources") or {}
     field_obs = payload.get("fieldObservedAt") or {}
@@ -388,20 +755,29 @@ def backfill_from_previous(payload, previous, as_of_date=None):
 
     now_iso = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     as_of = as_of_date or payload.get("targetDate") or payload.get("generatedAt") or now_iso
-    keys = list(dict.fromkeys(REQUIRED_FIELDS + ["ethSpotPrice", "cexTvl"]))
+    keys = SNAPSHOT_FIELDS
 
     filled = []
+    indexed = []
     for key in keys:
         if data.get(key) is not None:
             continue
         prev_val = prev_data.get(key)
-        if prev_val is None:
-            continue
         observed_at = prev_obs.get(key) or prev_upd.get(key) or previous.get("generatedAt")
-        if is_stale(observed_at, as_of, key):
-            continue
+        if prev_val is not None and not is_stale(observed_at, as_of, key):
+            source = prev_sources.get(key) or sources.get(key) or "Local cache"
+        else:
+            # The previous snapshot may itself have been missing this field; an older, still fresh
+            # observation can live in the fallback index.
+            entry = lookup_field_index(field_index, key, as_of) if field_index else None
+            if not entry:
+                continue
+            prev_val = entry.get("value")
+            observed_at = entry.get("observedAt")
+            source = entry.get("source") or sources.get(key) or "Local cache"
+            indexed.append(key)
         data[key] = prev_val
-        sources[key] = prev_sources.get(key) or sources.get(key) or "Local cache"
+        sources[key] = source
         field_obs[key] = observed_at
         field_upd[key] = observed_at
         field_fetch[key] = now_iso
@@ -413,7 +789,11 @@ def backfill_from_previous(payload, previous, as_of_date=None):
         errors = payload.get("errors")
         if not isinstance(errors, list):
             errors = []
-        errors.append("Local cache fallback: " + ", ".join(filled))
+        from_previous = [key for key in filled if key not in indexed]
+        if from_previous:
+            errors.append("Local cache fallback: " + ", ".join(from_previous))
+        if indexed:
+            errors.append("Field index fallback: " + ", ".join(indexed))
         payload["errors"] = errors
 
     payload["data"] = data
@@ -812,7 +1192,7 @@ def parse_farside_table(text):
     if len(rows) <= 0:
         return []
     parsed = [{"date": row[1], "total": parse_number(row[-2])} for row in rows if row[1]]
-    return list(reversed(parsed[-30:]))
+    return list(reversed(parsed))
 
 
 def parse_farside_rows(text):
@@ -832,6 +1212,141 @@ def parse_farside_rows(text):
             rows.append({"date": parts[0], "total": total, "sum": sum(components)})
     return rows
 
+
+FARSIDE_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}|\d{2}\s\w{3}\s\d{4}")
+
+
+def parse_farside_flows(text):
+    """Every dated row of a Farside flow table, oldest first, as
+    {"date": "YYYY-MM-DD", "total", "components": {issuer: flow}, "sum"}.
+
+    Issuer names come from the first header row whose width matches the data rows (tickers);
+    otherwise components are keyed by column position. `sum` is None for total-only tables.
+    """
+    header = None
+    rows = []
+    for line in (text or "").split("\n"):
+        if not line.strip().startswith("|"):
+            continue
+        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+        if all(re.fullmatch(r":?-*:?", cell) for cell in cells):
+            continue
+        date_key = normalize_farside_date(cells[0]) if FARSIDE_DATE_RE.search(cells[0]) else None
+        if not date_key:
+            if header is None and not rows and len(cells) > 1:
+                header = cells
+            continue
+        try:
+            values = [parse_number(cell) for cell in cells[1:]]
+        except ValueError:
+            continue
+        if not values:
+            continue
+        names = header[1:-1] if header and len(header) == len(cells) else []
+        if len(names) != len(values) - 1:
+            names = [f"col{idx}" for idx in range(1, len(values))]
+        rows.append(
+            {
+                "date": date_key,
+                "total": values[-1],
+                "components": dict(zip(names, values[:-1])),
+                "sum": round(sum(values[:-1]), 4) if len(values) > 1 else None,
+            }
+        )
+    return rows
+
+
+class EtfFlowStore:
+    """Farside daily flows accumulated across fetches in one JSON file, one series per page.
+
+    Farside pages carry the whole history, but the collector used to keep only the last rows of a
+    single fetch. Every fetch now merges all dated rows here, deduped by date: a newer row replaces
+    the stored one (late issuers get filled in) unless it fails the total-vs-components checksum
+    and the stored row passed. Historical ETF windows are then read by bisecting a sorted date
+    index instead of downloading and re-parsing the page for every backfill date.
+    """
+
+    def __init__(self, path=ETF_FLOW_PATH, tolerance=FARSIDE_CHECKSUM_TOLERANCE):
+        self.path = path
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._series = {}
+        self._dates = {}
+
+    def _load_locked(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                series = (json.load(fp) or {}).get("series") or {}
+        except (OSError, ValueError, AttributeError):
+            series = {}
+        self._mtime = mtime
+        self._series = series
+        self._dates = {key: sorted((item.get("byDate") or {})) for key, item in series.items()}
+
+    def merge(self, key, rows, source, fetched_at=None):
+        """Merge parsed rows into series `key`; returns {"added", "updated", "mismatches"}."""
+        result = {"added": 0, "updated": 0, "mismatches": []}
+        with self._lock:
+            self._load_locked()
+            series = self._series.setdefault(key, {"byDate": {}})
+            by_date = series.setdefault("byDate", {})
+            for row in rows or ():
+                mismatch = row.get("sum") is not None and abs(row["total"] - row["sum"]) > self.tolerance
+                if mismatch:
+                    result["mismatches"].append(row["date"])
+                existing = by_date.get(row["date"])
+                if existing and mismatch and not existing.get("mismatch"):
+                    continue
+                entry = {"total": row["total"], "components": row.get("components") or {}, "source": source}
+                if mismatch:
+                    entry["mismatch"] = round(row["total"] - row["sum"], 4)
+                if existing is None:
+                    result["added"] += 1
+                elif {k: v for k, v in existing.items() if k != "source"} != {
+                    k: v for k, v in entry.items() if k != "source"
+                }:
+                    result["updated"] += 1
+                else:
+                    continue
+                by_date[row["date"]] = entry
+            series["fetchedAt"] = fetched_at or datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            self._dates[key] = sorted(by_date)
+            write_json_atomic(self.path, {"series": self._series})
+            try:
+                self._mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                self._mtime = None
+        return result
+
+    def covers(self, key, date):
+        """True when series `key` was fetched after `date` and has a row on or before it."""
+        with self._lock:
+            self._load_locked()
+            fetched = ((self._series.get(key) or {}).get("fetchedAt") or "")[:10]
+            dates = self._dates.get(key) or []
+        return bool(fetched > date and dates and dates[0] <= date)
+
+    def window(self, key, date, length):
+        """Up to `length` rows on or before `date`, newest first, as [{"date", "total"}]."""
+        with self._lock:
+            self._load_locked()
+            dates = self._dates.get(key) or []
+            by_date = (self._series.get(key) or {}).get("byDate") or {}
+            end = bisect.bisect_right(dates, date)
+            picked = dates[max(0, end - length) : end]
+            return [{"date": day, "total": by_date[day]["total"]} for day in reversed(picked)]
+
+
+ETF_FLOWS = EtfFlowStore()
+
+
 def is_cloudflare_blocked(text):
     if not text:
         return True
@@ -839,7 +1354,9 @@ def is_cloudflare_blocked(text):
     return "just a moment" in lowered or "cf-browser-verification" in lowered or "cloudflare" in lowered
 
 
-def fetch_farside_source(url, label):
+def fetch_farside_source(url, label, store=None, key=None):
+    """Parse one Farside page (direct, falling back to Jina). With `store`, every dated row of the
+    text that was used is merged into it under `key`."""
     errors = []
     direct_text = fetch_text(url)
     direct_blocked = is_cloudflare_blocked(direct_text)
@@ -855,6 +1372,7 @@ def fetch_farside_source(url, label):
                 delta = abs(rows[0]["total"] - rows[0]["sum"])
                 if delta > 0.1:
                     errors.append(f"{label} total mismatch vs components: {delta:.2f}")
+            store_farside_flows(store, key, jina_text, f"{label} (Jina)", errors)
             return jina_parsed, f"{label} (Jina)", errors
     if direct_parsed:
         try:
@@ -871,23 +1389,46 @@ def fetch_farside_source(url, label):
             delta = abs(rows[0]["total"] - rows[0]["sum"])
             if delta > 0.1:
                 errors.append(f"{label} total mismatch vs components: {delta:.2f}")
+        store_farside_flows(store, key, direct_text, label, errors)
         return direct_parsed, label, errors
     return [], None, errors
 
 
+def store_farside_flows(store, key, text, label, errors):
+    if store is None or not key:
+        return
+    try:
+        merged = store.merge(key, parse_farside_flows(text), label)
+    except OSError as exc:
+        errors.append(f"{label} flow store write failed: {exc}")
+        return
+    if merged["mismatches"]:
+        errors.append(f"{label} checksum mismatch on {len(merged['mismatches'])} stored rows")
+
+
 def fetch_farside(target_date=None):
-    urls = [
-        ("https://farside.co.uk/ethereum-etf-flow/", "Farside: ethereum-etf-flow"),
-        ("https://farside.co.uk/bitcoin-etf-flow/", "Farside: bitcoin-etf-flow"),
-    ]
+    historical_run = bool(target_date and target_date != today_key())
+    errors = []
+    if historical_run:
+        # Dates the ETH store has already seen published are answered locally, without a download.
+        # The BTC page is only a fallback for a failed ETH download, never for an ETH coverage gap.
+        key, _url, label = FARSIDE_PAGES[0]
+        if ETF_FLOWS.covers(key, target_date):
+            return farside_result(ETF_FLOWS.window(key, target_date, 11), target_date, f"{label} (local store)", errors)
     parsed = []
     source = None
-    errors = []
-    for url, label in urls:
-        parsed, source, extra_errors = fetch_farside_source(url, label)
+    used_key = None
+    for key, url, label in FARSIDE_PAGES:
+        parsed, source, extra_errors = fetch_farside_source(url, label, store=ETF_FLOWS, key=key)
         errors.extend(extra_errors)
         if parsed:
+            used_key = key
             break
+    if historical_run and used_key:
+        stored = ETF_FLOWS.window(used_key, target_date, 11)
+        if not stored:
+            errors.append(f"no Farside rows on or before {target_date}")
+        return farside_result(stored, target_date, source, errors)
     series = []
     for item in parsed:
         date_key = normalize_farside_date(item.get("date"))
@@ -896,21 +1437,25 @@ def fetch_farside(target_date=None):
         series.append({"date": date_key, "total": item.get("total", 0)})
     series.sort(key=lambda item: item["date"], reverse=True)
     if target_date and series:
-        idx = index_for_date(series, target_date)
-        window = series[idx : idx + 10]
-        etf1d = series[idx]["total"] if idx < len(series) else 0
-        etf5d = sum(item["total"] for item in window[:5])
-        etf10d = sum(item["total"] for item in window[:10])
-        prev_val = series[idx + 1]["total"] if idx + 1 < len(series) else 0
-        prev_extreme = prev_val <= -180
-        obs_date = series[idx]["date"] if idx < len(series) else None
-    else:
-        etf1d = parsed[0]["total"] if parsed else 0
-        etf5d = sum(item["total"] for item in parsed[:5])
-        etf10d = sum(item["total"] for item in parsed[:10])
-        prev_extreme = False
-        obs_date = series[0]["date"] if series else None
+        return farside_result(series[index_for_date(series, target_date) :], target_date, source, errors)
+    etf1d = parsed[0]["total"] if parsed else 0
+    etf5d = sum(item["total"] for item in parsed[:5])
+    etf10d = sum(item["total"] for item in parsed[:10])
+    obs_date = series[0]["date"] if series else None
+    return farside_payload(etf1d, etf5d, etf10d, False, obs_date, source, errors, bool(parsed))
+
 
+def farside_result(series, target_date, source, errors):
+    """ETF windows from `series` (newest first, starting at the row for `target_date`)."""
+    if not series:
+        return farside_payload(0, 0, 0, False, None, source, errors, False)
+    etf5d = sum(item["total"] for item in series[:5])
+    etf10d = sum(item["total"] for item in series[:10])
+    prev_val = series[1]["total"] if len(series) > 1 else 0
+    return farside_payload(series[0]["total"], etf5d, etf10d, prev_val <= -180, series[0]["date"], source, errors, True)
+
+
+def farside_payload(etf1d, etf5d, etf10d, prev_extreme, obs_date, source, errors, found):
     obs_stamp = f"{obs_date}T00:00:00Z" if obs_date else None
     return (
         {
@@ -925,7 +1470,7 @@ def fetch_farside(target_date=None):
             "etf10d": source or "Farside: 未获取",
             "prevEtfExtremeOutflow": "Derived: prior day ETF extreme",
         },
-        [] if parsed else ["etf1d", "etf5d", "etf10d"],
+        [] if found else ["etf1d", "etf5d", "etf10d"],
         {
             "errors": errors,
             "observedAt": {
@@ -1634,15 +2179,502 @@ def build_field_timestamps(data, sources, target_date, generated_at, observed_ov
     return observed, fetched, field_updated
 
 
-def main(argv=None):
-    import argparse
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--date", dest="target_date", default=None)
-    parser.add_argument("--output", dest="output_path", default=os.path.join("src", "data", "auto.json"))
-    args = parser.parse_args(argv if argv is not None else [])
-    target_date = args.target_date
+class CaptureStore:
+    """Point-in-time captures of latest-only sources, one file per source under `directory`.
+
+    Each file is {"byDate": {"YYYY-MM-DD": {"data", "sources", "capturedAt"}}}: a compact projection
+    of what the source returned on a day the collector ran for today. Historical runs read the entry
+    for their date (or the newest earlier one still inside the outputs' shortest half-life, never a
+    later one) instead of asking the network for "now". Files are re-read only when their mtime
+    changes and entries older than `retain_days` are pruned on write.
+    """
+
+    def __init__(self, directory=CAPTURE_DIR, retain_days=CAPTURE_RETAIN_DAYS):
+        self.directory = directory
+        self.retain_days = retain_days
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def _path(self, name):
+        slug = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+        return os.path.join(self.directory, f"{slug}.json")
+
+    def _load(self, name):
+        path = self._path(name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+        cached = self._files.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8") as fp:
+                by_date = (json.load(fp) or {}).get("byDate") or {}
+        except (OSError, ValueError, AttributeError):
+            by_date = {}
+        self._files[path] = (mtime, by_date)
+        return by_date
+
+    def record(self, spec, date, data, sources, captured_at):
+        projection = {key: value for key, value in (data or {}).items() if key in spec["outputs"]}
+        if not projection:
+            return False
+        cutoff = shift_date_iso(date, -self.retain_days) or ""
+        with self._lock:
+            by_date = {key: entry for key, entry in self._load(spec["name"]).items() if key >= cutoff}
+            by_date[date] = {
+                "data": projection,
+                "sources": {key: label for key, label in (sources or {}).items() if key in projection},
+                "capturedAt": captured_at,
+            }
+            try:
+                write_json_atomic(self._path(spec["name"]), {"source": spec["name"], "byDate": by_date})
+            except OSError:
+                return False
+            self._files.pop(self._path(spec["name"]), None)
+        return True
+
+    def lookup(self, spec, date, exact=False):
+        """The capture for `date`, else (unless `exact`) the newest earlier one within the outputs'
+        half-life."""
+        with self._lock:
+            by_date = self._load(spec["name"])
+        entry = by_date.get(date)
+        if entry:
+            return date, entry
+        if exact:
+            return None
+        max_age = min((resolve_half_life_days(key) for key in spec["outputs"]), default=0)
+        earliest = shift_date_iso(date, -max_age) or date
+        earlier = [key for key in by_date if earliest <= key < date]
+        if not earlier:
+            return None
+        day = max(earlier)
+        return day, by_date[day]
+
+    def lookup_block(self, spec, date, exact=False):
+        """lookup() shaped as a fetcher result: (data, sources, missing, {"observedAt": ...})."""
+        hit = self.lookup(spec, date, exact)
+        if not hit:
+            return None
+        day, entry = hit
+        data = dict(entry.get("data") or {})
+        if not data:
+            return None
+        stamp = entry.get("capturedAt") or f"{day}T00:00:00Z"
+        sources = {key: f"{(entry.get('sources') or {}).get(key) or spec['name']} [captured {day}]" for key in data}
+        return data, sources, [], {"observedAt": {key: stamp for key in data}}
+
+
+CAPTURES = CaptureStore()
+
+
+def derive_tridomain(data, observed, historical_run=False):
+    values = compute_tridomain(data.get("_closeSeries") or [])
+    labels = {
+        "topo": "Derived: price structure (Binance klines)",
+        "spectral": "Derived: price cycle ratio (Binance klines)",
+        "roughPath": "Derived: tail risk ES (Binance klines)",
+        "deltaES": "Derived: tail risk ES (Binance klines)",
+    }
+    return values, (labels if values else {}), {}
+
+
+def derive_potentials(data, observed, historical_run=False):
+    labels = {
+        "cognitivePotential": "Derived: trendMomentum/divergence",
+        "liquidityPotential": "Derived: stablecoin/ETF/RRP",
+        "onchainReflexivity": "Derived: elasticity/float",
+        "sentimentThreshold": "Alternative.me FNG",
+    }
+    stamps = {"sentimentThreshold": observed["fearGreed"]} if observed.get("fearGreed") else {}
+    return compute_potentials(data), labels, stamps
+
+
+def derive_stable_share(data, observed, historical_run=False):
+    if not all(key in data for key in ("totalStableNow", "totalStableAgo", "ethStableNow", "ethStableAgo")):
+        return {}, {}, {}
+    total_now = data["totalStableNow"] or 1
+    total_ago = data["totalStableAgo"] or 1
+    eth_now = data["ethStableNow"] or 0
+    eth_ago = data["ethStableAgo"] or 0
+    share_now = eth_now / total_now
+    share_ago = eth_ago / total_ago
+    share_change = share_now - share_ago
+    mapping_ratio_down = share_change < 0
+    rwa_share = data.get("rwaShareEth") or 0
+    rsd_score = clamp(((share_now + rwa_share) / 2) * 10, 0, 10)
+    labels = {
+        "rsdScore": "Derived: stablecoin share + RWA share (DefiLlama)"
+        if "rwaShareEth" in data
+        else "Derived: stablecoin share (DefiLlama)",
+        "mappingRatioDown": "Derived: ETH stablecoin share 30d",
+    }
+    stamp = observed.get("ethStableNow") or observed.get("stablecoin30d")
+    stamps = {"mappingRatioDown": stamp, "rsdScore": stamp} if stamp else {}
+    return {"rsdScore": rsd_score, "mappingRatioDown": mapping_ratio_down}, labels, stamps
+
+
+def derive_fee_scores(data, observed, historical_run=False):
+    if "fee7d" not in data or "fee30d" not in data:
+        return {}, {}, {}
+    fee7d = data["fee7d"] or 0
+    fee30d = data["fee30d"] or 0
+    weekly_avg = fee30d / 4 if fee30d else 0
+    lstc_score = clamp((fee7d / weekly_avg) if weekly_avg else 0, 0, 1) * 10
+    net_issuance_high = fee7d < (weekly_avg * 0.6 if weekly_avg else 0)
+    labels = {
+        "lstcScore": "Derived: ETH fees (DefiLlama)",
+        "netIssuanceHigh": "Derived: low fees imply high net issuance",
+    }
+    stamp = observed.get("fee7d") or observed.get("fee30d")
+    stamps = {"lstcScore": stamp, "netIssuanceHigh": stamp} if stamp else {}
+    return {"lstcScore": lstc_score, "netIssuanceHigh": net_issuance_high}, labels, stamps
+
+
+# Source registry, in run order. `outputs` are the fields a source fills (also its missing list when
+# it raises); `history` is "asof" when it can answer for a past date and "latest" when it only knows
+# "now"; `when` limits a source to "today" or "historical" runs; `cost` is a rough relative weight
+# (about seconds on a cold cache). A `fallback_for` source only runs when that source came back with
+# missing fields; its result is captured under the primary's name. `capture` sources only know "now"
+# (or fall back to a "now" page), so today's runs record them in CAPTURES and historical runs read
+# the capture for their date instead of the network; "asof" ones only take an exact-date capture,
+# and an earlier day's one only when their as-of fetch fails. `cadence` is how often --daemon
+# refetches it: {"every": seconds} or {"at": ["HH:MM", ...] (UTC), "weekdays": bool}. Fetchers are
+# looked up by name at call time so tests can patch them.
+SOURCES = [
+    {
+        "name": "FRED(macro)",
+        "fetch": "fetch_macro",
+        "outputs": [
+            "dxy5d",
+            "dxy3dUp",
+            "us2yWeekBp",
+            "fciUpWeeks",
+            "policyWindow",
+            "preMeeting2y",
+            "current2y",
+            "preMeetingDxy",
+            "currentDxy",
+            "rrpChange",
+            "tgaChange",
+            "srfChange",
+            "ism",
+        ],
+        "history": "asof",
+        "cost": 8,
+        # H.15 rates and the broad dollar index post in the US afternoon on business days.
+        "cadence": {"at": ["21:30"], "weekdays": True},
+    },
+    {
+        "name": "DefiLlama(stablecoin)",
+        "fetch": "fetch_defillama",
+        "outputs": ["stablecoin30d", "totalStableNow", "totalStableAgo"],
+        "history": "asof",
+        "cost": 2,
+        "cadence": {"at": ["01:30"]},
+    },
+    {
+        "name": "DefiLlama(stablecoin_eth)",
+        "fetch": "fetch_stablecoin_eth",
+        "outputs": ["ethStableNow", "ethStableAgo"],
+        "history": "asof",
+        "cost": 2,
+        "cadence": {"at": ["01:30"]},
+    },
+    {
+        "name": "Farside(ETF)",
+        "fetch": "fetch_farside",
+        "outputs": ["etf1d", "etf5d", "etf10d", "prevEtfExtremeOutflow"],
+        "history": "asof",
+        "cost": 4,
+        # After the US close, and again in the UK morning when late issuers have been filled in.
+        "cadence": {"at": ["22:30", "07:30"]},
+    },
+    # CoinGecko historical access is limited for public API users; use Bitfinex for history runs.
+    {
+        "name": "Bitfinex(market)",
+        "fetch": "fetch_bitfinex_market",
+        "outputs": ["ethSpotPrice", "mcapGrowth", "mcapElasticity", "floatDensity"],
+        "history": "asof",
+        "when": "historical",
+        "cost": 2,
+    },
+    {
+        "name": "Bitfinex(OHLC)",
+        "fetch": "fetch_bitfinex_ohlc",
+        "outputs": [
+            "crowdingIndex",
+            "longWicks",
+            "reverseFishing",
+            "shortFailure",
+            "volumeConfirm",
+            "trendMomentum",
+            "divergence",
+            "_closeSeries",
+            "_volumeSeries",
+        ],
+        "history": "asof",
+        "when": "historical",
+        "cost": 2,
+    },
+    {
+        "name": "CoinGecko(market)",
+        "fetch": "fetch_coingecko_market",
+        "outputs": ["ethSpotPrice", "mcapGrowth", "mcapElasticity", "floatDensity", "trendMomentum", "divergence"],
+        "history": "asof",
+        "when": "today",
+        "cost": 3,
+        "cadence": {"every": 3600},
+    },
+    {
+        "name": "CoinGecko(OHLC)",
+        "fetch": "fetch_coingecko_ohlc",
+        "outputs": [
+            "crowdingIndex",
+            "longWicks",
+            "reverseFishing",
+            "shortFailure",
+            "volumeConfirm",
+            "trendMomentum",
+            "divergence",
+            "_closeSeries",
+            "_volumeSeries",
+        ],
+        "history": "asof",
+        "when": "today",
+        "cost": 3,
+        "cadence": {"every": 3600},
+    },
+    {
+        "name": "Coinglass(liquidation)",
+        "fetch": "fetch_coinglass_liquidations",
+        "outputs": ["liquidationUsd"],
+        "history": "asof",
+        "capture": True,
+        "cost": 2,
+        "cadence": {"every": 3600},
+    },
+    {
+        "name": "DefiLlama(CEX)",
+        "fetch": "fetch_defillama_cex",
+        "outputs": ["exchBalanceTrend", "exchStableDelta", "cexTvl"],
+        "history": "latest",
+        "capture": True,
+        "cost": 2,
+        "cadence": {"every": 6 * 3600},
+    },
+    {
+        "name": "CoinGecko(CEX proxy)",
+        "fetch": "fetch_exchange_proxy",
+        "outputs": ["exchBalanceTrend", "exchStableDelta"],
+        "history": "latest",
+        "fallback_for": "DefiLlama(CEX)",
+        "fallback_note": "CEX: DefiLlama unavailable, fallback to exchange proxy",
+        "cost": 2,
+    },
+    # RWA 协议列表（/protocols）体量巨大且不支持历史回溯；历史回测时不引入该维度，避免“用未来数据回填过去”。
+    {
+        "name": "DefiLlama(RWA)",
+        "fetch": "fetch_rwa_protocols",
+        "outputs": ["rwaShareEth"],
+        "history": "latest",
+        "when": "today",
+        "capture": True,
+        "cost": 10,
+        "cadence": {"at": ["01:30"]},
+    },
+    {
+        "name": "DefiLlama(Fees)",
+        "fetch": "fetch_eth_fees",
+        "outputs": ["fee7d", "fee30d"],
+        "history": "asof",
+        "cost": 2,
+        "cadence": {"at": ["01:30"]},
+    },
+    {
+        "name": "AltMe(FNG)",
+        "fetch": "fetch_fear_greed",
+        "outputs": ["fearGreed"],
+        "history": "asof",
+        "cost": 1,
+        "cadence": {"at": ["00:15"]},
+    },
+    {
+        "name": "GDELT(Distribution)",
+        "fetch": "fetch_distribution_gate",
+        "outputs": ["distributionGateCount"],
+        "history": "latest",
+        "capture": True,
+        "cost": 3,
+        "cadence": {"every": 6 * 3600},
+    },
+]
+
+# Fields computed from source outputs after all sources ran. `inputs` maps each output to the
+# fields it reads, so a partial run only pulls in the sources it really needs.
+DERIVED = [
+    {
+        "name": "tridomain",
+        "derive": "derive_tridomain",
+        "inputs": {key: ["_closeSeries"] for key in ("topo", "spectral", "roughPath", "deltaES")},
+    },
+    {
+        "name": "potentials",
+        "derive": "derive_potentials",
+        "inputs": {
+            "cognitivePotential": ["trendMomentum", "divergence"],
+            "liquidityPotential": ["stablecoin30d", "etf10d", "rrpChange"],
+            "onchainReflexivity": ["mcapElasticity", "floatDensity"],
+            "sentimentThreshold": ["fearGreed"],
+        },
+    },
+    {
+        "name": "stableShare",
+        "derive": "derive_stable_share",
+        "inputs": {
+            "rsdScore": ["totalStableNow", "totalStableAgo", "ethStableNow", "ethStableAgo", "rwaShareEth"],
+            "mappingRatioDown": ["totalStableNow", "totalStableAgo", "ethStableNow", "ethStableAgo"],
+        },
+    },
+    {
+        "name": "feeScores",
+        "derive": "derive_fee_scores",
+        "inputs": {
+            "lstcScore": ["fee7d", "fee30d"],
+            "netIssuanceHigh": ["fee7d", "fee30d"],
+        },
+    },
+]
+
+# Source outputs that only feed DERIVED steps and never reach the snapshot.
+INTERMEDIATE_FIELDS = (
+    "_closeSeries",
+    "_volumeSeries",
+    "totalStableNow",
+    "totalStableAgo",
+    "ethStableNow",
+    "ethStableAgo",
+    "rwaShareEth",
+    "fee7d",
+    "fee30d",
+    "fearGreed",
+)
+
+
+def plan_collection(fields=None, target_date=None):
+    """Resolve which sources and derived steps produce `fields` (None = everything) for a run.
+
+    Walks the DERIVED dependencies back to source outputs, then keeps the sources (in registry
+    order) that can run for this date and produce at least one needed field; a fallback source is
+    kept with its primary. Fields nothing can produce for this date end up in `unresolved`.
+    Returns {"sources", "derived": {name: [outputs]}, "fields", "unresolved", "cost"}.
+    """
+    historical_run = bool(target_date and target_date != today_key())
+    eligible = [
+        spec
+        for spec in SOURCES
+        if spec.get("when") in (None, "historical" if historical_run else "today")
+        or (historical_run and spec.get("capture"))
+    ]
+    if fields is None:
+        derived = {step["name"]: list(step["inputs"]) for step in DERIVED}
+        needed = None
+    else:
+        needed = set(fields)
+        derived = {}
+        frontier = list(needed)
+        while frontier:
+            key = frontier.pop()
+            for step in DERIVED:
+                if key not in step["inputs"]:
+                    continue
+                outputs = derived.setdefault(step["name"], [])
+                if key not in outputs:
+                    outputs.append(key)
+                for dep in step["inputs"][key]:
+                    if dep not in needed:
+                        needed.add(dep)
+                        frontier.append(dep)
+    picked = [spec for spec in eligible if needed is None or needed.intersection(spec["outputs"])]
+    names = {spec["name"] for spec in picked}
+    picked = [spec for spec in picked if not spec.get("fallback_for") or spec["fallback_for"] in names]
+    produced = set()
+    for spec in picked:
+        produced.update(spec["outputs"])
+    for step in DERIVED:
+        produced.update(step["inputs"])
+    unresolved = sorted(key for key in (fields or ()) if key not in produced)
+    return {
+        "sources": picked,
+        "derived": {name: sorted(outputs) for name, outputs in derived.items()},
+        "fields": None if fields is None else sorted(set(fields)),
+        "unresolved": unresolved,
+        "cost": sum(spec.get("cost", 1) for spec in picked if not spec.get("fallback_for")),
+    }
+
+
+class CollectCancelled(RuntimeError):
+    pass
+
+
+def collect(target_date=None, options=None):
+    """Run the sources for `target_date` (None = today) and return the auto.json payload.
+
+    Library entry point for long-lived callers (server.py): no argparse, no snapshot writes, and
+    module-level caches (DNS_CACHE, parsed responses) stay warm between calls.
+    """
+    # options:
+    #   cancel_event     threading.Event, checked between sources
+    #   deadline         time.monotonic() value, checked between sources
+    #   progress         progress(name, done, total) after each source
+    #   fields           snapshot keys; only the sources plan_collection() picks for them run
+    #   probe            False skips the proxy probe
+    #   captures         CaptureStore for latest-only sources (default CAPTURES)
+    #   refresh_policy   "stale-only" refetches fields_due_for_refresh() and carries the rest
+    #   intermediate     dict that receives the INTERMEDIATE_FIELDS the run produced
+    options = options or {}
+    cancel_event = options.get("cancel_event")
+    deadline = options.get("deadline")
+    progress = options.get("progress")
     errors = []
     observed_overrides = {}
+    completed = []
+    historical_run = bool(target_date and target_date != today_key())
+    fields = options.get("fields")
+    policy = options.get("refresh_policy") or "full"
+    if policy not in REFRESH_POLICIES:
+        raise ValueError(f"unknown refresh policy: {policy}")
+    previous = None
+    carried = []
+    if policy == "stale-only" and not historical_run:
+        previous = load_previous_snapshot()
+        fields = select_refresh_fields(fields, previous)
+    plan = plan_collection(fields, target_date)
+    captures = options.get("captures", CAPTURES)
+    captured = {}
+    # Sources with an as-of API only take a capture of the exact date up front; a neighbouring
+    # day's capture is kept for when that API fails.
+    capture_fallbacks = {}
+    if historical_run and captures is not None:
+        for spec in plan["sources"]:
+            if not spec.get("capture"):
+                continue
+            asof = spec.get("history") == "asof"
+            block = captures.lookup_block(spec, target_date, exact=asof)
+            if block:
+                captured[spec["name"]] = block
+            elif asof:
+                block = captures.lookup_block(spec, target_date)
+                if block:
+                    capture_fallbacks[spec["name"]] = block
+    runnable = [
+        spec
+        for spec in plan["sources"]
+        if spec["name"] in captured or spec.get("when") in (None, "historical" if historical_run else "today")
+    ]
+    planned = sum(1 for spec in runnable if not spec.get("fallback_for"))
 
     def merge_observed(meta):
         if not isinstance(meta, dict):
@@ -1654,7 +2686,25 @@ def main(argv=None):
             if key and stamp:
                 observed_overrides[key] = stamp
 
+    def check_cancel():
+        if cancel_event is not None and cancel_event.is_set():
+            raise CollectCancelled("collect cancelled")
+        if deadline is not None and time.monotonic() > deadline:
+            raise CollectCancelled("collect deadline exceeded")
+
     def safe_call(name, func, missing_keys):
+        check_cancel()
+        try:
+            return _safe_call(name, func, missing_keys)
+        finally:
+            completed.append(name)
+            if progress:
+                try:
+                    progress(name, len(completed), max(planned, len(completed)))
+                except Exception:
+                    pass
+
+    def _safe_call(name, func, missing_keys):
         try:
             result = func(target_date)
             if not isinstance(result, tuple):
@@ -1687,171 +2737,89 @@ def main(argv=None):
             errors.append(f"{name}: {exc}")
             return {}, {}, missing_keys
 
-    macro = safe_call(
-        "FRED(macro)",
-        fetch_macro,
-        [
-            "dxy5d",
-            "dxy3dUp",
-            "us2yWeekBp",
-            "fciUpWeeks",
-            "policyWindow",
-            "preMeeting2y",
-            "current2y",
-            "preMeetingDxy",
-            "currentDxy",
-            "rrpChange",
-            "tgaChange",
-            "srfChange",
-            "ism",
-        ],
-    )
-    stable = safe_call("DefiLlama(stablecoin)", fetch_defillama, ["stablecoin30d"])
-    stable_eth = safe_call("DefiLlama(stablecoin_eth)", fetch_stablecoin_eth, ["mappingRatioDown"])
-    etf = safe_call("Farside(ETF)", fetch_farside, ["etf1d", "etf5d", "etf10d"])
-    # CoinGecko historical access is limited for public API users; use Bitfinex for history runs.
-    if target_date and target_date != today_key():
-        market = safe_call(
-            "Bitfinex(market)",
-            fetch_bitfinex_market,
-            ["ethSpotPrice", "mcapGrowth", "mcapElasticity", "floatDensity"],
-        )
-        klines = safe_call(
-            "Bitfinex(OHLC)",
-            fetch_bitfinex_ohlc,
-            ["crowdingIndex", "longWicks", "reverseFishing", "shortFailure", "volumeConfirm", "trendMomentum", "divergence"],
-        )
-    else:
-        market = safe_call(
-            "CoinGecko(market)",
-            fetch_coingecko_market,
-            ["mcapGrowth", "mcapElasticity", "floatDensity", "trendMomentum", "divergence"],
-        )
-        klines = safe_call(
-            "CoinGecko(OHLC)",
-            fetch_coingecko_ohlc,
-            ["crowdingIndex", "longWicks", "reverseFishing", "shortFailure", "volumeConfirm"],
+    results = {}
+    for spec in runnable:
+        primary = spec.get("fallback_for")
+        if primary:
+            if primary in captured or primary not in results or not results[primary][2]:
+                continue
+            block = safe_call(spec["name"], globals()[spec["fetch"]], results[primary][2])
+            if block[0]:
+                errors.append(spec["fallback_note"])
+                results[primary] = block
+            continue
+        if spec["name"] in captured:
+            results[spec["name"]] = safe_call(spec["name"], lambda _date, block=captured[spec["name"]]: block, [])
+            continue
+        results[spec["name"]] = safe_call(
+            spec["name"],
+            globals()[spec["fetch"]],
+            [key for key in spec["outputs"] if key not in INTERMEDIATE_FIELDS],
         )
-    liquidation = safe_call("Coinglass(liquidation)", fetch_coinglass_liquidations, ["liquidationUsd"])
-    cex = safe_call("DefiLlama(CEX)", fetch_defillama_cex, ["exchBalanceTrend", "exchStableDelta"])
-    if cex[2]:
-        proxy = safe_call("CoinGecko(CEX proxy)", fetch_exchange_proxy, cex[2])
-        if proxy[0]:
-            errors.append("CEX: DefiLlama unavailable, fallback to exchange proxy")
-            cex = proxy
-    historical_run = bool(target_date and target_date != today_key())
-    # RWA 协议列表（/protocols）体量巨大且不支持历史回溯；历史回测时不引入该维度，避免“用未来数据回填过去”。
-    rwa = ({}, {}, []) if historical_run else safe_call("DefiLlama(RWA)", fetch_rwa_protocols, ["rsdScore"])
-    fees = safe_call("DefiLlama(Fees)", fetch_eth_fees, ["lstcScore", "netIssuanceHigh"])
-    sentiment = safe_call("AltMe(FNG)", fetch_fear_greed, ["sentimentThreshold"])
-    dist_gate = safe_call("GDELT(Distribution)", fetch_distribution_gate, ["distributionGateCount"])
-
-    data, sources, missing = merge(
-        macro,
-        stable,
-        stable_eth,
-        etf,
-        market,
-        liquidation,
-        cex,
-        klines,
-        rwa,
-        fees,
-        sentiment,
-        dist_gate,
-    )
+        fallback = capture_fallbacks.get(spec["name"])
+        if fallback and (results[spec["name"]][2] or not results[spec["name"]][0]):
+            merge_observed(fallback[3])
+            errors.append(f"{spec['name']}: as-of fetch failed, using an earlier capture")
+            results[spec["name"]] = fallback[:3]
+    if not historical_run and captures is not None:
+        captured_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        for spec in runnable:
+            if spec.get("capture") and spec["name"] in results and results[spec["name"]][0]:
+                captures.record(spec, today_key(), results[spec["name"]][0], results[spec["name"]][1], captured_at)
+
+    data, sources, missing = merge(*results.values())
     missing = []
 
-    closes = data.get("_closeSeries") or []
-    tridomain = compute_tridomain(closes)
-    if tridomain:
-        data.update(tridomain)
-        sources.update(
-            {
-                "topo": "Derived: price structure (Binance klines)",
-                "spectral": "Derived: price cycle ratio (Binance klines)",
-                "roughPath": "Derived: tail risk ES (Binance klines)",
-                "deltaES": "Derived: tail risk ES (Binance klines)",
-            }
-        )
-    data.update(compute_potentials(data))
-    sources.update(
-        {
-            "cognitivePotential": "Derived: trendMomentum/divergence",
-            "liquidityPotential": "Derived: stablecoin/ETF/RRP",
-            "onchainReflexivity": "Derived: elasticity/float",
-            "sentimentThreshold": "Alternative.me FNG",
-        }
-    )
-    fg_stamp = observed_overrides.get("fearGreed")
-    if fg_stamp:
-        observed_overrides["sentimentThreshold"] = fg_stamp
-
-    if "totalStableNow" in data and "totalStableAgo" in data and "ethStableNow" in data and "ethStableAgo" in data:
-        total_now = data["totalStableNow"] or 1
-        total_ago = data["totalStableAgo"] or 1
-        eth_now = data["ethStableNow"] or 0
-        eth_ago = data["ethStableAgo"] or 0
-        share_now = eth_now / total_now
-        share_ago = eth_ago / total_ago
-        share_change = share_now - share_ago
-        mapping_ratio_down = share_change < 0
-        rwa_share = data.get("rwaShareEth") or 0
-        rsd_score = clamp(((share_now + rwa_share) / 2) * 10, 0, 10)
-        data.update({"rsdScore": rsd_score, "mappingRatioDown": mapping_ratio_down})
-        sources.update(
-            {
-                "rsdScore": "Derived: stablecoin share (DefiLlama)"
-                if historical_run
-                else "Derived: stablecoin share + RWA share (DefiLlama)",
-                "mappingRatioDown": "Derived: ETH stablecoin share 30d",
-            }
-        )
-        stable_stamp = observed_overrides.get("ethStableNow") or observed_overrides.get("stablecoin30d")
-        if stable_stamp:
-            observed_overrides["mappingRatioDown"] = stable_stamp
-            observed_overrides["rsdScore"] = stable_stamp
-
-    if "fee7d" in data and "fee30d" in data:
-        fee7d = data["fee7d"] or 0
-        fee30d = data["fee30d"] or 0
-        weekly_avg = fee30d / 4 if fee30d else 0
-        lstc_score = clamp((fee7d / weekly_avg) if weekly_avg else 0, 0, 1) * 10
-        net_issuance_high = fee7d < (weekly_avg * 0.6 if weekly_avg else 0)
-        data.update({"lstcScore": lstc_score, "netIssuanceHigh": net_issuance_high})
-        sources.update(
-            {
-                "lstcScore": "Derived: ETH fees (DefiLlama)",
-                "netIssuanceHigh": "Derived: low fees imply high net issuance",
-            }
-        )
-        fee_stamp = observed_overrides.get("fee7d") or observed_overrides.get("fee30d")
-        if fee_stamp:
-            observed_overrides["lstcScore"] = fee_stamp
-            observed_overrides["netIssuanceHigh"] = fee_stamp
+    for step in DERIVED:
+        wanted = plan["derived"].get(step["name"])
+        if not wanted:
+            continue
+        values, labels, stamps = globals()[step["derive"]](data, observed_overrides, historical_run)
+        for key in wanted:
+            if key in values:
+                data[key] = values[key]
+            if key in labels:
+                sources[key] = labels[key]
+            if stamps.get(key):
+                observed_overrides[key] = stamps[key]
 
     if target_date and target_date != today_key():
         errors.append("历史日期回抓：部分来源仅支持最新数据，已使用最新值补齐。")
 
-    data.pop("_closeSeries", None)
-    data.pop("_volumeSeries", None)
-    data.pop("totalStableNow", None)
-    data.pop("totalStableAgo", None)
-    data.pop("ethStableNow", None)
-    data.pop("ethStableAgo", None)
-    data.pop("rwaShareEth", None)
-    data.pop("fee7d", None)
-    data.pop("fee30d", None)
-    data.pop("fearGreed", None)
+    intermediate = options.get("intermediate")
+    for key in INTERMEDIATE_FIELDS:
+        value = data.pop(key, None)
+        if isinstance(intermediate, dict) and value is not None:
+            intermediate[key] = value
     generated_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     data = strip_none(data)
 
+    if policy == "stale-only" and previous and not historical_run:
+        prev_data = previous.get("data") or {}
+        prev_sources = previous.get("sources") or {}
+        prev_obs = previous.get("fieldObservedAt") or {}
+        for key in SNAPSHOT_FIELDS:
+            if key in fields or data.get(key) is not None or prev_data.get(key) is None:
+                continue
+            data[key] = prev_data[key]
+            if prev_sources.get(key):
+                sources[key] = prev_sources[key]
+            if prev_obs.get(key):
+                observed_overrides[key] = prev_obs[key]
+            carried.append(key)
+    # Requested fields that came back from this run's sources; later backfill does not count.
+    refreshed = [key for key in fields or () if data.get(key) is not None and key not in carried]
+
     for key in REQUIRED_FIELDS:
         if key not in data or data.get(key) is None:
             missing.append(key)
 
-    previous = load_previous_snapshot()
+    if previous is None:
+        previous = load_previous_snapshot()
+    field_index = load_field_index()
     if previous:
+        index_snapshot(field_index, previous)
+    if previous or field_index:
         skeleton = {
             "generatedAt": generated_at,
             "targetDate": target_date,
@@ -1863,7 +2831,9 @@ def main(argv=None):
             "missing": missing,
             "errors": errors,
         }
-        filled = backfill_from_previous(skeleton, previous, as_of_date=target_date or generated_at)
+        filled = backfill_from_previous(
+            skeleton, previous, as_of_date=target_date or generated_at, field_index=field_index
+        )
         if filled:
             for key in filled:
                 stamp = (skeleton.get("fieldObservedAt") or {}).get(key)
@@ -1878,6 +2848,9 @@ def main(argv=None):
     field_observed_at, field_fetched_at, field_updated_at = build_field_timestamps(
         data, sources, target_date, generated_at, observed_overrides
     )
+    prev_fetched = (previous or {}).get("fieldFetchedAt") or {}
+    for key in carried:
+        field_fetched_at[key] = prev_fetched.get(key) or field_observed_at.get(key)
     payload = {
         "generatedAt": generated_at,
         "targetDate": target_date,
@@ -1889,11 +2862,274 @@ def main(argv=None):
         "missing": sorted(set(missing)),
         # Proxy probing is useful for "today" runs but extremely expensive during large
         # historical backfills (multiplies network checks by N days).
-        "proxyTrace": probe_proxy() if not historical_run else [],
+        "proxyTrace": probe_proxy() if options.get("probe", True) and not historical_run and plan["sources"] else [],
         "errors": errors,
     }
+    if policy == "stale-only" and not historical_run:
+        payload["refresh"] = {
+            "policy": policy,
+            "sources": [spec["name"] for spec in plan["sources"]],
+            "refreshed": sorted(refreshed),
+            "failed": sorted(set(fields) - set(refreshed)),
+            "carried": sorted(carried),
+        }
+    return payload
+
+
+def remember_observations(payload, path=FIELD_INDEX_PATH):
+    """Index a snapshot's fields for later backfill; historical runs are skipped.
+
+    Fields without their own timestamp are stamped with `generatedAt` (now), so a past-date run
+    would otherwise record old values as fresh observations.
+    """
+    target_date = payload.get("targetDate")
+    if target_date and target_date != today_key():
+        return
+    save_field_index(index_snapshot(load_field_index(path), payload), path)
+
+
+def next_cadence_run(cadence, after):
+    """First time strictly after `after` (aware UTC datetime) that `cadence` asks for a refetch."""
+    if cadence.get("every"):
+        return after + timedelta(seconds=cadence["every"])
+    candidates = []
+    for day in range(0, 8):
+        base = after + timedelta(days=day)
+        if cadence.get("weekdays") and base.weekday() >= 5:
+            continue
+        for clock_time in cadence.get("at") or ():
+            hour, minute = (int(part) for part in clock_time.split(":"))
+            slot = base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if slot > after:
+                candidates.append(slot)
+        if candidates:
+            break
+    return min(candidates) if candidates else after + timedelta(days=1)
+
+
+def fields_for_sources(names):
+    """Fields a refetch of `names` can refresh: their own outputs (intermediate ones included, so a
+    source that only feeds DERIVED steps still runs) plus every derived field whose inputs all come
+    from those sources."""
+    produced = set()
+    for spec in SOURCES:
+        if spec["name"] in names:
+            produced.update(spec["outputs"])
+    fields = [key for key in SNAPSHOT_FIELDS + list(INTERMEDIATE_FIELDS) if key in produced]
+    for step in DERIVED:
+        for key, inputs in step["inputs"].items():
+            if all(dep in produced for dep in inputs):
+                fields.append(key)
+    return fields
+
+
+def merge_into_snapshot(live, payload, fields, source_names):
+    """Overlay the `fields` `payload` actually produced onto the `live` snapshot.
+
+    Per-field values and stamps are replaced, errors of the refetched sources are swapped for the
+    new ones, and everything else in `live` stays as it was.
+    """
+    merged = json.loads(json.dumps(live)) if live else {}
+    for section in ("data", "sources", "fieldObservedAt", "fieldFetchedAt", "fieldUpdatedAt"):
+        merged.setdefault(section, {})
+    new_data = payload.get("data") or {}
+    updated = []
+    for key in fields:
+        if new_data.get(key) is None:
+            continue
+        merged["data"][key] = new_data[key]
+        for section in ("sources", "fieldObservedAt", "fieldFetchedAt", "fieldUpdatedAt"):
+            value = (payload.get(section) or {}).get(key)
+            if value is not None:
+                merged[section][key] = value
+        updated.append(key)
+    prefixes = tuple(f"{name}:" for name in source_names)
+    merged["errors"] = [err for err in merged.get("errors") or [] if not str(err).startswith(prefixes)]
+    merged["errors"] += [err for err in payload.get("errors") or [] if str(err).startswith(prefixes)]
+    merged["missing"] = [key for key in REQUIRED_FIELDS if merged["data"].get(key) is None]
+    merged["generatedAt"] = payload.get("generatedAt")
+    merged["targetDate"] = None
+    merged.setdefault("proxyTrace", [])
+    updated.sort()
+    merged["refresh"] = {"policy": "daemon", "sources": list(source_names), "refreshed": updated}
+    return merged, updated
+
+
+def rederive_snapshot(merged, changed, inputs=None, skip=()):
+    """Recompute the DERIVED fields of `merged` whose inputs are in `changed`, in place.
+
+    Inputs are read from the merged snapshot data plus `inputs` (the latest INTERMEDIATE_FIELDS,
+    which the snapshot does not keep), so a derived field whose inputs arrive on different ticks
+    still follows each of them. Fields in `skip` were already derived by the run itself. Returns
+    the recomputed keys.
+    """
+    changed = set(changed)
+    data = dict(merged.get("data") or {})
+    data.update(inputs or {})
+    observed = merged.get("fieldObservedAt") or {}
+    generated_at = merged.get("generatedAt")
+    rederived = []
+    for step in DERIVED:
+        keys = [
+            key for key, deps in step["inputs"].items() if key not in skip and changed.intersection(deps)
+        ]
+        if not keys:
+            continue
+        values, labels, stamps = globals()[step["derive"]](data, observed, False)
+        for key in keys:
+            if values.get(key) is None:
+                continue
+            deps = [observed[dep] for dep in step["inputs"][key] if observed.get(dep)]
+            stamp = stamps.get(key) or (max(deps) if deps else generated_at)
+            merged["data"][key] = values[key]
+            if key in labels:
+                merged["sources"][key] = labels[key]
+            merged["fieldObservedAt"][key] = stamp
+            merged["fieldUpdatedAt"][key] = stamp
+            if generated_at:
+                merged["fieldFetchedAt"][key] = generated_at
+            rederived.append(key)
+    merged["missing"] = [key for key in REQUIRED_FIELDS if merged["data"].get(key) is None]
+    return sorted(rederived)
+
+
+class CollectorDaemon:
+    """Keeps auto.json current by refetching each source on its own `cadence` (see SOURCES).
+
+    On start, sources behind fields that are missing or close to stale (fields_due_for_refresh) run
+    right away and the rest wait for their next slot. Each tick collects only the due sources,
+    overlays their fields onto the live snapshot, re-derives every DERIVED field whose inputs
+    changed (rederive_snapshot) and publishes it with an atomic rename, so readers (the dashboard,
+    the server's change watcher) never see a half-written file.
+    """
+
+    def __init__(self, path=AUTO_JSON_PATH, clock=None, max_sleep_sec=300, log=None):
+        self.path = path
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.max_sleep_sec = max_sleep_sec
+        self.log = log or (lambda message: print(message, flush=True))
+        self.sources = [
+            spec for spec in SOURCES if spec.get("cadence") and spec.get("when") in (None, "today")
+        ]
+        self.next_due = {}
+        self.last_result = {}
+        self.inputs = {}
+
+    def bootstrap(self):
+        now = self.clock()
+        due_fields = fields_due_for_refresh(load_previous_snapshot(self.path), now)
+        due_now = {spec["name"] for spec in plan_collection(due_fields, None)["sources"]}
+        for spec in self.sources:
+            self.next_due[spec["name"]] = now if spec["name"] in due_now else next_cadence_run(spec["cadence"], now)
+        return sorted(due_now & set(self.next_due))
+
+    def due(self):
+        now = self.clock()
+        return [spec["name"] for spec in self.sources if self.next_due.get(spec["name"], now) <= now]
+
+    def run_sources(self, names):
+        """Collect `names`, merge their fields into the live snapshot and publish; returns the
+        fields that were updated (empty when nothing came back)."""
+        fields = fields_for_sources(names)
+        tick_inputs = {}
+        payload = collect(None, {"fields": fields, "probe": False, "intermediate": tick_inputs})
+        live = load_previous_snapshot(self.path)
+        if live is None and os.path.exists(self.path):
+            raise RuntimeError(f"unreadable snapshot, not overwriting: {self.path}")
+        merged, updated = merge_into_snapshot(live, payload, fields, names)
+        self.inputs.update(tick_inputs)
+        rederived = rederive_snapshot(merged, set(updated) | set(tick_inputs), self.inputs, skip=updated)
+        if rederived:
+            updated = sorted(set(updated) | set(rederived))
+            merged["refresh"]["refreshed"] = updated
+        if updated:
+            write_json_atomic(self.path, merged, indent=2)
+            try:
+                remember_observations(merged)
+            except OSError:
+                pass
+        return updated
+
+    def tick(self):
+        names = self.due()
+        if not names:
+            return []
+        now = self.clock()
+        for name in names:
+            spec = next(spec for spec in self.sources if spec["name"] == name)
+            self.next_due[name] = next_cadence_run(spec["cadence"], now)
+        try:
+            updated = self.run_sources(names)
+            result = f"updated {len(updated)} fields"
+        except Exception as exc:
+            updated = []
+            result = f"failed: {exc}"
+        for name in names:
+            self.last_result[name] = {"at": now.isoformat().replace("+00:00", "Z"), "result": result}
+        self.log(f"[daemon] {', '.join(names)}: {result}")
+        return updated
+
+    def seconds_until_next(self):
+        if not self.next_due:
+            return self.max_sleep_sec
+        wait = (min(self.next_due.values()) - self.clock()).total_seconds()
+        return max(1.0, min(self.max_sleep_sec, wait))
+
+    def run_forever(self, stop_event):
+        self.bootstrap()
+        while not stop_event.is_set():
+            self.tick()
+            try:
+                save_dns_cache()
+            except OSError:
+                pass
+            stop_event.wait(self.seconds_until_next())
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--date", dest="target_date", default=None)
+    parser.add_argument("--output", dest="output_path", default=os.path.join("src", "data", "auto.json"))
+    parser.add_argument("--rebuild-field-index", dest="rebuild_field_index", action="store_true")
+    # Comma-separated snapshot keys: only run the sources behind them (see plan_collection).
+    parser.add_argument("--fields", dest="fields", default=None)
+    parser.add_argument("--plan", dest="plan_only", action="store_true", help="print the source plan and exit")
+    parser.add_argument("--refresh-policy", dest="refresh_policy", choices=REFRESH_POLICIES, default="full")
+    # Stay running and refetch each source on its cadence, publishing --output after every change.
+    parser.add_argument("--daemon", dest="daemon", action="store_true")
+    args = parser.parse_args(argv if argv is not None else [])
+    if args.daemon:
+        import signal
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        daemon = CollectorDaemon(os.path.abspath(args.output_path))
+        try:
+            daemon.run_forever(stop)
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.rebuild_field_index:
+        index = rebuild_field_index()
+        print(f"field index rebuilt: {len(index)} fields -> {FIELD_INDEX_PATH}")
+        return
+    fields = [key.strip() for key in args.fields.split(",") if key.strip()] if args.fields else None
+    if args.plan_only:
+        if args.refresh_policy == "stale-only" and not (args.target_date and args.target_date != today_key()):
+            fields = select_refresh_fields(fields, load_previous_snapshot())
+        plan = plan_collection(fields, args.target_date)
+        summary = {**plan, "sources": [spec["name"] for spec in plan["sources"]]}
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+    payload = collect(args.target_date, {"fields": fields, "refresh_policy": args.refresh_policy})
     with open(args.output_path, "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    remember_observations(payload)
+    try:
+        save_dns_cache()
+    except OSError:
+        pass
 
 
 if __name__ == "__main__":
@@ -230,7 +230,7 @@ function runEthPriceSeed(asOfDate, timeoutSec = DEFAULT_TIMEOUT_SEC) {
   return true;
 }
 
-function readHistorySeed(pathname) {
+export function readHistorySeed(pathname) {
   const payload = readJson(pathname, null);
   if (!payload) return { history: [], envelope: { history: [] } };
   if (Array.isArray(payload)) return { history: payload, envelope: { history: payload } };
@@ -535,7 +535,7 @@ async function generateAiState(record, history, env) {
   return { aiState, warnings };
 }
 
-function mergeHistory(history, record) {
+export function mergeHistory(history, record) {
   const next = history.filter((item) => item.date !== record.date);
   next.push(record);
   next.sort((a, b) => a.date.localeCompare(b.date));
@@ -567,7 +567,7 @@ function writeStatus(status) {
   });
 }
 
-function buildRecordFromCollectorPayload(payload, date, history) {
+export function buildRecordFromCollectorPayload(payload, date, history) {
   const combined = buildCombinedInput(payload, templateInput);
   // Preserve proxy trace so the UI can display "代理/网络" on precomputed records.
   combined.__proxyTrace = payload?.proxyTrace || payload?.proxy_trace || null;
@@ -819,4 +819,10 @@ async function main() {
   }
 }
 
-main();
+// Imported by ai_prompts.mjs for its record builder; only run when executed directly.
+try {
+  const entry = process.argv[1] ? fs.realpathSync(path.resolve(process.argv[1])) : "";
+  if (entry && fileURLToPath(import.meta.url) === entry) {
+    main();
+  }
+} catch {}
@@ -1,17 +1,35 @@
 #!/usr/bin/env python3
+import atexit
+import gzip
+import hashlib
+import heapq
+import http.client
+import itertools
 import json
+import io
 import os
+import posixpath
+import queue
 import re
 import subprocess
 import tempfile
 import sys
 import threading
 import time
-from datetime import datetime
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
 from shutil import which
 from http.server import SimpleHTTPRequestHandler, HTTPServer
 from urllib import request
 from urllib.error import URLError, HTTPError
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from scripts import collector
+except ImportError:  # started as `python3 scripts/server.py`
+    import collector
 
 APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 ROOT = os.path.join(APP_ROOT, "src")
@@ -20,10 +38,478 @@ LOG_ROOT = os.path.join(APP_ROOT, "logs")
 ENV_PATH = os.path.join(APP_ROOT, ".env")
 DAILY_AUTORUN_SCRIPT = os.path.join(APP_ROOT, "scripts", "daily_autorun.mjs")
 BACKFILL_SCRIPT = os.path.join(APP_ROOT, "scripts", "backfill_history.mjs")
-DAILY_AUTORUN_TIME = (8, 5)
 
-_last_daily_attempt = None
+
+def parse_clock(value, default=None):
+    """Parse "HH:MM" into (hour, minute); empty or "off" gives None, anything else invalid `default`."""
+    value = (value or "").strip().lower()
+    if value in ("", "off", "none", "0"):
+        return None
+    match = re.match(r"^(\d{1,2}):(\d{2})$", value)
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        return default
+    return int(match.group(1)), int(match.group(2))
+
+
+DAILY_AUTORUN_TIME = parse_clock(os.environ.get("DAILY_AUTORUN_TIME") or "08:05", (8, 5)) or (8, 5)
+# Fetch today's sources into the collector's disk cache (COLLECTOR_CACHE_TTL, 1h by default) and
+# resolve upstream hosts shortly before the daily run, so the run itself mostly reads cache.
+DAILY_PREWARM_TIME = parse_clock(os.environ.get("DAILY_PREWARM_TIME", "07:45"), (7, 45))
+# Only sources at least this expensive (SOURCES `cost`) are worth warming.
+DAILY_PREWARM_MIN_COST = max(1, int(os.environ.get("DAILY_PREWARM_MIN_COST", "3")))
+SCHEDULER_STATE_PATH = os.path.join(RUN_ROOT, "scheduler_state.json")
+# Upper bound on one scheduler sleep, so wall-clock jumps (NTP, suspend) are noticed in time.
+SCHEDULER_MAX_SLEEP_SEC = max(1.0, float(os.environ.get("SCHEDULER_MAX_SLEEP_SEC", "600")))
+DOUBAO_API_URL = os.environ.get("DOUBAO_API_URL") or "https://ark.cn-beijing.volces.com/api/v3/chat/completions"
+AI_SYSTEM_PROMPT = "你是专业的金融研究助手，直接给出判断与推断，不需要风险提示或免责声明。"
+AI_TEMPERATURE = 0.4
+AI_CACHE_DIR = os.path.join(RUN_ROOT, "ai_cache")
+AI_CACHE_MEMORY = max(1, int(os.environ.get("AI_CACHE_MEMORY", "256")))
+# Prompts embed the snapshot they describe, so an answer stays valid for as long as anyone asks.
+AI_CACHE_TTL_SEC = max(60, int(os.environ.get("AI_CACHE_TTL_SEC", str(3 * 86400))))
+AI_CACHE_MAX_BYTES = max(1024, int(os.environ.get("AI_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+# POST /ai/batch: upstream calls in flight per batch, and idle keep-alive connections kept per host.
+AI_BATCH_CONCURRENCY = max(1, int(os.environ.get("AI_BATCH_CONCURRENCY", "4")))
+AI_BATCH_MAX_ITEMS = max(1, int(os.environ.get("AI_BATCH_MAX_ITEMS", "64")))
+AI_HTTP_POOL_SIZE = max(1, int(os.environ.get("AI_HTTP_POOL_SIZE", "8")))
+# Freshly persisted snapshots queue their summary/overall/gate prompts for background generation.
+# The queue lives in run/ai_queue.json and only runs once /ai/* traffic has been quiet this long.
+AI_PRECOMPUTE_ENABLED = (os.environ.get("AI_PRECOMPUTE") or "1").lower() in ("1", "true", "yes", "on")
+AI_PRECOMPUTE_PATH = os.path.join(RUN_ROOT, "ai_queue.json")
+AI_PRECOMPUTE_SCRIPT = os.path.join(APP_ROOT, "scripts", "ai_prompts.mjs")
+AI_PRECOMPUTE_IDLE_SEC = max(0.0, float(os.environ.get("AI_PRECOMPUTE_IDLE_SEC", "5")))
+AI_PRECOMPUTE_MAX_ATTEMPTS = max(1, int(os.environ.get("AI_PRECOMPUTE_MAX_ATTEMPTS", "3")))
+# Streaming /ai/* responses send a keep-alive line this often while upstream is silent, which is
+# also how a vanished client gets noticed.
+AI_STREAM_HEARTBEAT_SEC = max(1.0, float(os.environ.get("AI_STREAM_HEARTBEAT_SEC", "10")))
+AUTO_JSON_PATH = os.path.join(ROOT, "data", "auto.json")
+SNAPSHOT_DIR = os.path.join(RUN_ROOT, "snapshots")
+# Every Nth logged snapshot is stored in full so reconstruction never replays a long delta chain.
+SNAPSHOT_KEYFRAME_EVERY = max(1, int(os.environ.get("SNAPSHOT_KEYFRAME_EVERY", "12")))
+SNAPSHOT_RETAIN = max(1, int(os.environ.get("SNAPSHOT_RETAIN", "96")))
+SNAPSHOT_DELTA_FORMAT = "snapshot-delta/1"
+# Connection-level workers serve static files and status endpoints. Slow work (collector runs,
+# Doubao calls) is handed to dedicated pools whose queue depth is capped, so it can never occupy
+# every request thread.
+SERVER_REQUEST_WORKERS = max(4, int(os.environ.get("SERVER_REQUEST_WORKERS", "32")))
+# Retry-After (seconds) on the 503 sent when every request worker holds a connection.
+SERVER_BUSY_RETRY_AFTER = max(1, int(os.environ.get("SERVER_BUSY_RETRY_AFTER", "2")))
+COLLECTOR_POOL_WORKERS = max(1, int(os.environ.get("COLLECTOR_POOL_WORKERS", "2")))
+COLLECTOR_POOL_QUEUE = max(0, int(os.environ.get("COLLECTOR_POOL_QUEUE", "4")))
+# Collector work is started by priority class (interactive > daily > backfill). Background classes
+# are capped below COLLECTOR_POOL_WORKERS so a slot is always left for interactive requests.
+COLLECTOR_DAILY_MAX = max(1, int(os.environ.get("COLLECTOR_DAILY_MAX", str(max(1, COLLECTOR_POOL_WORKERS - 1)))))
+COLLECTOR_BACKFILL_MAX = max(1, int(os.environ.get("COLLECTOR_BACKFILL_MAX", "1")))
+# Ask the backfill to pause between dates while interactive or daily collection is running. The
+# backfill waits while BACKFILL_PAUSE_PATH exists and was touched recently (see BackfillGovernor).
+BACKFILL_YIELD = (os.environ.get("BACKFILL_YIELD") or "1").lower() in ("1", "true", "yes", "on")
+BACKFILL_YIELD_POLL_SEC = max(0.1, float(os.environ.get("BACKFILL_YIELD_POLL_SEC", "0.5")))
+BACKFILL_PAUSE_PATH = os.path.join(RUN_ROOT, "backfill.pause")
+AI_POOL_WORKERS = max(1, int(os.environ.get("AI_POOL_WORKERS", "4")))
+AI_POOL_QUEUE = max(0, int(os.environ.get("AI_POOL_QUEUE", "8")))
+# Finished async jobs (GET /jobs/<id>) stay readable for this long.
+JOB_TTL_SEC = max(60, int(os.environ.get("JOB_TTL_SEC", "900")))
+HISTORY_CACHE_DIR = os.path.join(RUN_ROOT, "history_cache")
+HISTORY_CACHE_MEMORY = max(1, int(os.environ.get("HISTORY_CACHE_MEMORY", "64")))
+# FRED/Farside revise and publish with a lag; after this many days a date's inputs have settled.
+HISTORY_FINAL_LAG_DAYS = max(1, int(os.environ.get("HISTORY_FINAL_LAG_DAYS", "7")))
+# Non-final dates are only memoized briefly in memory.
+HISTORY_PROVISIONAL_TTL_SEC = max(0, int(os.environ.get("HISTORY_PROVISIONAL_TTL_SEC", "600")))
+# Set COLLECTOR_SUBPROCESS=1 to fall back to one `collector.py` process per run.
+COLLECTOR_SUBPROCESS = (os.environ.get("COLLECTOR_SUBPROCESS") or "").lower() in ("1", "true", "yes", "on")
+
+# GET /events: one watcher thread polls run/ status files at this interval for every subscriber.
+EVENTS_POLL_SEC = max(0.1, float(os.environ.get("EVENTS_POLL_SEC", "1")))
+EVENTS_HEARTBEAT_SEC = max(1.0, float(os.environ.get("EVENTS_HEARTBEAT_SEC", "15")))
+# Each open stream holds a request worker, so cap them; clients beyond the cap fall back to polling.
+EVENTS_MAX_SUBSCRIBERS = max(1, int(os.environ.get("EVENTS_MAX_SUBSCRIBERS", "8")))
+# Idle keep-alive connections are dropped after this long so they do not pin request workers.
+HTTP_KEEPALIVE_TIMEOUT_SEC = max(1.0, float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT_SEC", "5")))
+# "hashed" serves ES modules under content-hash URLs with immutable caching; "legacy" keeps the
+# blanket no-store policy from should_disable_cache().
+STATIC_CACHE_MODE = (os.environ.get("STATIC_CACHE_MODE") or "hashed").strip().lower()
+ASSET_SCAN_INTERVAL_SEC = max(0.0, float(os.environ.get("ASSET_SCAN_INTERVAL_SEC", "1")))
+ASSET_EXTENSIONS = (".js", ".mjs", ".css", ".html")
+# Text responses at least this large are gzip-encoded for clients that accept it.
+GZIP_MIN_BYTES = max(0, int(os.environ.get("GZIP_MIN_BYTES", "1024")))
+GZIP_LEVEL = 6
+GZIP_MEMO_MAX_BYTES = max(0, int(os.environ.get("GZIP_MEMO_MAX_BYTES", str(32 * 1024 * 1024))))
+COMPRESSIBLE_EXTENSIONS = (".js", ".mjs", ".css", ".html", ".json", ".svg", ".txt", ".map")
+# Send `103 Early Hints` with the modulepreload links ahead of the HTML on browser navigations.
+EARLY_HINTS = (os.environ.get("EARLY_HINTS") or "1").lower() in ("1", "true", "yes", "on")
+NO_STORE_CACHE_CONTROL = "no-store, no-cache, must-revalidate, max-age=0"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 _backfill_process = None
+_daily_process = None
+_collector_version = None
+_snapshot_lock = threading.Lock()
+_snapshot_cache = {}
+
+
+class PoolSaturated(RuntimeError):
+    def __init__(self, pool, retry_after):
+        super().__init__(f"{pool} pool saturated")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class WorkerPool:
+    """Fixed-size thread pool that rejects work once `workers + max_queue` jobs are pending."""
+
+    def __init__(self, name, workers, max_queue, retry_after=30):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, func, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PoolSaturated(self.name, self.retry_after)
+            self._pending += 1
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, func, *args, timeout=None, **kwargs):
+        return self.submit(func, *args, **kwargs).result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending
+            rejected = self._rejected
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "maxQueue": self.max_queue,
+            "running": min(pending, self.workers),
+            "queued": max(0, pending - self.workers),
+            "rejected": rejected,
+        }
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DAILY = 1
+PRIORITY_BACKFILL = 2
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_DAILY: "daily", PRIORITY_BACKFILL: "backfill"}
+
+
+class PriorityWorkerPool:
+    """WorkerPool whose queue is ordered by priority class, with an optional cap per class.
+
+    `submit(..., priority=...)` takes the same arguments as WorkerPool.submit; the lowest class
+    number that is under its cap starts first, FIFO within a class. Queue depth and how long work
+    waited before starting are tracked per class for GET /jobs.
+    """
+
+    def __init__(self, name, workers, max_queue, retry_after=30, class_limits=None):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.class_limits = dict(class_limits or {})
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._threads = []
+        self._rejected = 0
+        self._classes = {
+            priority: {"running": 0, "queued": 0, "started": 0, "waitTotalMs": 0.0, "waitMaxMs": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    def _counters(self, priority):
+        return self._classes.setdefault(
+            priority, {"running": 0, "queued": 0, "started": 0, "waitTotalMs": 0.0, "waitMaxMs": 0.0}
+        )
+
+    def submit(self, func, *args, priority=PRIORITY_INTERACTIVE, **kwargs):
+        future = Future()
+        with self._cond:
+            pending = sum(item["running"] + item["queued"] for item in self._classes.values())
+            if pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PoolSaturated(self.name, self.retry_after)
+            heapq.heappush(self._heap, [priority, next(self._seq), time.monotonic(), future, func, args, kwargs])
+            self._counters(priority)["queued"] += 1
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._worker, name=f"{self.name}-pool-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify_all()
+        return future
+
+    def run(self, func, *args, timeout=None, priority=PRIORITY_INTERACTIVE, **kwargs):
+        return self.submit(func, *args, priority=priority, **kwargs).result(timeout=timeout)
+
+    def promote(self, future, priority):
+        """Move queued work up to `priority` (e.g. an interactive caller joined a daily job)."""
+        with self._cond:
+            for item in self._heap:
+                if item[3] is future and priority < item[0]:
+                    self._counters(item[0])["queued"] -= 1
+                    self._counters(priority)["queued"] += 1
+                    item[0] = priority
+                    heapq.heapify(self._heap)
+                    self._cond.notify_all()
+                    return True
+        return False
+
+    def _take_locked(self):
+        for item in sorted(self._heap):
+            limit = self.class_limits.get(item[0])
+            if limit is None or self._counters(item[0])["running"] < limit:
+                self._heap.remove(item)
+                heapq.heapify(self._heap)
+                return item
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                item = self._take_locked()
+                while item is None:
+                    self._cond.wait()
+                    item = self._take_locked()
+                priority, _, queued_at, future, func, args, kwargs = item
+                counters = self._counters(priority)
+                counters["queued"] -= 1
+                counters["running"] += 1
+                waited_ms = (time.monotonic() - queued_at) * 1000
+                counters["started"] += 1
+                counters["waitTotalMs"] += waited_ms
+                counters["waitMaxMs"] = max(counters["waitMaxMs"], waited_ms)
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args, **kwargs))
+                    except BaseException as exc:
+                        future.set_exception(exc)
+            finally:
+                with self._cond:
+                    counters["running"] -= 1
+                    self._cond.notify_all()
+
+    def active(self, priority):
+        with self._cond:
+            counters = self._counters(priority)
+            return counters["running"] + counters["queued"]
+
+    def stats(self):
+        with self._cond:
+            classes = {}
+            for priority, counters in sorted(self._classes.items()):
+                started = counters["started"]
+                classes[PRIORITY_NAMES.get(priority, str(priority))] = {
+                    "running": counters["running"],
+                    "queued": counters["queued"],
+                    "limit": self.class_limits.get(priority, self.workers),
+                    "started": started,
+                    "avgWaitMs": round(counters["waitTotalMs"] / started, 1) if started else 0.0,
+                    "maxWaitMs": round(counters["waitMaxMs"], 1),
+                }
+            running = sum(item["running"] for item in classes.values())
+            queued = sum(item["queued"] for item in classes.values())
+            rejected = self._rejected
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "maxQueue": self.max_queue,
+            "running": running,
+            "queued": queued,
+            "rejected": rejected,
+            "classes": classes,
+        }
+
+
+COLLECTOR_POOL = PriorityWorkerPool(
+    "collector",
+    COLLECTOR_POOL_WORKERS,
+    COLLECTOR_POOL_QUEUE,
+    retry_after=60,
+    class_limits={PRIORITY_DAILY: COLLECTOR_DAILY_MAX, PRIORITY_BACKFILL: COLLECTOR_BACKFILL_MAX},
+)
+AI_POOL = WorkerPool("ai", AI_POOL_WORKERS, AI_POOL_QUEUE, retry_after=30)
+
+
+class JobCancelled(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, kind, key, params=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.params = params or {}
+        self.status = "queued"
+        self.progress = {"phase": "queued"}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.attached = 0
+        self.listener = None
+        self.priority = None
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def set_progress(self, phase, **extra):
+        self.progress = {"phase": phase, **extra}
+        if self.listener:
+            try:
+                self.listener(self)
+            except Exception:
+                pass
+
+    def to_dict(self, include_result=True):
+        def iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        payload = {
+            "jobId": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.progress,
+            "attached": self.attached,
+            "priority": PRIORITY_NAMES.get(self.priority),
+            "createdAt": iso(self.created_at),
+            "startedAt": iso(self.started_at),
+            "finishedAt": iso(self.finished_at),
+            "statusUrl": f"/jobs/{self.id}",
+        }
+        if self.error:
+            payload["error"] = self.error
+        if include_result and self.status == "done":
+            payload["result"] = self.result
+        return payload
+
+
+class JobManager:
+    """Server-side job queue: dedupes identical pending work and keeps results for a TTL."""
+
+    def __init__(self, pool, ttl_sec=JOB_TTL_SEC, on_change=None):
+        self.pool = pool
+        self.ttl_sec = ttl_sec
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending_by_key = {}
+
+    def _purge_locked(self):
+        cutoff = time.time() - self.ttl_sec
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and (job.finished_at or 0) < cutoff]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+
+    def submit(self, kind, key, func, params=None, priority=None):
+        """Queue `func(job)` unless an identical job is still pending; returns (job, created).
+
+        `priority` is passed to a PriorityWorkerPool; joining a queued job with a more urgent
+        priority promotes it.
+        """
+        with self._lock:
+            self._purge_locked()
+            existing = self._pending_by_key.get(key)
+            if existing and not existing.finished:
+                existing.attached += 1
+                prioritized = isinstance(self.pool, PriorityWorkerPool) and priority is not None
+                if prioritized and existing.future is not None and self.pool.promote(existing.future, priority):
+                    existing.priority = priority
+                return existing, False
+            job = Job(kind, key, params)
+            job.listener = self.on_change
+            self._jobs[job.id] = job
+            self._pending_by_key[key] = job
+            try:
+                if isinstance(self.pool, PriorityWorkerPool) and priority is not None:
+                    job.priority = priority
+                    job.future = self.pool.submit(self._run, job, func, priority=priority)
+                else:
+                    job.future = self.pool.submit(self._run, job, func)
+            except Exception:
+                self._jobs.pop(job.id, None)
+                self._pending_by_key.pop(key, None)
+                raise
+            return job, True
+
+    def _run(self, job, func):
+        try:
+            if job.cancel_event.is_set():
+                raise JobCancelled("cancelled before start")
+            job.status = "running"
+            job.started_at = time.time()
+            job.set_progress("running")
+            job.result = func(job)
+            job.status = "done"
+            job.set_progress("done")
+        except JobCancelled:
+            job.status = "cancelled"
+            job.set_progress("cancelled")
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            job.set_progress("failed")
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._pending_by_key.get(job.key) is job:
+                    self._pending_by_key.pop(job.key, None)
+            job.done_event.set()
+
+    def get(self, job_id):
+        with self._lock:
+            self._purge_locked()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if not job:
+            return None
+        if not job.finished:
+            job.cancel_event.set()
+            job.set_progress("cancelling")
+            with self._lock:
+                if self._pending_by_key.get(job.key) is job:
+                    self._pending_by_key.pop(job.key, None)
+        return job
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": counts, "ttlSec": self.ttl_sec}
+
+
+def _publish_job_event(job):
+    EVENTS.publish("job", job.to_dict(include_result=False))
+
+
+JOBS = JobManager(COLLECTOR_POOL, on_change=_publish_job_event)
 
 
 def should_disable_cache(path):
@@ -39,12 +525,432 @@ def should_disable_cache(path):
         "/data/backfill-status",
         "/data/perf-summary",
         "/data/iteration-latest",
-    )
+        "/data/auto-delta",
+        "/events",
+    ) or path.startswith("/jobs/")
+
+
+# Polled status endpoints answer with an ETag so unchanged polls are a bodyless 304.
+STATUS_GET_PATHS = (
+    "/data/daily-status",
+    "/data/backfill-status",
+    "/data/perf-summary",
+    "/data/iteration-latest",
+    "/ai/status",
+    "/ai/precomputed",
+)
+API_GET_PATHS = STATUS_GET_PATHS + (
+    "/data/auto-delta",
+    "/events",
+    "/jobs",
+)
+# Relative module specifiers in `from "./x.js"`, `import "./x.js"` and `import("./x.js")`.
+_IMPORT_SPEC_RE = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(["'])(\.{1,2}/[^"'?#]+)(?:\?[^"']*)?\2""")
+# Local src/href references in the HTML entry point (anything with a scheme is left alone).
+_HTML_REF_RE = re.compile(r"""(\b(?:src|href)\s*=\s*)(["'])([^"'?#:]+)(?:\?[^"']*)?\2""")
+_MODULE_SCRIPT_RE = re.compile(
+    r"""<script\b[^>]*\btype\s*=\s*["']module["'][^>]*\bsrc\s*=\s*["']([^"'?#:]+)""", re.IGNORECASE
+)
+_ASSET_CONTENT_TYPES = {
+    ".js": "text/javascript; charset=utf-8",
+    ".mjs": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+}
+
+
+def cache_control_for(path, mode=None):
+    """Default Cache-Control for responses that do not pick their own (None = no header)."""
+    mode = mode or STATIC_CACHE_MODE
+    if mode != "hashed":
+        return NO_STORE_CACHE_CONTROL if should_disable_cache(path) else None
+    path = (path or "").split("?", 1)[0]
+    if path in ("/", "/index.html") or path.endswith(".html"):
+        return NO_STORE_CACHE_CONTROL
+    if path in STATUS_GET_PATHS:
+        return REVALIDATE_CACHE_CONTROL
+    if path in API_GET_PATHS or path.startswith("/jobs/"):
+        return NO_STORE_CACHE_CONTROL
+    if path.endswith((".js", ".mjs", ".css", ".json")):
+        return REVALIDATE_CACHE_CONTROL
+    return None
+
+
+def quote_etag(digest):
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(header_value, etag):
+    if not header_value or not etag:
+        return False
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+_file_etags = {}
+_file_etags_lock = threading.Lock()
+
+
+def file_etag(path):
+    """Strong ETag from file content, recomputed only when mtime or size changes."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _file_etags_lock:
+        cached = _file_etags.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as fp:
+            for chunk in iter(lambda: fp.read(1 << 16), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    etag = quote_etag(digest.hexdigest())
+    with _file_etags_lock:
+        _file_etags[path] = (key, etag)
+    return etag
+
+
+def accepts_gzip(header_value):
+    """True when Accept-Encoding allows gzip (an explicit `gzip;q=0` beats `*`)."""
+    weights = {}
+    for part in (header_value or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[token] = weight
+    return weights.get("gzip", weights.get("x-gzip", weights.get("*", 0.0))) > 0
+
+
+def gzip_bytes(data):
+    # mtime=0 keeps the output (and therefore its ETag) stable across restarts.
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def parse_byte_range(header_value, size):
+    """Parse a single `bytes=` range into (start, end) inclusive.
+
+    Returns None when the header should be ignored (absent, malformed or multi-range, which is
+    answered with the full body) and raises ValueError when the range cannot be satisfied.
+    """
+    if not header_value:
+        return None
+    unit, _, spec = header_value.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not sep or (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("unsatisfiable suffix range")
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("range start beyond end of file")
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class GzipMemo:
+    """Compressed copies of static files keyed by path, invalidated when mtime or size changes.
+
+    A `<file>.gz` sibling that is at least as new as the source is used as-is, so large seeds can
+    be precompressed offline at a higher level.
+    """
+
+    def __init__(self, max_bytes=GZIP_MEMO_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached and cached[0] == key:
+                self._entries.move_to_end(path)
+                return cached[1], cached[2]
+        body = None
+        try:
+            sibling = os.stat(path + ".gz")
+            if sibling.st_mtime_ns >= stat.st_mtime_ns:
+                with open(path + ".gz", "rb") as fp:
+                    body = fp.read()
+        except OSError:
+            body = None
+        if body is None:
+            try:
+                with open(path, "rb") as fp:
+                    body = gzip_bytes(fp.read())
+            except OSError:
+                return None
+        etag = quote_etag(hashlib.sha256(body).hexdigest())
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous:
+                self._bytes -= len(previous[1])
+            if len(body) <= self.max_bytes:
+                self._entries[path] = (key, body, etag)
+                self._bytes += len(body)
+            while self._bytes > self.max_bytes and self._entries:
+                _path, (_key, evicted, _etag) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return body, etag
+
+
+GZIP_MEMO = GzipMemo()
+
+
+def _path_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class FileCache:
+    """Parsed file contents memoized by (path, mtime_ns, size).
+
+    Status polling and AI calls hit the same few small files over and over; with this a request
+    costs one stat() until the file actually changes. Values are shared, so loaders return copies.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, signature, compute):
+        """Return compute() for `key`, reusing the previous value while `signature` is unchanged."""
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is not None and signature is not None and cached[0] == signature:
+            return cached[1]
+        value = compute()
+        if signature is not None:
+            with self._lock:
+                self._entries[key] = (signature, value)
+        return value
+
+    def load(self, path, parser):
+        return self.get((path, parser), _path_signature(path), lambda: parser(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+FILE_CACHE = FileCache()
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+class Asset:
+    def __init__(self, url, path, body, content_type, version, deps=()):
+        self.url = url
+        self.path = path
+        self.body = body
+        self.content_type = content_type
+        self.version = version
+        self.deps = tuple(deps)
+        # Versioned URLs of every module an HTML page ends up importing (empty for non-HTML).
+        self.preload = ()
+        self.etag = quote_etag(hashlib.sha256(body).hexdigest())
+        self._gzipped = None
+
+    def link_header(self):
+        return ", ".join(f"<{url}>; rel=modulepreload" for url in self.preload)
+
+    def gzipped(self):
+        if self._gzipped is None:
+            body = gzip_bytes(self.body)
+            self._gzipped = (body, quote_etag(hashlib.sha256(body).hexdigest()))
+        return self._gzipped
+
+
+class AssetManifest:
+    """Content-hash versions for the ES modules, stylesheet and HTML entry point under `root`.
+
+    A module's version covers its own bytes and the versions of everything it imports, so editing
+    `ui/summary.js` also bumps `ui/render.js` and `app.js`. Import specifiers and HTML references
+    are rewritten to `?v=<version>`, which lets those URLs be cached as immutable. HTML pages also
+    get `<link rel="modulepreload">` for their whole module graph, so the browser fetches it in
+    one round instead of discovering imports level by level.
+    """
+
+    def __init__(self, root=ROOT, scan_interval=ASSET_SCAN_INTERVAL_SEC):
+        self.root = root
+        self.scan_interval = scan_interval
+        self._lock = threading.Lock()
+        self._assets = {}
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _scan(self):
+        files = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for name in filenames:
+                if not name.endswith(ASSET_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                url = "/" + os.path.relpath(path, self.root).replace(os.sep, "/")
+                files[url] = (path, stat.st_mtime_ns, stat.st_size)
+        return files
+
+    @staticmethod
+    def _resolve(base_url, ref):
+        if ref.startswith("/"):
+            return posixpath.normpath(ref)
+        return posixpath.normpath(posixpath.join(posixpath.dirname(base_url), ref))
+
+    def _build(self, files):
+        raw = {}
+        for url, (path, _mtime, _size) in files.items():
+            try:
+                with open(path, "rb") as fp:
+                    raw[url] = fp.read()
+            except OSError:
+                continue
+        deps = {}
+        for url, body in raw.items():
+            if url.endswith((".js", ".mjs")):
+                text = body.decode("utf-8", errors="replace")
+                found = {self._resolve(url, match.group(3)) for match in _IMPORT_SPEC_RE.finditer(text)}
+                deps[url] = sorted(dep for dep in found if dep in raw)
+        versions = {}
+
+        def version_of(url, stack):
+            if url in versions:
+                return versions[url]
+            digest = hashlib.sha256(raw[url])
+            if url not in stack:
+                stack.add(url)
+                for dep in deps.get(url, ()):
+                    if dep not in stack:
+                        digest.update(version_of(dep, stack).encode("ascii"))
+                stack.discard(url)
+            versions[url] = digest.hexdigest()[:12]
+            return versions[url]
+
+        for url in raw:
+            version_of(url, set())
+
+        def rewrite(url, pattern, text):
+            def replace(match):
+                target = self._resolve(url, match.group(3))
+                if target not in versions:
+                    return match.group(0)
+                quote = match.group(2)
+                return f"{match.group(1)}{quote}{match.group(3)}?v={versions[target]}{quote}"
+
+            return pattern.sub(replace, text)
+
+        def module_graph(entries):
+            ordered = []
+            seen = set()
+            queue = [entry for entry in entries if entry in raw]
+            while queue:
+                url = queue.pop(0)
+                if url in seen:
+                    continue
+                seen.add(url)
+                ordered.append(url)
+                queue.extend(deps.get(url, ()))
+            return ordered
+
+        assets = {}
+        for url, body in raw.items():
+            ext = os.path.splitext(url)[1]
+            preload = ()
+            if ext in (".js", ".mjs"):
+                body = rewrite(url, _IMPORT_SPEC_RE, body.decode("utf-8", errors="replace")).encode("utf-8")
+            elif ext == ".html":
+                text = body.decode("utf-8", errors="replace")
+                entries = [self._resolve(url, match.group(1)) for match in _MODULE_SCRIPT_RE.finditer(text)]
+                preload = tuple(f"{module}?v={versions[module]}" for module in module_graph(entries))
+                text = rewrite(url, _HTML_REF_RE, text)
+                head_end = re.search(r"^([ \t]*)</head>", text, re.MULTILINE)
+                if preload and head_end:
+                    indent = head_end.group(1) + "  "
+                    links = "".join(f'{indent}<link rel="modulepreload" href="{href}" />\n' for href in preload)
+                    text = text[: head_end.start()] + links + text[head_end.start():]
+                body = text.encode("utf-8")
+            asset = Asset(url, files[url][0], body, _ASSET_CONTENT_TYPES[ext], versions[url], deps.get(url, ()))
+            asset.preload = preload
+            assets[url] = asset
+        return assets
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._signature is not None and now - self._checked_at < self.scan_interval:
+                return
+            self._checked_at = now
+            files = self._scan()
+            signature = tuple(sorted((url, mtime, size) for url, (_path, mtime, size) in files.items()))
+            if signature != self._signature:
+                self._assets = self._build(files)
+                self._signature = signature
+
+    def lookup(self, url_path):
+        self.refresh()
+        with self._lock:
+            return self._assets.get(url_path)
+
+    def versions(self):
+        self.refresh()
+        with self._lock:
+            return {url: asset.version for url, asset in self._assets.items()}
+
+
+ASSETS = AssetManifest()
 
 
 def load_env(path):
     if not os.path.exists(path):
         return {}
+    return dict(FILE_CACHE.load(path, _parse_env))
+
+
+def _parse_env(path):
     env = {}
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
@@ -88,20 +994,28 @@ def open_url(req, timeout, candidates):
     raise last_exc
 
 
-def call_doubao(prompt, model, api_key, proxies, system_prompt):
-    url = "https://ark.cn-beijing.volces.com/api/v3/chat/completions"
+def _doubao_request(prompt, model, api_key, system_prompt, url=None, stream=False):
     payload = {
         "model": model,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt},
         ],
-        "temperature": 0.4,
+        "temperature": AI_TEMPERATURE,
     }
+    if stream:
+        payload["stream"] = True
     data = json.dumps(payload).encode("utf-8")
-    req = request.Request(url, data=data, method="POST")
+    req = request.Request(url or DOUBAO_API_URL, data=data, method="POST")
     req.add_header("Content-Type", "application/json")
     req.add_header("Authorization", f"Bearer {api_key}")
+    if stream:
+        req.add_header("Accept", "text/event-stream")
+    return req
+
+
+def call_doubao(prompt, model, api_key, proxies, system_prompt, url=None):
+    req = _doubao_request(prompt, model, api_key, system_prompt, url=url)
     with open_url(req, timeout=310, candidates=proxies) as resp:
         raw = resp.read().decode("utf-8")
     parsed = json.loads(raw)
@@ -112,28 +1026,927 @@ def call_doubao(prompt, model, api_key, proxies, system_prompt):
     return message.get("content") or ""
 
 
-# Historical backfills can be slow on first run (warm caches, big upstream payloads).
-# Keep this high enough so the frontend doesn't see flaky 502s during backtest fills.
-def run_collector(target_date=None, timeout=600):
-    script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "collector.py"))
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as fp:
-        output_path = fp.name
-    cmd = [sys.executable, script_path]
-    if target_date:
-        cmd.extend(["--date", target_date])
-    cmd.extend(["--output", output_path])
+def ai_cache_key(model, system_prompt, prompt, temperature=AI_TEMPERATURE):
+    raw = json.dumps([model, system_prompt, prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AiCache:
+    """Doubao answers keyed by ai_cache_key(): memory LRU plus one JSON file per answer on disk.
+
+    Entries expire after `ttl_sec`; the disk tier is pruned oldest-first to `max_bytes`.
+    """
+
+    PRUNE_EVERY = 32
+
+    def __init__(self, root=AI_CACHE_DIR, memory_size=AI_CACHE_MEMORY, ttl_sec=AI_CACHE_TTL_SEC,
+                 max_bytes=AI_CACHE_MAX_BYTES):
+        self.root = root
+        self.memory_size = memory_size
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._stores_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+
+    def _disk_path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def _remember_locked(self, key, text, created_at):
+        self._memory.pop(key, None)
+        self._memory[key] = (text, created_at)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup_locked(self, key):
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry:
+            text, created_at = entry
+            if created_at + self.ttl_sec > now:
+                self._memory.move_to_end(key)
+                return text
+            self._memory.pop(key, None)
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as fp:
+                record = json.load(fp)
+        except Exception:
+            return None
+        created_at = float(record.get("createdAt") or 0)
+        text = record.get("text")
+        if not text or created_at + self.ttl_sec <= now:
+            return None
+        self._remember_locked(key, text, created_at)
+        return text
+
+    def lookup(self, key):
+        with self._lock:
+            text = self._lookup_locked(key)
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return text
+
+    def put(self, key, text):
+        if not text:
+            return
+        created_at = time.time()
+        with self._lock:
+            self._remember_locked(key, text, created_at)
+            self._stores_since_prune += 1
+            prune = self._stores_since_prune >= self.PRUNE_EVERY
+            if prune:
+                self._stores_since_prune = 0
+        try:
+            _write_json_atomic(self._disk_path(key), {"createdAt": created_at, "text": text})
+        except OSError:
+            pass
+        if prune:
+            self.prune()
+
+    def get_or_compute(self, key, compute, force=False):
+        """Return (text, "hit"|"miss"|"shared"); concurrent misses share one upstream call."""
+        with self._lock:
+            cached = None if force else self._lookup_locked(key)
+            if cached is not None:
+                self.hits += 1
+                return cached, "hit"
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+            else:
+                self.shared += 1
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, "shared"
+        try:
+            flight.result = compute()
+            self.put(key, flight.result)
+            return flight.result, "miss"
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def prune(self):
+        entries = []
+        now = time.time()
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _mtime, size, _path in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime + self.ttl_sec > now and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "memory": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+AI_CACHE = AiCache()
+
+
+class HttpConnectionPool:
+    """Idle keep-alive http.client connections per (scheme, host, port), reused LIFO."""
+
+    def __init__(self, max_idle=AI_HTTP_POOL_SIZE, timeout=310):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.created = 0
+        self.reused = 0
+
+    def _acquire(self, origin):
+        with self._lock:
+            idle = self._idle.get(origin)
+            if idle:
+                self.reused += 1
+                return idle.pop(), True
+            self.created += 1
+        scheme, host, port = origin
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout), False
+
+    def _release(self, origin, conn):
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def post(self, url, body, headers):
+        """POST and return (status, body bytes); a stale reused connection is retried once."""
+        parsed = urlparse(url)
+        scheme = parsed.scheme or "http"
+        origin = (scheme, parsed.hostname, parsed.port or (443 if scheme == "https" else 80))
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+        while True:
+            conn, reused = self._acquire(origin)
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.BadStatusLine):
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(origin, conn)
+            return resp.status, data
+
+    def stats(self):
+        with self._lock:
+            idle = sum(len(conns) for conns in self._idle.values())
+        return {"idle": idle, "created": self.created, "reused": self.reused}
+
+
+AI_HTTP_POOL = HttpConnectionPool()
+
+
+def call_doubao_pooled(prompt, model, api_key, proxies, system_prompt, url=None):
+    """call_doubao over a pooled keep-alive connection; proxied setups keep the urllib path."""
+    if not proxies or proxies[0].lower() != "direct":
+        return call_doubao(prompt, model, api_key, proxies, system_prompt, url=url)
+    req = _doubao_request(prompt, model, api_key, system_prompt, url=url)
+    status, raw = AI_HTTP_POOL.post(req.full_url, req.data, dict(req.header_items()))
+    if status >= 400:
+        raise RuntimeError(f"HTTP {status}: {raw[:200].decode('utf-8', errors='replace')}")
+    choices = json.loads(raw.decode("utf-8")).get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("message") or {}).get("content") or ""
+
+
+def run_ai_batch(items, complete, concurrency=AI_BATCH_CONCURRENCY, cancel_event=None):
+    """Yield one result per item as it completes, with at most `concurrency` calls in flight.
+
+    `complete(item)` returns (text, cache_state). Work goes through AI_POOL, so batches share the
+    global AI limit with single requests; a saturated pool just delays the next submission.
+    """
+    results = queue.Queue()
+    pending = list(items)
+    in_flight = 0
+
+    def run_one(item, started):
+        try:
+            text, cache_state = complete(item)
+            result = {"type": "item", "id": item.get("id"), "text": text, "cache": cache_state}
+        except Exception as exc:
+            result = {"type": "item", "id": item.get("id"), "error": f"ai request failed: {exc}"}
+        result["latencyMs"] = int((time.monotonic() - started) * 1000)
+        results.put(result)
+
+    while pending or in_flight:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        while pending and in_flight < concurrency:
+            try:
+                AI_POOL.submit(run_one, pending[0], time.monotonic())
+            except PoolSaturated:
+                break
+            pending.pop(0)
+            in_flight += 1
+        try:
+            result = results.get(timeout=0.2 if pending else AI_STREAM_HEARTBEAT_SEC)
+        except queue.Empty:
+            if not pending:
+                yield {"type": "ping"}
+            continue
+        in_flight -= 1
+        yield result
+
+
+def ai_settings(env):
+    """Doubao credentials and routing from `.env`, or None when AI is not configured."""
+    api_key = env.get("DOUBAO_API_KEY")
+    model = env.get("DOUBAO_MODEL")
+    if not api_key or not model:
+        return None
+    if (env.get("DOUBAO_DIRECT") or "").lower() in ("1", "true", "yes", "on"):
+        proxies = ["direct"]
+    else:
+        proxies = proxy_candidates(env)
+    return {"api_key": api_key, "model": model, "proxies": proxies, "url": env.get("DOUBAO_API_URL") or None}
+
+
+def snapshot_prompts(payload, date=None):
+    """Run scripts/ai_prompts.mjs on a collector payload; returns {date, promptVersion, items}."""
+    node = node_binary()
+    if not node or not os.path.exists(AI_PRECOMPUTE_SCRIPT):
+        raise RuntimeError("node binary or ai_prompts.mjs not found")
+    date = date or payload.get("targetDate") or datetime.now().strftime("%Y-%m-%d")
+    fd, tmp_path = tempfile.mkstemp(prefix="ai-prompts-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump(payload, fp, ensure_ascii=False)
+        result = subprocess.run(
+            [node, AI_PRECOMPUTE_SCRIPT, "--auto", tmp_path, "--date", date],
+            cwd=APP_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+    finally:
+        os.remove(tmp_path)
+    if result.returncode != 0:
+        raise RuntimeError((result.stderr or "ai_prompts.mjs failed").strip()[:200])
+    return json.loads(result.stdout)
+
+
+class AiPrecomputeQueue:
+    """Background Doubao generation for new snapshots, persisted across restarts.
+
+    Entries are keyed by ai_cache_key(), so re-persisting a snapshot whose prompts did not change
+    queues nothing. One worker thread takes one entry at a time, and only while no interactive
+    /ai/* request arrived in the last `idle_sec` and the AI pool is empty. Answers go to AI_CACHE,
+    where the dashboard's own requests (and GET /ai/precomputed) find them.
+    """
+
+    KIND_ORDER = {"summary": 0, "overall": 1, "gate": 2, "field": 3}
+
+    def __init__(
+        self,
+        path=AI_PRECOMPUTE_PATH,
+        idle_sec=AI_PRECOMPUTE_IDLE_SEC,
+        max_attempts=AI_PRECOMPUTE_MAX_ATTEMPTS,
+        retain_sec=AI_CACHE_TTL_SEC,
+        prompt_source=snapshot_prompts,
+        complete=None,
+    ):
+        self.path = path
+        self.idle_sec = idle_sec
+        self.max_attempts = max_attempts
+        self.retain_sec = retain_sec
+        self.prompt_source = prompt_source
+        self.complete = complete
+        self._lock = threading.Lock()
+        self._entries = None
+        self._thread = None
+        self._last_interactive = 0.0
+        self.generated = 0
+        self.failures = 0
+        self.last_error = None
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            payload = _read_json(self.path)
+        except (OSError, ValueError):
+            payload = {}
+        if not isinstance(payload, dict):
+            payload = {}
+        for entry in payload.get("entries") or []:
+            if not isinstance(entry, dict) or not entry.get("key") or not entry.get("prompt"):
+                continue
+            if entry.get("state") == "running":
+                # Interrupted by a restart.
+                entry["state"] = "queued"
+            self._entries[entry["key"]] = entry
+
+    def _save(self):
+        try:
+            _write_json_atomic(self.path, {"version": 1, "entries": list(self._entries.values())})
+        except OSError:
+            pass
+
+    def _prune(self, now):
+        for key, entry in list(self._entries.items()):
+            finished = entry.get("finishedAt")
+            if entry.get("state") in ("done", "failed") and finished and now - finished > self.retain_sec:
+                del self._entries[key]
+
+    def touch(self):
+        """Record interactive AI traffic; the worker backs off for `idle_sec` afterwards."""
+        self._last_interactive = time.monotonic()
+
+    def idle(self):
+        if time.monotonic() - self._last_interactive < self.idle_sec:
+            return False
+        return AI_POOL.stats()["running"] == 0
+
+    def enqueue(self, date, items, model, prompt_version=None):
+        """Queue prompts for `date`; returns how many were new. Known prompts only get re-tagged."""
+        now = time.time()
+        added = 0
+        with self._lock:
+            self._load()
+            self._prune(now)
+            for item in items:
+                prompt = item.get("prompt")
+                if not prompt:
+                    continue
+                key = ai_cache_key(model, AI_SYSTEM_PROMPT, prompt)
+                entry = self._entries.get(key)
+                if entry is None:
+                    cached = AI_CACHE.lookup(key) is not None
+                    entry = {
+                        "key": key,
+                        "prompt": prompt,
+                        "state": "done" if cached else "queued",
+                        "attempts": 0,
+                        "enqueuedAt": now,
+                        "finishedAt": now if cached else None,
+                    }
+                    self._entries[key] = entry
+                    added += 0 if cached else 1
+                entry.update({"date": date, "kind": item.get("kind"), "id": item.get("id")})
+                if prompt_version:
+                    entry["promptVersion"] = prompt_version
+            self._save()
+            self._ensure_worker()
+        return added
+
+    def schedule_snapshot(self, payload, date=None):
+        """Build prompts for a just-persisted snapshot off-thread and queue them."""
+        if not AI_PRECOMPUTE_ENABLED:
+            return False
+        settings = ai_settings(load_env(ENV_PATH))
+        if not settings:
+            return False
+        threading.Thread(
+            target=self._prepare, args=(payload, date, settings["model"]), name="ai-precompute-prompts", daemon=True
+        ).start()
+        return True
+
+    def _prepare(self, payload, date, model):
+        try:
+            result = self.prompt_source(payload, date)
+        except Exception as exc:
+            self.last_error = f"prompts: {exc}"
+            return
+        self.enqueue(result.get("date"), result.get("items") or [], model, result.get("promptVersion"))
+
+    def resume(self):
+        """Restart work left queued in the state file (called once at server start)."""
+        with self._lock:
+            self._load()
+            self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        if not any(entry.get("state") == "queued" for entry in self._entries.values()):
+            return
+        self._thread = threading.Thread(target=self._run, name="ai-precompute", daemon=True)
+        self._thread.start()
+
+    def _next(self):
+        queued = [entry for entry in self._entries.values() if entry.get("state") == "queued"]
+        if not queued:
+            return None
+        # Newest snapshot first; the summary and overall text before the gates.
+        queued.sort(key=lambda entry: (entry.get("enqueuedAt") or 0, str(entry.get("date") or "")), reverse=True)
+        queued.sort(key=lambda entry: self.KIND_ORDER.get(entry.get("kind"), 9))
+        queued.sort(key=lambda entry: str(entry.get("date") or ""), reverse=True)
+        return queued[0]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                entry = self._next()
+                if entry is None:
+                    self._thread = None
+                    return
+            if not self.idle():
+                time.sleep(max(0.05, min(1.0, self.idle_sec / 2)))
+                continue
+            settings = ai_settings(load_env(ENV_PATH))
+            if not settings:
+                with self._lock:
+                    self._thread = None
+                return
+            with self._lock:
+                entry["state"] = "running"
+                entry["attempts"] = int(entry.get("attempts") or 0) + 1
+                self._save()
+            complete = self.complete or call_doubao_pooled
+            error = None
+            try:
+                AI_CACHE.get_or_compute(
+                    entry["key"],
+                    lambda: complete(
+                        entry["prompt"],
+                        settings["model"],
+                        settings["api_key"],
+                        settings["proxies"],
+                        AI_SYSTEM_PROMPT,
+                        url=settings["url"],
+                    ),
+                )
+            except Exception as exc:
+                error = str(exc)
+            with self._lock:
+                if error is None:
+                    entry.update({"state": "done", "finishedAt": time.time(), "error": None})
+                    self.generated += 1
+                else:
+                    self.failures += 1
+                    self.last_error = error
+                    retry = entry["attempts"] < self.max_attempts
+                    entry.update({"state": "queued" if retry else "failed", "error": error[:200]})
+                    if not retry:
+                        entry["finishedAt"] = time.time()
+                self._save()
+            if error is not None:
+                time.sleep(min(30.0, 2.0 ** entry["attempts"]))
+
+    def for_date(self, date):
+        """Answers generated so far for `date`, shaped like the frontend's AI state."""
+        with self._lock:
+            self._load()
+            entries = [entry for entry in self._entries.values() if entry.get("date") == date]
+        result = {"date": date, "summary": None, "overall": None, "gates": [], "pending": 0, "failed": 0}
+        for entry in entries:
+            state = entry.get("state")
+            if state in ("queued", "running"):
+                result["pending"] += 1
+                continue
+            if state == "failed":
+                result["failed"] += 1
+                continue
+            text = AI_CACHE.lookup(entry["key"])
+            if text is None:
+                continue
+            if entry.get("kind") in ("summary", "overall"):
+                result[entry["kind"]] = text
+            elif entry.get("kind") == "gate":
+                result["gates"].append({"id": entry.get("id"), "text": text})
+            if entry.get("promptVersion"):
+                result["promptVersion"] = entry["promptVersion"]
+        return result
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            states = {}
+            for entry in self._entries.values():
+                states[entry.get("state")] = states.get(entry.get("state"), 0) + 1
+            running = self._thread is not None
+        return {
+            "queued": states.get("queued", 0) + states.get("running", 0),
+            "done": states.get("done", 0),
+            "failed": states.get("failed", 0),
+            "generated": self.generated,
+            "failures": self.failures,
+            "working": running,
+            "lastError": self.last_error,
+        }
+
+
+AI_PRECOMPUTE = AiPrecomputeQueue()
+
+
+def call_doubao_stream(prompt, model, api_key, proxies, system_prompt, url=None, cancel_event=None):
+    """Yield content deltas of a `stream: true` chat completion (`data:` lines until `[DONE]`).
+
+    Closing the generator or setting `cancel_event` drops the upstream connection.
+    """
+    req = _doubao_request(prompt, model, api_key, system_prompt, url=url, stream=True)
+    with open_url(req, timeout=310, candidates=proxies) as resp:
+        for raw_line in resp:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+
+def wants_stream(headers, payload):
+    accept = (headers.get("Accept") or "").lower()
+    return bool(payload.get("stream")) or "application/x-ndjson" in accept
+
+
+# Historical backfills can be slow on first run (warm caches, big upstream payloads).
+# Keep this high enough so the frontend doesn't see flaky 502s during backtest fills.
+def run_collector(target_date=None, timeout=600, cancel_event=None, progress=None):
+    """Collect in-process so DNS_CACHE and parsed upstream payloads stay warm across requests."""
+    if COLLECTOR_SUBPROCESS:
+        return run_collector_subprocess(target_date, timeout=timeout, cancel_event=cancel_event)
+    options = {
+        "cancel_event": cancel_event,
+        "deadline": time.monotonic() + timeout,
+        "progress": progress,
+    }
+    try:
+        payload = collector.collect(target_date, options)
+    except collector.CollectCancelled:
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled("collector cancelled")
+        raise RuntimeError(f"collector timed out after {timeout}s")
+    try:
+        collector.remember_observations(payload)
+    except Exception:
+        pass
+    return payload
+
+
+def run_collector_subprocess(target_date=None, timeout=600, cancel_event=None):
+    script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "collector.py"))
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as fp:
+        output_path = fp.name
+    cmd = [sys.executable, script_path]
+    if target_date:
+        cmd.extend(["--date", target_date])
+    cmd.extend(["--output", output_path])
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                cancelled = cancel_event is not None and cancel_event.is_set()
+                if not cancelled and time.monotonic() < deadline:
+                    continue
+                proc.kill()
+                proc.communicate()
+                if cancelled:
+                    raise JobCancelled("collector cancelled")
+                raise RuntimeError(f"collector timed out after {timeout}s")
+        if proc.returncode != 0:
+            detail = (stderr or stdout or "").strip()
+            raise RuntimeError(detail or "collector failed")
+        with open(output_path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    finally:
+        try:
+            os.unlink(output_path)
+        except OSError:
+            pass
+
+
+def collector_version():
+    """Cache namespace: changes whenever collector.py changes."""
+    global _collector_version
+    if _collector_version is None:
+        try:
+            with open(collector.__file__, "rb") as fp:
+                _collector_version = hashlib.sha256(fp.read()).hexdigest()[:12]
+        except OSError:
+            _collector_version = "unknown"
+    return _collector_version
+
+
+def is_history_final(target_date, payload, today=None):
+    """A historical result is final (cacheable forever) when re-running cannot change it.
+
+    - the date is at least HISTORY_FINAL_LAG_DAYS old, so late publications/revisions are in;
+    - nothing is missing and nothing was borrowed from local fallbacks (those depend on whatever
+      auto.json held at run time);
+    - every field was observed on or before the date, except LATEST_ONLY_FIELDS, which can only
+      ever report "now" and would only drift further from the date on a re-run.
+    """
+    if not isinstance(payload, dict):
+        return False
+    parsed = collector.parse_iso_date(target_date)
+    today = today or datetime.now().date()
+    if not parsed or (today - parsed).days < HISTORY_FINAL_LAG_DAYS:
+        return False
+    if payload.get("missing"):
+        return False
+    if any("fallback:" in str(item) for item in payload.get("errors") or []):
+        return False
+    day_end = collector.parse_date_like(target_date)
+    for key, stamp in (payload.get("fieldObservedAt") or {}).items():
+        if key in collector.LATEST_ONLY_FIELDS:
+            continue
+        observed = collector.parse_date_like(stamp)
+        if observed and day_end and observed > day_end:
+            return False
+    return True
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class HistoryCache:
+    """Two-tier (memory LRU + gzip on disk) cache for /data/history keyed by (date, version)."""
+
+    def __init__(self, root=HISTORY_CACHE_DIR, memory_size=HISTORY_CACHE_MEMORY):
+        self.root = root
+        self.memory_size = memory_size
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key):
+        date, version = key
+        return os.path.join(self.root, version, f"{date}.json.gz")
+
+    def _remember_locked(self, key, payload, expires_at):
+        self._memory.pop(key, None)
+        self._memory[key] = (payload, expires_at)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup_locked(self, key):
+        entry = self._memory.get(key)
+        if entry:
+            payload, expires_at = entry
+            if expires_at is None or expires_at > time.time():
+                self._memory.move_to_end(key)
+                return payload
+            self._memory.pop(key, None)
+        path = self._disk_path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fp:
+                payload = json.load(fp)
+        except Exception:
+            return None
+        self._remember_locked(key, payload, None)
+        return payload
+
+    def store(self, date, payload):
+        key = (date, collector_version())
+        final = is_history_final(date, payload)
+        with self._lock:
+            if final:
+                self._remember_locked(key, payload, None)
+            elif HISTORY_PROVISIONAL_TTL_SEC:
+                self._remember_locked(key, payload, time.time() + HISTORY_PROVISIONAL_TTL_SEC)
+        if final:
+            path = self._disk_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+                with gzip.open(tmp_path, "wt", encoding="utf-8") as fp:
+                    json.dump(payload, fp, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
+        return final
+
+    def get(self, date):
+        """The cached payload for `date` (None on a miss), without joining or starting a collection."""
+        key = (date, collector_version())
+        with self._lock:
+            cached = self._lookup_locked(key)
+            if cached is not None:
+                self.hits += 1
+            return cached
+
+    def get_or_compute(self, date, compute, force=False, cancel_event=None):
+        """Return (payload, "hit"|"miss"|"shared"); concurrent misses share one computation.
+
+        A caller waiting on someone else's computation honours its own `cancel_event`, and when
+        the owner was cancelled instead it retries rather than inheriting that cancellation.
+        """
+        key = (date, collector_version())
+        while True:
+            with self._lock:
+                cached = None if force else self._lookup_locked(key)
+                if cached is not None:
+                    self.hits += 1
+                    return cached, "hit"
+                flight = self._inflight.get(key)
+                owner = flight is None
+                if owner:
+                    flight = _Flight()
+                    self._inflight[key] = flight
+                    self.misses += 1
+            if owner:
+                break
+            while not flight.event.wait(0.2):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise JobCancelled("cancelled while waiting for a shared collection")
+            if isinstance(flight.error, JobCancelled):
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, "shared"
+        try:
+            flight.result = compute()
+            self.store(date, flight.result)
+            return flight.result, "miss"
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def stats(self):
+        with self._lock:
+            return {"memory": len(self._memory), "inflight": len(self._inflight), "hits": self.hits, "misses": self.misses}
+
+
+HISTORY_CACHE = HistoryCache()
+
+
+def collect_history(target_date, force=False, cancel_event=None, progress=None, pool=None):
+    """HISTORY_CACHE lookup around run_collector. Request threads pass `pool` so only a real miss
+    takes a collector worker (hits and single-flight waiters stay on the caller's thread); jobs
+    already run on a collector worker and collect inline."""
+
+    def compute():
+        if pool is not None:
+            return pool.run(run_collector, target_date, cancel_event=cancel_event, progress=progress)
+        return run_collector(target_date, cancel_event=cancel_event, progress=progress)
+
+    return HISTORY_CACHE.get_or_compute(target_date, compute, force=force, cancel_event=cancel_event)
+
+
+def collector_job_key(kind, target_date, force=False):
+    """JobManager dedupe key: a forced run never attaches to a pending cached one."""
+    return f"{kind}:{target_date or ''}" + (":force" if force else "")
+
+
+def collector_job(target_date, persist, force=False):
+    def run(job):
+        job.set_progress("collect", date=target_date)
+
+        def progress(source, done, total):
+            job.set_progress("collect", date=target_date, source=source, done=done, total=total)
+
+        if persist or not target_date:
+            data = run_collector(target_date, cancel_event=job.cancel_event, progress=progress)
+        else:
+            data, cache_state = collect_history(
+                target_date, force=force, cancel_event=job.cancel_event, progress=progress
+            )
+            job.set_progress("collect", date=target_date, cache=cache_state)
+        if persist:
+            job.set_progress("persist", date=target_date)
+            persist_auto_snapshot(data)
+        return data
+
+    return run
+
+
+def load_auto_snapshot():
+    try:
+        with open(AUTO_JSON_PATH, "r", encoding="utf-8") as fp:
+            payload = json.load(fp)
+        return payload if isinstance(payload, dict) else None
+    except Exception:
+        return None
+
+
+def snapshot_staleness(payload, now=None):
+    """Age of a persisted snapshot plus per-field freshness against HALF_LIFE_DAYS."""
+    now = now or datetime.now(collector.timezone.utc)
+    generated = collector.parse_date_like(payload.get("generatedAt"))
+    observed = payload.get("fieldObservedAt") or {}
+    stale_fields = []
+    aging_fields = []
+    for key in payload.get("data") or {}:
+        stamp = observed.get(key)
+        observed_at = collector.parse_date_like(stamp)
+        if not observed_at:
+            continue
+        age_days = (now - observed_at).total_seconds() / 86400.0
+        if collector.is_stale(stamp, now, key):
+            stale_fields.append(key)
+        elif age_days > collector.resolve_half_life_days(key):
+            aging_fields.append(key)
+    return {
+        "generatedAt": payload.get("generatedAt"),
+        "ageSec": max(0, int((now - generated).total_seconds())) if generated else None,
+        "stale": bool(stale_fields),
+        "staleFields": sorted(stale_fields),
+        "agingFields": sorted(aging_fields),
+    }
+
+
+def build_swr_response(force=False):
+    """Serve the last persisted snapshot now and make sure a background refresh is running."""
+    snapshot = load_auto_snapshot()
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-        if result.returncode != 0:
-            detail = (result.stderr or result.stdout or "").strip()
-            raise RuntimeError(detail or "collector failed")
-        with open(output_path, "r", encoding="utf-8") as fp:
-            return json.load(fp)
-    finally:
-        try:
-            os.unlink(output_path)
-        except OSError:
-            pass
+        job, created = JOBS.submit(
+            "refresh",
+            collector_job_key("refresh", None, force),
+            collector_job(None, persist=True, force=force),
+            params={"date": None},
+            priority=PRIORITY_DAILY,
+        )
+        refresh = job.to_dict(include_result=False)
+        refresh["created"] = created
+    except PoolSaturated as exc:
+        refresh = {"status": "busy", "error": str(exc), "retryAfter": exc.retry_after}
+    if snapshot is None:
+        return None, refresh
+    response = dict(snapshot)
+    response["swr"] = {**snapshot_staleness(snapshot), "refresh": refresh}
+    return response, refresh
+
+
+def wants_async(headers, payload):
+    if isinstance(payload, dict) and payload.get("async") in (True, 1, "1", "true"):
+        return True
+    prefer = (headers.get("Prefer") or "").lower()
+    return "respond-async" in prefer
 
 
 def persist_auto_snapshot(payload):
@@ -146,6 +1959,201 @@ def persist_auto_snapshot(payload):
             json.dump(payload, fp, ensure_ascii=False, indent=2)
     except Exception:
         return
+    try:
+        record_snapshot(payload)
+    except Exception:
+        pass
+    try:
+        AI_PRECOMPUTE.schedule_snapshot(payload)
+    except Exception:
+        return
+
+
+def snapshot_version(payload):
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def diff_snapshot(base, current):
+    """Describe `current` as changes against `base`.
+
+    Dict sections (data/sources/fieldObservedAt/...) are diffed key by key; any other top-level
+    value (generatedAt, missing, errors, proxyTrace) is replaced whole when it differs.
+    """
+    base = base or {}
+    current = current or {}
+    delta = {
+        "format": SNAPSHOT_DELTA_FORMAT,
+        "kind": "delta",
+        "base": snapshot_version(base),
+        "version": snapshot_version(current),
+        "set": {},
+        "unset": {},
+        "replace": {},
+        "drop": [],
+    }
+    for key in current:
+        value = current[key]
+        prior = base.get(key)
+        if isinstance(value, dict) and isinstance(prior, dict):
+            changed = {k: v for k, v in value.items() if k not in prior or prior[k] != v}
+            removed = [k for k in prior if k not in value]
+            if changed:
+                delta["set"][key] = changed
+            if removed:
+                delta["unset"][key] = removed
+        elif key not in base or prior != value:
+            delta["replace"][key] = value
+    delta["drop"] = [key for key in base if key not in current]
+    return delta
+
+
+def apply_snapshot_delta(base, delta):
+    snapshot = dict(base or {})
+    for key, changed in (delta.get("set") or {}).items():
+        section = dict(snapshot.get(key) or {})
+        section.update(changed)
+        snapshot[key] = section
+    for key, removed in (delta.get("unset") or {}).items():
+        section = dict(snapshot.get(key) or {})
+        for item in removed:
+            section.pop(item, None)
+        snapshot[key] = section
+    snapshot.update(delta.get("replace") or {})
+    for key in delta.get("drop") or []:
+        snapshot.pop(key, None)
+    return snapshot
+
+
+def _load_snapshot_index():
+    path = os.path.join(SNAPSHOT_DIR, "index.json")
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            payload = json.load(fp)
+        entries = payload.get("entries") if isinstance(payload, dict) else None
+        return entries if isinstance(entries, list) else []
+    except Exception:
+        return []
+
+
+def _write_json_atomic(path, payload, indent=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        json.dump(payload, fp, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def _snapshot_entry_path(version):
+    return os.path.join(SNAPSHOT_DIR, f"{version}.json")
+
+
+def _load_snapshot_locked(entries, version):
+    if version in _snapshot_cache:
+        return _snapshot_cache[version]
+    positions = {entry.get("version"): idx for idx, entry in enumerate(entries)}
+    idx = positions.get(version)
+    if idx is None:
+        return None
+    chain = []
+    while idx is not None:
+        entry = entries[idx]
+        chain.append(entry)
+        if entry.get("kind") == "keyframe":
+            break
+        idx = positions.get(entry.get("base"))
+    if not chain or chain[-1].get("kind") != "keyframe":
+        return None
+    snapshot = None
+    for entry in reversed(chain):
+        with open(_snapshot_entry_path(entry["version"]), "r", encoding="utf-8") as fp:
+            stored = json.load(fp)
+        snapshot = stored if entry.get("kind") == "keyframe" else apply_snapshot_delta(snapshot, stored)
+    if len(_snapshot_cache) >= 8:
+        _snapshot_cache.pop(next(iter(_snapshot_cache)))
+    _snapshot_cache[version] = snapshot
+    return snapshot
+
+
+def load_snapshot(version):
+    """Rebuild a logged snapshot: nearest keyframe plus at most SNAPSHOT_KEYFRAME_EVERY deltas."""
+    if not version:
+        return None
+    with _snapshot_lock:
+        try:
+            return _load_snapshot_locked(_load_snapshot_index(), version)
+        except Exception:
+            return None
+
+
+def record_snapshot(payload):
+    """Append `payload` to the snapshot log (run/snapshots) and return its version."""
+    version = snapshot_version(payload)
+    with _snapshot_lock:
+        entries = _load_snapshot_index()
+        if entries and entries[-1].get("version") == version:
+            return version
+        if any(entry.get("version") == version for entry in entries):
+            return version
+        since_keyframe = 0
+        for entry in reversed(entries):
+            if entry.get("kind") == "keyframe":
+                break
+            since_keyframe += 1
+        base = None
+        if entries and since_keyframe + 1 < SNAPSHOT_KEYFRAME_EVERY:
+            try:
+                base = _load_snapshot_locked(entries, entries[-1].get("version"))
+            except Exception:
+                base = None
+        if base is None:
+            entry = {"version": version, "kind": "keyframe", "base": None}
+            stored = payload
+        else:
+            stored = diff_snapshot(base, payload)
+            entry = {"version": version, "kind": "delta", "base": stored["base"]}
+        entry["generatedAt"] = payload.get("generatedAt") if isinstance(payload, dict) else None
+        _write_json_atomic(_snapshot_entry_path(version), stored)
+        entries.append(entry)
+        if len(entries) > SNAPSHOT_RETAIN:
+            # Only cut at a keyframe so every retained delta can still be rebuilt.
+            cut = len(entries) - SNAPSHOT_RETAIN
+            while cut > 0 and entries[cut].get("kind") != "keyframe":
+                cut -= 1
+            for stale in entries[:cut]:
+                _snapshot_cache.pop(stale.get("version"), None)
+                try:
+                    os.unlink(_snapshot_entry_path(stale.get("version")))
+                except OSError:
+                    pass
+            entries = entries[cut:]
+        _write_json_atomic(os.path.join(SNAPSHOT_DIR, "index.json"), {"entries": entries})
+        _snapshot_cache[version] = payload
+        if len(_snapshot_cache) > 8:
+            _snapshot_cache.pop(next(iter(_snapshot_cache)))
+    return version
+
+
+def build_snapshot_delta_response(base_version):
+    """Answer a client holding `base_version` with the cheapest payload that reaches auto.json."""
+
+    def load_and_record():
+        snapshot = load_auto_snapshot()
+        # auto.json is also written by the CLI collector / daily autorun, so log it lazily here.
+        return snapshot, (record_snapshot(snapshot) if snapshot is not None else None)
+
+    # Parsing, hashing and logging only happen when auto.json's mtime/size change.
+    current, version = FILE_CACHE.get(
+        ("auto-delta", AUTO_JSON_PATH), _path_signature(AUTO_JSON_PATH), load_and_record
+    )
+    if current is None:
+        return None
+    if base_version and base_version == version:
+        return {"format": SNAPSHOT_DELTA_FORMAT, "kind": "unchanged", "base": version, "version": version}
+    base = load_snapshot(base_version)
+    if base is None:
+        return {"format": SNAPSHOT_DELTA_FORMAT, "kind": "keyframe", "version": version, "snapshot": current}
+    return diff_snapshot(base, current)
 
 
 def load_daily_status():
@@ -157,10 +2165,9 @@ def load_daily_status():
             "message": "daily autorun not initialized",
         })
     try:
-        with open(status_path, "r", encoding="utf-8") as fp:
-            payload = json.load(fp)
+        payload = FILE_CACHE.load(status_path, _read_json)
         if isinstance(payload, dict):
-            return _normalize_daily_status(payload)
+            return _normalize_daily_status(dict(payload))
     except Exception:
         pass
     return _normalize_daily_status({
@@ -201,10 +2208,9 @@ def load_backfill_status():
             "total": 0,
         }
     try:
-        with open(status_path, "r", encoding="utf-8") as fp:
-            payload = json.load(fp)
+        payload = FILE_CACHE.load(status_path, _read_json)
         if isinstance(payload, dict):
-            return payload
+            return dict(payload)
     except Exception:
         pass
     return {
@@ -221,9 +2227,9 @@ def load_perf_summary():
     if not os.path.exists(summary_path):
         return {"status": "missing", "asOfDate": None, "generatedAt": None}
     try:
-        with open(summary_path, "r", encoding="utf-8") as fp:
-            payload = json.load(fp)
+        payload = FILE_CACHE.load(summary_path, _read_json)
         if isinstance(payload, dict):
+            payload = dict(payload)
             payload.setdefault("status", "ok")
             return payload
     except Exception:
@@ -235,6 +2241,11 @@ def load_iteration_latest():
     iteration_dir = os.path.join(RUN_ROOT, "iteration")
     if not os.path.exists(iteration_dir):
         return {"status": "missing", "date": None, "updatedAt": None, "content": ""}
+    return dict(FILE_CACHE.get(("iteration", iteration_dir), _iteration_signature(), _read_iteration_latest))
+
+
+def _read_iteration_latest():
+    iteration_dir = os.path.join(RUN_ROOT, "iteration")
     try:
         files = sorted([f for f in os.listdir(iteration_dir) if f.endswith(".md")])
     except Exception:
@@ -253,6 +2264,135 @@ def load_iteration_latest():
         return {"status": "fail", "date": None, "updatedAt": None, "content": "", "error": str(exc)}
 
 
+def _iteration_signature():
+    iteration_dir = os.path.join(RUN_ROOT, "iteration")
+    try:
+        files = sorted(f for f in os.listdir(iteration_dir) if f.endswith(".md"))
+    except OSError:
+        return None
+    if not files:
+        return None
+    return (files[-1], _path_signature(os.path.join(iteration_dir, files[-1])))
+
+
+def load_auto_event():
+    payload = load_auto_snapshot()
+    if payload is None:
+        return {"status": "missing"}
+    return {"status": "ok", "version": snapshot_version(payload), "generatedAt": payload.get("generatedAt")}
+
+
+def event_sources():
+    """name -> (signature(), loader()); a changed signature republishes the loader's payload."""
+    return {
+        "daily": (lambda: _path_signature(os.path.join(RUN_ROOT, "daily_status.json")), load_daily_status),
+        "backfill": (lambda: _path_signature(os.path.join(RUN_ROOT, "backfill_status.json")), load_backfill_status),
+        "perf": (lambda: _path_signature(os.path.join(RUN_ROOT, "perf_summary.json")), load_perf_summary),
+        "iteration": (_iteration_signature, load_iteration_latest),
+        "auto": (lambda: _path_signature(AUTO_JSON_PATH), load_auto_event),
+    }
+
+
+class TooManySubscribers(RuntimeError):
+    pass
+
+
+class EventHub:
+    """Fans status changes out to SSE subscribers.
+
+    A single watcher thread polls the status files by mtime/size while anyone is subscribed, so
+    N open dashboards cost one stat loop instead of N polling clients re-reading run/*.json. Jobs
+    publish their own progress through publish().
+    """
+
+    def __init__(self, sources=None, poll_sec=EVENTS_POLL_SEC, heartbeat_sec=EVENTS_HEARTBEAT_SEC,
+                 max_subscribers=EVENTS_MAX_SUBSCRIBERS, queue_size=64):
+        self._sources = sources
+        self.poll_sec = poll_sec
+        self.heartbeat_sec = heartbeat_sec
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._state = {}
+        self._thread = None
+        self._seq = 0
+
+    def sources(self):
+        return self._sources if self._sources is not None else event_sources()
+
+    def subscribe(self):
+        """Register a subscriber queue, pre-filled with the current state of every source."""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        self.poll()
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers(f"{len(self._subscribers)} event streams open")
+            for name, (_signature, payload) in self._state.items():
+                self._seq += 1
+                subscriber.put_nowait((self._seq, name, payload))
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="events", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, name, payload):
+        with self._lock:
+            self._seq += 1
+            message = (self._seq, name, payload)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow reader: drop its oldest event rather than block the publisher.
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def poll(self):
+        for name, (signature_fn, loader) in self.sources().items():
+            try:
+                signature = signature_fn()
+            except Exception:
+                signature = None
+            with self._lock:
+                previous = self._state.get(name)
+            if previous is not None and previous[0] == signature:
+                continue
+            try:
+                payload = loader()
+            except Exception as exc:
+                payload = {"status": "fail", "error": str(exc)}
+            with self._lock:
+                self._state[name] = (signature, payload)
+            if previous is not None:
+                self.publish(name, payload)
+
+    def _watch(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            self.poll()
+            time.sleep(self.poll_sec)
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "watching": self._thread is not None}
+
+
+EVENTS = EventHub()
+
+
 def node_binary():
     candidates = [
         which("node"),
@@ -265,7 +2405,140 @@ def node_binary():
     return None
 
 
+def daily_autorun_active():
+    """True while a daily run is in progress: ours, or one started by cron (fresh "running" status)."""
+    if _daily_process is not None and _daily_process.poll() is None:
+        return True
+    status = load_daily_status()
+    if status.get("status") != "running":
+        return False
+    updated = collector.parse_date_like(status.get("updatedAt"))
+    if not updated:
+        return False
+    # A crashed run leaves "running" behind; only trust recent status writes.
+    return (datetime.now(collector.timezone.utc) - updated).total_seconds() < 1800
+
+
+class BackfillGovernor:
+    """Asks the backfill to pause while higher-priority collection runs.
+
+    The Node backfill spawns its own collectors, so it cannot be queued on COLLECTOR_POOL. Instead
+    the governor keeps `pause_path` in place (touched every poll) whenever interactive or daily
+    work is queued or running, and removes it once that work has drained. The backfill checks the
+    file between dates, so it never stops in the middle of an upstream request or while holding a
+    rate-limit lock, and it ignores a file that stopped being touched (a server that went away).
+    """
+
+    def __init__(
+        self,
+        pool,
+        poll_sec=BACKFILL_YIELD_POLL_SEC,
+        daily_active=daily_autorun_active,
+        enabled=BACKFILL_YIELD,
+        pause_path=BACKFILL_PAUSE_PATH,
+    ):
+        self.pool = pool
+        self.poll_sec = poll_sec
+        self.daily_active = daily_active
+        self.enabled = enabled
+        self.pause_path = pause_path
+        self._lock = threading.Lock()
+        self._process = None
+        self._thread = None
+        self.paused = False
+        self.pauses = 0
+        self.paused_sec = 0.0
+        self._paused_at = None
+        self._paused_at_wall = None
+
+    def should_yield(self):
+        if self.pool.active(PRIORITY_INTERACTIVE) or self.pool.active(PRIORITY_DAILY):
+            return True
+        try:
+            return bool(self.daily_active())
+        except Exception:
+            return False
+
+    def attach(self, process):
+        with self._lock:
+            self._process = process
+            if self.enabled and self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="backfill-governor", daemon=True)
+                self._thread.start()
+
+    def _write_pause(self):
+        try:
+            _write_json_atomic(self.pause_path, {"pid": os.getpid(), "since": self._paused_at_wall})
+            return True
+        except OSError:
+            return False
+
+    def _clear_pause(self):
+        try:
+            os.unlink(self.pause_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        return True
+
+    def _set_paused(self, paused):
+        if paused:
+            if not self.paused:
+                self._paused_at_wall = datetime.now().isoformat()
+            # Rewritten every poll: the backfill treats a file that stopped changing as stale.
+            if not self._write_pause() or self.paused:
+                return
+            self.pauses += 1
+            self._paused_at = time.monotonic()
+            self.paused = True
+            return
+        if not self.paused or not self._clear_pause():
+            return
+        if self._paused_at is not None:
+            self.paused_sec += time.monotonic() - self._paused_at
+            self._paused_at = None
+        self.paused = False
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                process = self._process
+                if process is None or process.poll() is not None:
+                    # Nothing left to pause once the process has exited.
+                    self._set_paused(False)
+                    self._thread = None
+                    return
+                self._set_paused(self.should_yield())
+            time.sleep(self.poll_sec)
+
+    def release(self):
+        """Lift a pause (server shutdown must never leave the backfill waiting)."""
+        with self._lock:
+            self._set_paused(False)
+
+    def stats(self):
+        with self._lock:
+            process = self._process
+            paused_sec = self.paused_sec
+            if self._paused_at is not None:
+                paused_sec += time.monotonic() - self._paused_at
+            return {
+                "enabled": self.enabled,
+                "pid": process.pid if process is not None else None,
+                "running": process is not None and process.poll() is None,
+                "paused": self.paused,
+                "pauses": self.pauses,
+                "pausedSec": round(paused_sec, 1),
+            }
+
+
+BACKFILL_GOVERNOR = BackfillGovernor(COLLECTOR_POOL)
+atexit.register(BACKFILL_GOVERNOR.release)
+
+
 def launch_daily_autorun():
+    global _daily_process
     if not os.path.exists(DAILY_AUTORUN_SCRIPT):
         return False
     node = node_binary()
@@ -276,7 +2549,7 @@ def launch_daily_autorun():
     with open(log_path, "a", encoding="utf-8") as fp:
         fp.write(f"[{datetime.now().isoformat()}] schedule trigger: daily_autorun\n")
         fp.flush()
-        subprocess.Popen(
+        _daily_process = subprocess.Popen(
             [node, DAILY_AUTORUN_SCRIPT],
             cwd=APP_ROOT,
             stdout=fp,
@@ -325,84 +2598,614 @@ def launch_backfill(days=365, step=1, horizon=14, as_of=None, timeout_sec=600):
             stderr=fp,
             env=os.environ.copy(),
         )
+    BACKFILL_GOVERNOR.attach(_backfill_process)
     return {"started": True, "status": "running", "pid": _backfill_process.pid}
 
 
-def maybe_schedule_daily_autorun():
-    global _last_daily_attempt
-    now = datetime.now()
-    today = now.strftime("%Y-%m-%d")
-    hour, minute = DAILY_AUTORUN_TIME
-    if now.hour < hour or (now.hour == hour and now.minute < minute):
-        return
-    if _last_daily_attempt == today:
-        return
-    _last_daily_attempt = today
+def run_daily_autorun(today):
     status = load_daily_status()
     if status.get("date") == today and status.get("status") in ("ok", "warn", "running"):
-        return
-    launch_daily_autorun()
+        return "already-done"
+    return "launched" if launch_daily_autorun() else "unavailable"
 
 
-def start_daily_scheduler():
-    def loop():
+def prewarm_fields(min_cost=DAILY_PREWARM_MIN_COST):
+    """Outputs of today's slow sources (cost >= `min_cost`), for a fields-limited warm-up collect."""
+    fields = set()
+    for spec in collector.plan_collection(None, None)["sources"]:
+        if spec.get("fallback_for") or spec.get("when") not in (None, "today"):
+            continue
+        if spec.get("cost", 1) >= min_cost:
+            fields.update(spec["outputs"])
+    return sorted(fields)
+
+
+PREWARM_STATE = {}
+_prewarm_lock = threading.Lock()
+_prewarm_thread = None
+
+
+def _prewarm_collect(fields):
+    started = time.monotonic()
+    PREWARM_STATE.update({"status": "running", "fields": len(fields), "startedAt": datetime.now().isoformat()})
+    try:
+        # Straight collect(): no pool slot (the backfill governor stays out of it), no field index
+        # or capture writes; the point is only the upstream responses left in the disk cache.
+        collector.collect(
+            None,
+            {"probe": False, "fields": fields, "captures": None, "deadline": time.monotonic() + 600},
+        )
+        result = "warmed"
+    except Exception as exc:
+        result = f"failed: {exc}"
+    PREWARM_STATE.update({"status": "idle", "result": result, "seconds": round(time.monotonic() - started, 1)})
+
+
+def run_daily_prewarm(today):
+    """Resolve upstream hosts and warm the collector's disk cache for the slow sources in the
+    background, without persisting anything.
+
+    `today` is the scheduler's local date and only used for its bookkeeping: the collector keys
+    "today" by UTC date, so the warm-up always collects the current run.
+    """
+    global _prewarm_thread
+    dns = collector.prewarm_dns()
+    resolved = sum(1 for entry in dns.values() if entry.get("system") or entry.get("doh"))
+    with _prewarm_lock:
+        if _prewarm_thread is not None and _prewarm_thread.is_alive():
+            return f"still running: dns {resolved}/{len(dns)}"
+        fields = prewarm_fields()
+        _prewarm_thread = threading.Thread(target=_prewarm_collect, args=(fields,), name="daily-prewarm", daemon=True)
+        _prewarm_thread.start()
+    return f"started {len(fields)} fields: dns {resolved}/{len(dns)}"
+
+
+class DailyScheduler:
+    """Runs each task once per local day at its wall-clock time, catching up after downtime.
+
+    The loop sleeps until the earliest next due time (capped by `max_sleep_sec`) instead of
+    polling, and each task's last run date is kept in `state_path`, so a restart neither repeats
+    today's run nor forgets one that was missed while the server was down. A task with
+    `until=(h, m)` is only worth running before that time; past it the day is marked skipped.
+    """
+
+    def __init__(self, tasks, state_path=SCHEDULER_STATE_PATH, max_sleep_sec=SCHEDULER_MAX_SLEEP_SEC, clock=None):
+        self.tasks = [task for task in tasks if task.get("at")]
+        self.state_path = state_path
+        self.max_sleep_sec = max_sleep_sec
+        self.clock = clock or datetime.now
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._state = None
+
+    def _load(self):
+        if self._state is None:
+            try:
+                payload = _read_json(self.state_path)
+            except (OSError, ValueError):
+                payload = {}
+            self._state = payload if isinstance(payload, dict) else {}
+        return self._state
+
+    @staticmethod
+    def _at(now, clock_time):
+        return now.replace(hour=clock_time[0], minute=clock_time[1], second=0, microsecond=0)
+
+    def run_pending(self):
+        """Run every task that is due today and has not run yet; returns their names."""
+        ran = []
+        for task in sorted(self.tasks, key=lambda item: item["at"]):
+            now = self.clock()
+            today = now.strftime("%Y-%m-%d")
+            with self._lock:
+                entry = self._load().get(task["name"]) or {}
+            if entry.get("lastDate") == today or now < self._at(now, task["at"]):
+                continue
+            until = task.get("until")
+            if until and now >= self._at(now, until):
+                result = "skipped: missed window"
+            else:
+                try:
+                    result = task["run"](today)
+                except Exception as exc:
+                    result = f"failed: {exc}"
+                ran.append(task["name"])
+            with self._lock:
+                self._load()[task["name"]] = {
+                    "lastDate": today,
+                    "lastRunAt": self.clock().isoformat(timespec="seconds"),
+                    "result": result,
+                }
+                try:
+                    _write_json_atomic(self.state_path, self._state, indent=2)
+                except OSError:
+                    pass
+        return ran
+
+    def next_due(self):
+        now = self.clock()
+        today = now.strftime("%Y-%m-%d")
+        with self._lock:
+            state = dict(self._load())
+        candidates = []
+        for task in self.tasks:
+            due = self._at(now, task["at"])
+            if (state.get(task["name"]) or {}).get("lastDate") == today or due <= now:
+                due += timedelta(days=1)
+            candidates.append(due)
+        return min(candidates) if candidates else None
+
+    def seconds_until_next(self):
+        due = self.next_due()
+        if due is None:
+            return self.max_sleep_sec
+        return max(1.0, min(self.max_sleep_sec, (due - self.clock()).total_seconds()))
+
+    def _loop(self):
         while True:
             try:
-                maybe_schedule_daily_autorun()
+                self.run_pending()
             except Exception:
                 pass
-            time.sleep(60)
+            self._wake.wait(self.seconds_until_next())
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="daily-autorun-scheduler", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stats(self):
+        due = self.next_due()
+        with self._lock:
+            state = dict(self._load())
+        return {"tasks": state, "nextDueAt": due.isoformat(timespec="seconds") if due else None}
 
-    thread = threading.Thread(target=loop, name="daily-autorun-scheduler", daemon=True)
-    thread.start()
+
+def build_daily_scheduler():
+    tasks = [{"name": "daily", "at": DAILY_AUTORUN_TIME, "run": run_daily_autorun}]
+    if DAILY_PREWARM_TIME and DAILY_PREWARM_TIME < DAILY_AUTORUN_TIME:
+        tasks.append({"name": "prewarm", "at": DAILY_PREWARM_TIME, "until": DAILY_AUTORUN_TIME, "run": run_daily_prewarm})
+    return DailyScheduler(tasks)
+
+
+DAILY_SCHEDULER = build_daily_scheduler()
+
+
+def start_daily_scheduler():
+    return DAILY_SCHEDULER.start()
 
 
 class Handler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = HTTP_KEEPALIVE_TIMEOUT_SEC
+
     def __init__(self, *args, **kwargs):
+        # Per-response cache headers, consumed by end_headers(); set before the base class starts
+        # handling the request.
+        self._cache_control = None
+        self._etag = None
+        self._vary_encoding = False
+        self._accept_ranges = False
+        self._send_count = None
+        self._chunked = False
         super().__init__(*args, directory=ROOT, **kwargs)
 
     def end_headers(self):
-        if should_disable_cache(self.path):
-            self.send_header("Cache-Control", "no-store, no-cache, must-revalidate, max-age=0")
-            self.send_header("Pragma", "no-cache")
+        cache_control, self._cache_control = self._cache_control, None
+        etag, self._etag = self._etag, None
+        vary, self._vary_encoding = self._vary_encoding, False
+        if vary:
+            self.send_header("Vary", "Accept-Encoding")
+        accept_ranges, self._accept_ranges = self._accept_ranges, False
+        if accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if cache_control is None:
+            cache_control = cache_control_for(self.path)
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+            if cache_control == NO_STORE_CACHE_CONTROL:
+                self.send_header("Pragma", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
         super().end_headers()
 
-    def _send_json(self, payload, status=200):
+    def _send_not_modified(self, etag, cache_control):
+        self.send_response(304)
+        self._etag = etag
+        self._cache_control = cache_control
+        self._vary_encoding = True
+        self.end_headers()
+        return None
+
+    def _send_early_hints(self, links):
+        # Written raw: 1xx responses carry no body and must not pick up end_headers() extras.
+        try:
+            self.wfile.write(f"{self.protocol_version} 103 Early Hints\r\nLink: {links}\r\n\r\n".encode("latin-1"))
+        except OSError:
+            self.close_connection = True
+
+    def _send_bytes_head(self, body, content_type, etag, cache_control=None, encoded=False, headers=None):
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            return self._send_not_modified(etag, cache_control)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if encoded:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self._etag = etag
+        self._cache_control = cache_control
+        self._vary_encoding = True
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_head(self):
+        parsed = urlparse(self.path)
+        url_path = parsed.path
+        if url_path.endswith("/"):
+            url_path += "index.html"
+        gzip_ok = accepts_gzip(self.headers.get("Accept-Encoding"))
+        asset = ASSETS.lookup(url_path) if STATIC_CACHE_MODE == "hashed" else None
+        if asset is not None:
+            requested = (parse_qs(parsed.query).get("v") or [""])[0]
+            if url_path.endswith(".html"):
+                cache_control = NO_STORE_CACHE_CONTROL
+            elif requested == asset.version:
+                cache_control = IMMUTABLE_CACHE_CONTROL
+            else:
+                # Unversioned or outdated URL (e.g. an HTML page cached before a deploy).
+                cache_control = REVALIDATE_CACHE_CONTROL
+            headers = None
+            if asset.preload:
+                links = asset.link_header()
+                headers = {"Link": links}
+                # Only browsers navigating to the page understand 103; scripted clients such as
+                # http.client would take it for the final response.
+                if EARLY_HINTS and self.request_version == "HTTP/1.1" and self.headers.get("Sec-Fetch-Mode") == "navigate":
+                    self._send_early_hints(links)
+            encoded = gzip_ok and len(asset.body) >= GZIP_MIN_BYTES
+            body, etag = asset.gzipped() if encoded else (asset.body, asset.etag)
+            return self._send_bytes_head(body, asset.content_type, etag, cache_control, encoded, headers)
+        fs_path = self.translate_path(self.path)
+        if not os.path.isfile(fs_path):
+            return super().send_head()
+        range_header = self.headers.get("Range")
+        if range_header:
+            # Ranges are always served from the identity encoding.
+            responded, head = self._send_range_head(fs_path, range_header)
+            if responded:
+                return head
+        if not fs_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            self._accept_ranges = True
+            return super().send_head()
+        if gzip_ok and os.path.getsize(fs_path) >= GZIP_MIN_BYTES:
+            compressed = GZIP_MEMO.get(fs_path)
+            if compressed:
+                body, etag = compressed
+                return self._send_bytes_head(body, self.guess_type(fs_path), etag, encoded=True)
+        self._vary_encoding = True
+        self._accept_ranges = True
+        if url_path.endswith(".json"):
+            etag = file_etag(fs_path)
+            if etag_matches(self.headers.get("If-None-Match"), etag):
+                return self._send_not_modified(etag, None)
+            self._etag = etag
+        return super().send_head()
+
+    def _send_json(self, payload, status=200, headers=None, revalidate=False):
         body = json.dumps(payload).encode("utf-8")
+        if revalidate:
+            etag = quote_etag(hashlib.sha256(body).hexdigest())
+            if etag_matches(self.headers.get("If-None-Match"), etag):
+                self._send_not_modified(etag, None)
+                return
+            self._etag = etag
+        encoded = len(body) >= GZIP_MIN_BYTES and accepts_gzip(self.headers.get("Accept-Encoding"))
+        if encoded:
+            body = gzip_bytes(body)
         try:
             self.send_response(status)
             self.send_header("Content-Type", "application/json")
+            if encoded:
+                self.send_header("Content-Encoding", "gzip")
+            self._vary_encoding = True
             self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
             self.end_headers()
             self.wfile.write(body)
         except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            return
+
+    def _serve_events(self):
+        try:
+            subscriber = EVENTS.subscribe()
+        except TooManySubscribers:
+            self._send_json({"error": "too many event streams"}, status=503, headers={"Retry-After": "30"})
+            return
+        # The stream has no length, so it ends with the connection.
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Connection", "close")
+            self.send_header("X-Accel-Buffering", "no")
+            self.end_headers()
+            self.wfile.write(b"retry: 3000\n\n")
+            while True:
+                try:
+                    seq, name, payload = subscriber.get(timeout=EVENTS.heartbeat_sec)
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")
+                    continue
+                data = json.dumps(payload, ensure_ascii=False)
+                self.wfile.write(f"id: {seq}\nevent: {name}\ndata: {data}\n\n".encode("utf-8"))
+        except OSError:
+            pass
+        finally:
+            EVENTS.unsubscribe(subscriber)
+
+    def _write_chunk(self, data):
+        if self._chunked:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        else:
+            self.wfile.write(data)
+
+    def _stream_ai(self, prompt, model, api_key, proxies, extra=None, url=None, force=False):
+        """Relay a streaming completion as NDJSON: `delta` lines, then one `done` (or `error`) line.
+
+        Upstream is read on the AI pool; a failed write (client gone) cancels it. Cached answers
+        are replayed as a single delta without touching upstream.
+        """
+        cancel = threading.Event()
+        events = queue.Queue()
+        cache_key = ai_cache_key(model, AI_SYSTEM_PROMPT, prompt)
+        cached = None if force else AI_CACHE.lookup(cache_key)
+
+        def produce():
+            parts = []
+            try:
+                for delta in call_doubao_stream(
+                    prompt, model, api_key, proxies, AI_SYSTEM_PROMPT, url=url, cancel_event=cancel
+                ):
+                    if cancel.is_set():
+                        return
+                    parts.append(delta)
+                    events.put({"type": "delta", "text": delta})
+                text = "".join(parts)
+                AI_CACHE.put(cache_key, text)
+                events.put({"type": "done", "text": text, **(extra or {})})
+            except Exception as exc:
+                events.put({"type": "error", "error": f"ai request failed: {exc}", **(extra or {})})
+
+        if cached is not None:
+            events.put({"type": "delta", "text": cached})
+            events.put({"type": "done", "text": cached, "cached": True, **(extra or {})})
+        else:
+            AI_POOL.submit(produce)
+        self._start_ndjson()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=AI_STREAM_HEARTBEAT_SEC)
+                except queue.Empty:
+                    event = {"type": "ping"}
+                self._write_ndjson(event)
+                if event["type"] in ("done", "error"):
+                    break
+            self._end_ndjson()
+        except OSError:
+            cancel.set()
+            self.close_connection = True
+
+    def _start_ndjson(self):
+        self._chunked = self.request_version == "HTTP/1.1"
+        if not self._chunked:
+            self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        if self._chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Accel-Buffering", "no")
+        self.end_headers()
+
+    def _write_ndjson(self, event):
+        self._write_chunk((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def _end_ndjson(self):
+        if self._chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _serve_ai_batch(self, payload, model, api_key, proxies, url=None, force=False):
+        items = [
+            item for item in (payload.get("items") or [])
+            if isinstance(item, dict) and isinstance(item.get("prompt"), str)
+        ]
+        if not items or len(items) > AI_BATCH_MAX_ITEMS:
+            self._send_json({"error": f"items must hold 1-{AI_BATCH_MAX_ITEMS} prompts"}, status=400)
+            return
+        try:
+            concurrency = int(payload.get("concurrency") or AI_BATCH_CONCURRENCY)
+        except (TypeError, ValueError):
+            concurrency = AI_BATCH_CONCURRENCY
+        concurrency = max(1, min(concurrency, AI_POOL.workers, AI_BATCH_CONCURRENCY))
+
+        def complete(item):
+            prompt = item["prompt"]
+            return AI_CACHE.get_or_compute(
+                ai_cache_key(model, AI_SYSTEM_PROMPT, prompt),
+                lambda: call_doubao_pooled(prompt, model, api_key, proxies, AI_SYSTEM_PROMPT, url=url),
+                force=force,
+            )
+
+        cancel = threading.Event()
+        started = time.monotonic()
+        self._start_ndjson()
+        done = 0
+        try:
+            for event in run_ai_batch(items, complete, concurrency=concurrency, cancel_event=cancel):
+                self._write_ndjson(event)
+                if event["type"] == "item":
+                    done += 1
+            self._write_ndjson({"type": "done", "count": done, "elapsedMs": int((time.monotonic() - started) * 1000)})
+            self._end_ndjson()
+        except OSError:
+            cancel.set()
+            self.close_connection = True
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or "0")
+        return self.rfile.read(length).decode("utf-8") if length > 0 else ""
+
+    def copyfile(self, source, outputfile):
+        count, self._send_count = self._send_count, None
+        if isinstance(source, io.BufferedReader):
+            # Regular files go straight from the page cache to the socket (os.sendfile where
+            # available; socket.sendfile falls back to send() elsewhere).
+            try:
+                outputfile.flush()
+                self.connection.sendfile(source, offset=source.tell(), count=count)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
             return
+        super().copyfile(source, outputfile)
+
+    def _send_range_head(self, fs_path, range_header):
+        """Serve a single byte range of a regular file.
+
+        Returns (responded, file); when nothing was sent the caller answers with the full body.
+        """
+        try:
+            size = os.path.getsize(fs_path)
+        except OSError:
+            return False, None
+        etag = file_etag(fs_path)
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range.strip() != etag:
+            return False, None
+        try:
+            span = parse_byte_range(range_header, size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self._accept_ranges = True
+            self.end_headers()
+            return True, None
+        if span is None:
+            return False, None
+        start, end = span
+        try:
+            fp = open(fs_path, "rb")
+        except OSError:
+            return False, None
+        fp.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(fs_path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self._etag = etag
+        self._accept_ranges = True
+        self._send_count = end - start + 1
+        self.end_headers()
+        return True, fp
+
+    def _send_busy(self, exc):
+        self._send_json(
+            {"error": f"server busy: {exc.pool} queue full", "retryAfter": exc.retry_after},
+            status=503,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
 
     def do_GET(self):
         request_path = self.path.split("?", 1)[0]
         if request_path == "/data/daily-status":
-            self._send_json(load_daily_status())
+            self._send_json(load_daily_status(), revalidate=True)
             return
         if request_path == "/data/backfill-status":
-            self._send_json(load_backfill_status())
+            self._send_json(load_backfill_status(), revalidate=True)
             return
         if request_path == "/data/perf-summary":
-            self._send_json(load_perf_summary())
+            self._send_json(load_perf_summary(), revalidate=True)
             return
         if request_path == "/data/iteration-latest":
-            self._send_json(load_iteration_latest())
+            self._send_json(load_iteration_latest(), revalidate=True)
+            return
+        if request_path == "/data/auto-delta":
+            query = parse_qs(urlparse(self.path).query)
+            base_version = (query.get("base") or [""])[0].strip()
+            payload = build_snapshot_delta_response(base_version or None)
+            if payload is None:
+                self._send_json({"error": "auto snapshot unavailable"}, status=404)
+                return
+            self._send_json(payload)
+            return
+        if request_path == "/jobs":
+            self._send_json(
+                {
+                    "collector": COLLECTOR_POOL.stats(),
+                    "ai": AI_POOL.stats(),
+                    "jobs": JOBS.stats(),
+                    "backfill": BACKFILL_GOVERNOR.stats(),
+                    "scheduler": DAILY_SCHEDULER.stats(),
+                    "prewarm": dict(PREWARM_STATE),
+                }
+            )
+            return
+        if request_path.startswith("/jobs/"):
+            job = JOBS.get(request_path[len("/jobs/"):])
+            if not job:
+                self._send_json({"error": "job not found"}, status=404)
+                return
+            self._send_json(job.to_dict())
+            return
+        if request_path == "/events":
+            self._serve_events()
             return
         if request_path == "/ai/status":
             env = load_env(ENV_PATH)
             enabled = bool(env.get("DOUBAO_API_KEY") and env.get("DOUBAO_MODEL"))
-            self._send_json({"enabled": enabled})
+            self._send_json(
+                {
+                    "enabled": enabled,
+                    "cache": AI_CACHE.stats(),
+                    "httpPool": AI_HTTP_POOL.stats(),
+                    "precompute": AI_PRECOMPUTE.stats(),
+                },
+                revalidate=True,
+            )
+            return
+        if request_path == "/ai/precomputed":
+            query = parse_qs(urlparse(self.path).query)
+            date = (query.get("date") or [""])[0].strip()
+            if not re.match(r"^\d{4}-\d{2}-\d{2}$", date):
+                self._send_json({"error": "invalid date"}, status=400)
+                return
+            self._send_json(AI_PRECOMPUTE.for_date(date), revalidate=True)
             return
         return super().do_GET()
 
+    def do_DELETE(self):
+        self._read_body()
+        request_path = self.path.split("?", 1)[0]
+        if request_path.startswith("/jobs/"):
+            job = JOBS.cancel(request_path[len("/jobs/"):])
+            if not job:
+                self._send_json({"error": "job not found"}, status=404)
+                return
+            self._send_json(job.to_dict(include_result=False), status=202 if not job.finished else 200)
+            return
+        self._send_json({"error": "not found"}, status=404)
+
     def do_POST(self):
+        # Drain the body before any early return so a keep-alive connection stays in sync.
+        raw = self._read_body()
         if self.path in ("/data/history", "/data/refresh"):
-            length = int(self.headers.get("Content-Length", "0"))
-            raw = self.rfile.read(length).decode("utf-8")
             try:
                 payload = json.loads(raw)
             except json.JSONDecodeError:
@@ -415,18 +3218,61 @@ class Handler(SimpleHTTPRequestHandler):
             if self.path == "/data/history" and not date:
                 self._send_json({"error": "invalid date"}, status=400)
                 return
+            force = bool(payload.get("force"))
+            if self.path == "/data/refresh" and (payload.get("mode") or "").lower() == "swr":
+                response, refresh = build_swr_response(force=force)
+                if response is None:
+                    # Nothing persisted yet: the caller has to wait for the refresh job.
+                    if refresh.get("status") == "busy":
+                        self._send_json(refresh, status=503, headers={"Retry-After": str(refresh["retryAfter"])})
+                    else:
+                        self._send_json(refresh, status=202, headers={"Location": refresh["statusUrl"]})
+                    return
+                swr = response["swr"]
+                headers = {"X-Snapshot-Stale": "1" if swr["stale"] else "0"}
+                if swr.get("ageSec") is not None:
+                    headers["Age"] = str(swr["ageSec"])
+                self._send_json(response, headers=headers)
+                return
+            if self.path == "/data/history" and not force:
+                cached = HISTORY_CACHE.get(date)
+                if cached is not None:
+                    # Answered synchronously even for async callers: no job, no collector worker.
+                    self._send_json(cached, headers={"X-History-Cache": "hit"})
+                    return
+            if wants_async(self.headers, payload):
+                kind = self.path.rsplit("/", 1)[-1]
+                try:
+                    job, created = JOBS.submit(
+                        kind,
+                        collector_job_key(kind, date, force),
+                        collector_job(date or None, persist=self.path == "/data/refresh", force=force),
+                        params={"date": date or None},
+                        priority=PRIORITY_INTERACTIVE,
+                    )
+                except PoolSaturated as exc:
+                    self._send_busy(exc)
+                    return
+                response = job.to_dict(include_result=False)
+                response["created"] = created
+                self._send_json(response, status=202, headers={"Location": response["statusUrl"]})
+                return
             try:
-                data = run_collector(date or None)
-                if self.path == "/data/refresh":
-                    persist_auto_snapshot(data)
+                if self.path == "/data/history":
+                    data, cache_state = collect_history(date, force=force, pool=COLLECTOR_POOL)
+                    self._send_json(data, headers={"X-History-Cache": cache_state})
+                    return
+                data = COLLECTOR_POOL.run(run_collector, date or None)
+                persist_auto_snapshot(data)
                 self._send_json(data)
                 return
+            except PoolSaturated as exc:
+                self._send_busy(exc)
+                return
             except Exception as exc:
                 self._send_json({"error": f"collector error: {exc}"}, status=502)
                 return
         if self.path == "/data/backfill":
-            length = int(self.headers.get("Content-Length", "0"))
-            raw = self.rfile.read(length).decode("utf-8")
             try:
                 payload = json.loads(raw or "{}")
             except json.JSONDecodeError:
@@ -454,55 +3300,112 @@ class Handler(SimpleHTTPRequestHandler):
             except Exception as exc:
                 self._send_json({"error": f"backfill start failed: {exc}"}, status=502)
                 return
-        if self.path not in ("/ai/summary", "/ai/gate", "/ai/overall"):
-            self.send_response(404)
-            self.end_headers()
+        if self.path not in ("/ai/summary", "/ai/gate", "/ai/overall", "/ai/batch"):
+            self._send_json({"error": "not found"}, status=404)
             return
-        env = load_env(ENV_PATH)
-        api_key = env.get("DOUBAO_API_KEY")
-        model = env.get("DOUBAO_MODEL")
-        if not api_key or not model:
+        AI_PRECOMPUTE.touch()
+        settings = ai_settings(load_env(ENV_PATH))
+        if not settings:
             self._send_json({"error": "AI 未配置"}, status=400)
             return
-        length = int(self.headers.get("Content-Length", "0"))
-        raw = self.rfile.read(length).decode("utf-8")
         try:
             payload = json.loads(raw)
         except json.JSONDecodeError:
             self._send_json({"error": "invalid json"}, status=400)
             return
         try:
-            if (env.get("DOUBAO_DIRECT") or "").lower() in ("1", "true", "yes", "on"):
-                proxies = ["direct"]
-            else:
-                proxies = proxy_candidates(env)
-            system_prompt = "你是专业的金融研究助手，直接给出判断与推断，不需要风险提示或免责声明。"
-            if self.path == "/ai/summary":
-                prompt = payload.get("prompt", "")
-                summary = call_doubao(prompt, model, api_key, proxies, system_prompt)
-                self._send_json({"summary": summary})
+            api_key = settings["api_key"]
+            model = settings["model"]
+            proxies = settings["proxies"]
+            system_prompt = AI_SYSTEM_PROMPT
+            url = settings["url"]
+            prompt = payload.get("prompt", "")
+            force = bool(payload.get("force"))
+            if self.path == "/ai/batch":
+                self._serve_ai_batch(payload, model, api_key, proxies, url=url, force=force)
+                return
+            if wants_stream(self.headers, payload):
+                extra = {"id": payload.get("id")} if self.path == "/ai/gate" else None
+                self._stream_ai(prompt, model, api_key, proxies, extra=extra, url=url, force=force)
                 return
-            if self.path == "/ai/overall":
-                prompt = payload.get("prompt", "")
-                summary = call_doubao(prompt, model, api_key, proxies, system_prompt)
-                self._send_json({"summary": summary})
+            text, cache_state = AI_CACHE.get_or_compute(
+                ai_cache_key(model, system_prompt, prompt),
+                lambda: AI_POOL.run(call_doubao, prompt, model, api_key, proxies, system_prompt, url=url),
+                force=force,
+            )
+            headers = {"X-AI-Cache": cache_state}
+            if self.path in ("/ai/summary", "/ai/overall"):
+                self._send_json({"summary": text}, headers=headers)
                 return
             if self.path == "/ai/gate":
-                prompt = payload.get("prompt", "")
-                gate_id = payload.get("id")
-                text = call_doubao(prompt, model, api_key, proxies, system_prompt)
-                self._send_json({"id": gate_id, "text": text})
+                self._send_json({"id": payload.get("id"), "text": text}, headers=headers)
                 return
+        except PoolSaturated as exc:
+            self._send_busy(exc)
         except (URLError, HTTPError) as exc:
             self._send_json({"error": f"ai request failed: {exc}"}, status=502)
         except Exception as exc:
             self._send_json({"error": f"ai request failed: {exc}"}, status=502)
 
 
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles each connection on a bounded thread pool instead of inline.
+
+    Keep-alive connections and SSE streams hold a worker for their whole lifetime, so connections
+    beyond `workers` are not queued behind them: they get an immediate 503 with Retry-After.
+    """
+
+    BUSY_BODY = b'{"error": "server busy: http full"}'
+    BUSY_RESPONSE = (
+        "HTTP/1.1 503 Service Unavailable\r\n"
+        f"Retry-After: {SERVER_BUSY_RETRY_AFTER}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(BUSY_BODY)}\r\n"
+        "Connection: close\r\n"
+        "\r\n"
+    ).encode("ascii") + BUSY_BODY
+
+    def __init__(self, server_address, handler_class, workers=SERVER_REQUEST_WORKERS):
+        super().__init__(server_address, handler_class)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self._slots = threading.BoundedSemaphore(workers)
+        self.rejected = 0
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            try:
+                request.settimeout(1)
+                request.sendall(self.BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False)
+
+
 def main():
     port = int(os.environ.get("PORT", "5173"))
     start_daily_scheduler()
-    httpd = HTTPServer(("0.0.0.0", port), Handler)
+    AI_PRECOMPUTE.resume()
+    httpd = PooledHTTPServer(("0.0.0.0", port), Handler)
     print(f"Serving on http://localhost:{port}")
     httpd.serve_forever()
 
@@ -20,6 +20,9 @@ import { createEtaTimer } from "./ui/etaTimer.js";
 import { fieldMeta } from "./ui/fieldMeta.js";
 import { deriveDriftSignal } from "./ui/eval.js";
 import { parseDeepLink } from "./ui/deepLink.js";
+import { runServerJob } from "./ui/jobs.js";
+import { subscribeServerEvents } from "./ui/events.js";
+import { runAiBatch, streamAiText } from "./ui/aiStream.js";
 
 const storageKey = "eth_a_dashboard_history_v201";
 const inputKey = "eth_a_dashboard_custom_input";
@@ -400,7 +403,7 @@ function mergeHistoryRecords(seedRecords, localRecords) {
 
 async function loadSeedHistory() {
   try {
-    const response = await fetch(`${historySeedPath}?ts=${Date.now()}`);
+    const response = await fetch(historySeedPath, { cache: "no-cache" });
     if (!response.ok) return [];
     const payload = await response.json();
     if (Array.isArray(payload)) {
@@ -426,7 +429,7 @@ function normalizeSeedRecord(payload) {
 
 async function loadSeedLatest() {
   try {
-    const response = await fetch(`${latestSeedPath}?ts=${Date.now()}`, { cache: "no-store" });
+    const response = await fetch(latestSeedPath, { cache: "no-cache" });
     if (!response.ok) return null;
     const payload = await response.json();
     return normalizeSeedRecord(payload);
@@ -452,7 +455,7 @@ function normalizeAiSeed(payload) {
 
 async function loadSeedAi() {
   try {
-    const response = await fetch(`${aiSeedPath}?ts=${Date.now()}`, { cache: "no-store" });
+    const response = await fetch(aiSeedPath, { cache: "no-cache" });
     if (!response.ok) return {};
     const payload = await response.json();
     return normalizeAiSeed(payload);
@@ -476,7 +479,7 @@ function normalizeEthPriceSeed(payload) {
 
 async function loadEthPriceSeed() {
   try {
-    const response = await fetch(`${ethPriceSeedPath}?ts=${Date.now()}`, { cache: "no-store" });
+    const response = await fetch(ethPriceSeedPath, { cache: "no-cache" });
     if (!response.ok) return null;
     const payload = await response.json();
     return normalizeEthPriceSeed(payload);
@@ -503,7 +506,7 @@ function normalizePerfSummary(payload) {
 
 async function loadPerfSummary() {
   try {
-    const response = await fetch(`${perfSummaryPath}?ts=${Date.now()}`, { cache: "no-store" });
+    const response = await fetch(perfSummaryPath, { cache: "no-cache" });
     if (!response.ok) return null;
     return normalizePerfSummary(await response.json());
   } catch {
@@ -526,7 +529,7 @@ function normalizeIterationLatest(payload) {
 
 async function loadIterationLatest() {
   try {
-    const response = await fetch(`${iterationLatestPath}?ts=${Date.now()}`, { cache: "no-store" });
+    const response = await fetch(iterationLatestPath, { cache: "no-cache" });
     if (!response.ok) return null;
     return normalizeIterationLatest(await response.json());
   } catch {
@@ -573,7 +576,7 @@ function normalizeDailyStatus(payload) {
 
 async function loadDailyStatus() {
   try {
-    const response = await fetch(`${dailyStatusPath}?ts=${Date.now()}`, { cache: "no-store" });
+    const response = await fetch(dailyStatusPath, { cache: "no-cache" });
     if (!response.ok) return null;
     return normalizeDailyStatus(await response.json());
   } catch {
@@ -919,6 +922,31 @@ function buildOfflineAiState(record, payload) {
   };
 }
 
+let aiRunCount = 0;
+
+// Text the server's background queue generated for this snapshot (see AiPrecomputeQueue);
+// anything it has not reached yet keeps the offline wording.
+async function loadPrecomputedAi(record, history = []) {
+  if (!record?.date || !record.output) return null;
+  try {
+    const response = await fetch(`/ai/precomputed?date=${encodeURIComponent(record.date)}`, { cache: "no-cache" });
+    if (!response.ok) return null;
+    const precomputed = await response.json();
+    const gateTexts = new Map((precomputed?.gates || []).map((gate) => [gate.id, gate.text]));
+    if (!precomputed?.summary && !precomputed?.overall && !gateTexts.size) return null;
+    const aiState = buildOfflineAiState(record, buildAiPayload(record, history));
+    aiState.promptVersion = precomputed.promptVersion || null;
+    if (precomputed.summary) aiState.summary = precomputed.summary;
+    if (precomputed.overall) aiState.overall = precomputed.overall;
+    aiState.gates.forEach((gate) => {
+      if (gateTexts.has(gate.id)) gate.text = gateTexts.get(gate.id);
+    });
+    return aiState;
+  } catch {
+    return null;
+  }
+}
+
 async function checkAiStatus() {
   try {
     const resp = await fetch("/ai/status");
@@ -940,11 +968,14 @@ async function checkAiStatus() {
 }
 
 async function runAi(record, history = []) {
+  aiRunCount += 1;
   const payload = buildAiPayload(record, history);
   const offline = buildOfflineAiState(record, payload);
   saveAiCache(offline);
   renderAiPanel(elements.aiPanel, offline);
   applyCoverageFieldAi(offline, record.date);
+  // The panel now shows local text; drop any "pre-generated" label left from page load.
+  setAiStatus("AI 本地解读（连接检测中）");
 
   const enabled = await checkAiStatus();
   if (!enabled) {
@@ -985,17 +1016,15 @@ async function runAi(record, history = []) {
     applyCoverageFieldAi(aiState, record.date);
   };
 
-  const summaryPromise = fetch("/ai/summary", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ prompt: payload.summary.prompt }),
+  const summaryPromise = streamAiText("/ai/summary", { prompt: payload.summary.prompt }, {
+    onDelta: (text) => {
+      aiState.summary = text;
+      aiState.summaryStatus = "streaming";
+      update();
+    },
   })
-    .then((resp) => {
-      if (!resp.ok) throw new Error("summary failed");
-      return resp.json();
-    })
     .then((data) => {
-      aiState.summary = data.summary || "无";
+      aiState.summary = data.text || "无";
       aiState.summaryStatus = "done";
       update();
     })
@@ -1008,17 +1037,15 @@ async function runAi(record, history = []) {
       update();
     });
 
-  const overallPromise = fetch("/ai/overall", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ prompt: payload.overall.prompt }),
+  const overallPromise = streamAiText("/ai/overall", { prompt: payload.overall.prompt }, {
+    onDelta: (text) => {
+      aiState.overall = text;
+      aiState.overallStatus = "streaming";
+      update();
+    },
   })
-    .then((resp) => {
-      if (!resp.ok) throw new Error("overall failed");
-      return resp.json();
-    })
     .then((data) => {
-      aiState.overall = data.summary || "无";
+      aiState.overall = data.text || "无";
       aiState.overallStatus = "done";
       update();
     })
@@ -1029,6 +1056,41 @@ async function runAi(record, history = []) {
       update();
     });
 
+  const applyGateText = (id, text) => {
+    const target = aiState.gates.find((item) => item.id === id);
+    if (target) {
+      target.text = text || "无";
+      target.status = "done";
+    }
+    update();
+  };
+  const applyGateFailure = (id) => {
+    const target = aiState.gates.find((item) => item.id === id);
+    if (target) {
+      const fallbackGate = (record.output.gates || []).find((item) => item.id === id);
+      target.text = buildGateFallbackText(fallbackGate || { id });
+      target.status = "done";
+    }
+    errorCount += 1;
+    update();
+  };
+  const applyFieldText = (key, text) => {
+    const target = aiState.fields.find((item) => item.key === key);
+    if (target) {
+      target.text = text || target.text;
+      target.status = "done";
+    }
+    update();
+  };
+  const applyFieldFailure = (key) => {
+    const target = aiState.fields.find((item) => item.key === key);
+    if (target) {
+      target.status = "error";
+    }
+    errorCount += 1;
+    update();
+  };
+
   const runGateBatch = async (batch, delayMs = 0) => {
     if (delayMs) {
       await new Promise((resolve) => setTimeout(resolve, delayMs));
@@ -1044,29 +1106,46 @@ async function runAi(record, history = []) {
             if (!resp.ok) throw new Error("gate failed");
             return resp.json();
           })
-          .then((data) => {
-            const target = aiState.gates.find((item) => item.id === data.id);
-            if (target) {
-              target.text = data.text || "无";
-              target.status = "done";
-            }
-            update();
-          })
-          .catch(() => {
-            const target = aiState.gates.find((item) => item.id === gate.id);
-            if (target) {
-              const fallbackGate = (record.output.gates || []).find((item) => item.id === gate.id);
-              target.text = buildGateFallbackText(fallbackGate || { id: gate.id });
-              target.status = "done";
-            }
-            errorCount += 1;
-            update();
-          })
+          .then((data) => applyGateText(data.id, data.text))
+          .catch(() => applyGateFailure(gate.id))
       )
     );
   };
 
-  const gates = payload.gates || [];
+  // One /ai/batch request for every gate and field; the server fans out over pooled upstream
+  // connections and streams each result back. Whatever the batch did not answer (older server,
+  // dropped stream) goes through the per-item /ai/gate loops below.
+  let gates = payload.gates || [];
+  let fields = payload.fields || [];
+  try {
+    const items = [
+      ...gates.map((gate) => ({ id: `gate:${gate.id}`, prompt: gate.prompt })),
+      ...fields.map((field) => ({ id: `field:${field.key}`, prompt: field.prompt })),
+    ];
+    const missing = items.length
+      ? await runAiBatch(items, {
+          onItem: (event) => {
+            const [kind, ...rest] = String(event.id).split(":");
+            const id = rest.join(":");
+            if (kind === "gate") {
+              if (event.error) applyGateFailure(id);
+              else applyGateText(id, event.text);
+            } else if (kind === "field") {
+              if (event.error) applyFieldFailure(id);
+              else applyFieldText(id, event.text);
+            }
+          },
+        })
+      : [];
+    const missingSet = new Set(missing);
+    gates = gates.filter((gate) => missingSet.has(`gate:${gate.id}`));
+    fields = fields.filter((field) => missingSet.has(`field:${field.key}`));
+  } catch {
+    // Keep whatever was not answered yet and fall back to per-item calls.
+    gates = gates.filter((gate) => aiState.gates.find((item) => item.id === gate.id)?.status === "pending");
+    fields = fields.filter((field) => aiState.fields.find((item) => item.key === field.key)?.status === "pending");
+  }
+
   const batchSize = 4;
   for (let i = 0; i < gates.length; i += batchSize) {
     const batch = gates.slice(i, i + batchSize);
@@ -1088,27 +1167,12 @@ async function runAi(record, history = []) {
             if (!resp.ok) throw new Error("field failed");
             return resp.json();
           })
-          .then((data) => {
-            const target = aiState.fields.find((item) => item.key === data.id);
-            if (target) {
-              target.text = data.text || target.text;
-              target.status = "done";
-            }
-            update();
-          })
-          .catch(() => {
-            const target = aiState.fields.find((item) => item.key === field.key);
-            if (target) {
-              target.status = "error";
-            }
-            errorCount += 1;
-            update();
-          })
+          .then((data) => applyFieldText(data.id, data.text))
+          .catch(() => applyFieldFailure(field.key))
       )
     );
   };
 
-  const fields = payload.fields || [];
   const fieldBatchSize = 6;
   for (let i = 0; i < fields.length; i += fieldBatchSize) {
     const batch = fields.slice(i, i + fieldBatchSize);
@@ -1297,6 +1361,7 @@ let perfSummaryCache = null;
 let iterationLatestCache = null;
 let dailyStatusCache = null;
 let backfillPollTimer = null;
+let backfillActive = false;
 
 const deepLink =
   typeof window !== "undefined" && window.location
@@ -2041,26 +2106,27 @@ async function autoFetch(options = {}) {
     const wantsHistory = Boolean(targetDate && targetDate !== today);
     const readLocalAuto = !force && !wantsHistory;
 
-    let response;
+    let payload;
     if (readLocalAuto) {
-      response = await fetch(`/data/auto.json?ts=${Date.now()}`, { cache: "no-store" });
+      const response = await fetch(`/data/auto.json?ts=${Date.now()}`, { cache: "no-store" });
+      if (!response.ok) {
+        const errorPayload = await response.json().catch(() => ({}));
+        throw new Error(errorPayload.error || "实时抓取失败");
+      }
+      payload = await response.json();
     } else {
       const payloadBody = {};
       if (targetDate) payloadBody.date = targetDate;
       if (force) payloadBody.force = true;
       const endpoint = wantsHistory ? "/data/history" : "/data/refresh";
-      response = await fetch(endpoint, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payloadBody),
-        cache: "no-store",
+      // Server runs the collector as a job; polling survives dropped mobile connections.
+      payload = await runServerJob(endpoint, payloadBody, {
+        errorMessage: "实时抓取失败",
+        onProgress: (job) => {
+          if (job?.status === "queued") showSourceStatus("排队中...");
+        },
       });
     }
-    if (!response.ok) {
-      const payload = await response.json().catch(() => ({}));
-      throw new Error(payload.error || "实时抓取失败");
-    }
-    const payload = await response.json();
     const combined = buildCombinedInput(payload, templateInput);
     combined.__proxyTrace = payload.proxyTrace;
     hydrateFieldFreshness(combined, targetDate || dateKey());
@@ -2104,16 +2170,7 @@ async function autoFetch(options = {}) {
 
 async function fetchHistoryDate(targetDate) {
   try {
-    const response = await fetch("/data/history", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ date: targetDate }),
-    });
-    if (!response.ok) {
-      const payload = await response.json().catch(() => ({}));
-      throw new Error(payload.error || "历史抓取失败");
-    }
-    return await response.json();
+    return await runServerJob("/data/history", { date: targetDate }, { errorMessage: "历史抓取失败" });
   } catch (error) {
     showError([error.message || "历史抓取失败"]);
     return null;
@@ -2242,7 +2299,7 @@ function normalizeBackfillStatus(payload) {
 
 async function loadBackfillStatus() {
   try {
-    const response = await fetch(`${backfillStatusPath}?ts=${Date.now()}`, { cache: "no-store" });
+    const response = await fetch(backfillStatusPath, { cache: "no-cache" });
     if (!response.ok) return null;
     const payload = await response.json();
     return normalizeBackfillStatus(payload);
@@ -2276,22 +2333,15 @@ async function refreshHistoryFromSeed(preferredDate = null) {
   return true;
 }
 
-async function pollBackfillStatusUntilDone() {
-  const status = await loadBackfillStatus();
-  if (!status) {
-    setEvalBackfillStatus("回测状态读取失败，请稍后重试。");
-    setBackfillButtonsDisabled(false);
-    clearBackfillPollTimer();
-    return;
-  }
+async function applyBackfillStatus(status) {
   setEvalBackfillStatus(formatBackfillStatusText(status));
   if (status.status === "running") {
+    backfillActive = true;
+    setBackfillButtonsDisabled(true);
     showRunStatus("回测补齐中...");
-    backfillPollTimer = setTimeout(() => {
-      pollBackfillStatusUntilDone().catch(() => {});
-    }, 1600);
     return;
   }
+  backfillActive = false;
   clearBackfillPollTimer();
   setBackfillButtonsDisabled(false);
   if (status.status === "done" || status.status === "ok") {
@@ -2302,6 +2352,24 @@ async function pollBackfillStatusUntilDone() {
   }
 }
 
+async function pollBackfillStatusUntilDone() {
+  clearBackfillPollTimer();
+  const status = await loadBackfillStatus();
+  if (!status) {
+    setEvalBackfillStatus("回测状态读取失败，请稍后重试。");
+    setBackfillButtonsDisabled(false);
+    clearBackfillPollTimer();
+    return;
+  }
+  await applyBackfillStatus(status);
+  // While /events is connected the server pushes backfill progress, so only poll without it.
+  if (status.status === "running" && !serverEvents.isOpen()) {
+    backfillPollTimer = setTimeout(() => {
+      pollBackfillStatusUntilDone().catch(() => {});
+    }, 1600);
+  }
+}
+
 async function backfillEvaluationHistory(maturedDays = 90) {
   clearBackfillPollTimer();
   setBackfillButtonsDisabled(true);
@@ -2542,6 +2610,25 @@ renderAiStatus(elements.aiStatus, localStorage.getItem(aiStatusKey) || "AI 未
 applyCoverageFieldAi(aiCacheForDate(selectedDate), selectedDate);
 applyDailyStatusMeta(null);
 
+const serverEvents = subscribeServerEvents(
+  {
+    daily: (payload) => applyDailyStatusMeta(normalizeDailyStatus(payload)),
+    backfill: (payload) => {
+      const status = normalizeBackfillStatus(payload);
+      if (!status || (!backfillActive && status.status !== "running")) return;
+      applyBackfillStatus(status).catch(() => {});
+    },
+  },
+  {
+    onOpenChange: (open) => {
+      // Stream dropped mid-backfill: fall back to polling until it reconnects.
+      if (!open && backfillActive && !backfillPollTimer) {
+        pollBackfillStatusUntilDone().catch(() => {});
+      }
+    },
+  }
+);
+
 async function bootstrapHistoryView() {
   const local = normalizeHistoryRecords(loadHistory());
   const cached = local.length ? [] : normalizeHistoryRecords(loadCachedHistory() || []);
@@ -2587,6 +2674,16 @@ async function bootstrapHistoryView() {
       renderAiPanel(elements.aiPanel, seededAi);
       applyCoverageFieldAi(seededAi, latest.date);
       setAiStatus("AI 已预生成（日任务）");
+    } else {
+      const aiRunsBefore = aiRunCount;
+      loadPrecomputedAi(latest, history).then((precomputedAi) => {
+        // A run started meanwhile owns the panel now.
+        if (!precomputedAi || aiRunCount !== aiRunsBefore) return;
+        saveAiCache(precomputedAi);
+        renderAiPanel(elements.aiPanel, precomputedAi);
+        applyCoverageFieldAi(precomputedAi, latest.date);
+        setAiStatus("AI 已预生成（后台）");
+      });
     }
 
     // If this record comes from daily autorun, reflect the run stages/ID (otherwise it looks like "待运行").
@@ -0,0 +1,91 @@
+// Streaming clients for /ai/* endpoints. The server relays upstream tokens as NDJSON lines:
+// {"type":"delta","text":...} ... then {"type":"done","text":...} or {"type":"error",...}.
+export async function readNdjsonStream(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let stop = false;
+  const handleLine = (line) => {
+    if (stop || !line.trim()) return;
+    let event;
+    try {
+      event = JSON.parse(line);
+    } catch {
+      return;
+    }
+    if (onEvent(event) === false) stop = true;
+  };
+  while (!stop) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer);
+}
+
+function isNdjson(response) {
+  const contentType = response.headers?.get?.("Content-Type") || "";
+  return contentType.includes("ndjson") && Boolean(response.body?.getReader);
+}
+
+export async function streamAiText(endpoint, body, options = {}) {
+  const { fetchImpl = globalThis.fetch, onDelta = null, signal } = options;
+  const response = await fetchImpl(endpoint, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "application/x-ndjson" },
+    body: JSON.stringify({ ...body, stream: true }),
+    signal,
+  });
+  if (!response.ok) {
+    const errorPayload = await response.json().catch(() => ({}));
+    throw new Error(errorPayload.error || `${endpoint} failed`);
+  }
+  if (!isNdjson(response)) {
+    // Non-streaming server: plain JSON with `summary` or `text`.
+    const data = await response.json();
+    return { ...data, text: data.text ?? data.summary ?? "" };
+  }
+  let text = "";
+  let final = null;
+  await readNdjsonStream(response, (event) => {
+    if (event.type === "delta") {
+      text += event.text || "";
+      if (typeof onDelta === "function") onDelta(text, event.text || "");
+    } else if (event.type === "done" || event.type === "error") {
+      final = event;
+      return false;
+    }
+    return true;
+  });
+  if (!final) throw new Error(`${endpoint} stream ended early`);
+  if (final.type === "error") throw new Error(final.error || `${endpoint} failed`);
+  return final;
+}
+
+// POST /ai/batch: one request for many prompts; `onItem` fires per result as the server finishes
+// it ({id, text} or {id, error}, plus latencyMs). Resolves with the ids that got no result.
+export async function runAiBatch(items, options = {}) {
+  const { fetchImpl = globalThis.fetch, onItem = null, concurrency, signal } = options;
+  const response = await fetchImpl("/ai/batch", {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "application/x-ndjson" },
+    body: JSON.stringify({ items, ...(concurrency ? { concurrency } : {}) }),
+    signal,
+  });
+  if (!response.ok || !isNdjson(response)) {
+    const errorPayload = await response.json?.().catch(() => ({}));
+    throw new Error(errorPayload?.error || "/ai/batch failed");
+  }
+  const pending = new Set(items.map((item) => item.id));
+  await readNdjsonStream(response, (event) => {
+    if (event.type === "item") {
+      pending.delete(event.id);
+      if (typeof onItem === "function") onItem(event);
+    }
+    return event.type !== "done";
+  });
+  return Array.from(pending);
+}
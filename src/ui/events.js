@@ -0,0 +1,38 @@
+// Server-Sent Events from GET /events. The server pushes daily / backfill / perf / iteration /
+// auto / job updates as they change; callers keep polling only while the stream is not open.
+export function subscribeServerEvents(handlers = {}, options = {}) {
+  const { EventSourceImpl = globalThis.EventSource, url = "/events", onOpenChange = null } = options;
+  const state = { open: false };
+  if (typeof EventSourceImpl !== "function") {
+    return { isOpen: () => false, close: () => {} };
+  }
+  const setOpen = (open) => {
+    if (state.open === open) return;
+    state.open = open;
+    if (typeof onOpenChange === "function") onOpenChange(open);
+  };
+  const source = new EventSourceImpl(url);
+  source.onopen = () => setOpen(true);
+  // EventSource reconnects on its own; a 503 (too many streams) closes it for good, in which case
+  // the caller simply stays on polling.
+  source.onerror = () => setOpen(false);
+  Object.entries(handlers).forEach(([name, handler]) => {
+    if (typeof handler !== "function") return;
+    source.addEventListener(name, (event) => {
+      let payload;
+      try {
+        payload = JSON.parse(event.data);
+      } catch {
+        return;
+      }
+      handler(payload);
+    });
+  });
+  return {
+    isOpen: () => state.open,
+    close: () => {
+      source.close();
+      setOpen(false);
+    },
+  };
+}
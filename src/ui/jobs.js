@@ -0,0 +1,56 @@
+const jobPollIntervalMs = 1500;
+const jobPollTimeoutMs = 1000 * 60 * 12;
+
+function defaultSleep(ms) {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+export async function pollServerJob(job, options = {}) {
+  const {
+    fetchImpl = globalThis.fetch,
+    intervalMs = jobPollIntervalMs,
+    timeoutMs = jobPollTimeoutMs,
+    onProgress = null,
+    sleep = defaultSleep,
+  } = options;
+  const statusUrl = job?.statusUrl || `/jobs/${job?.jobId}`;
+  const deadline = Date.now() + timeoutMs;
+  let current = job;
+  while (Date.now() < deadline) {
+    if (typeof onProgress === "function") onProgress(current);
+    if (current?.status === "done") return current.result;
+    if (current?.status === "failed" || current?.status === "cancelled") {
+      throw new Error(current.error || `任务${current.status === "cancelled" ? "已取消" : "失败"}`);
+    }
+    await sleep(intervalMs);
+    let response;
+    try {
+      response = await fetchImpl(`${statusUrl}?ts=${Date.now()}`, { cache: "no-store" });
+    } catch {
+      // Mobile networks drop often; the job keeps running server-side, so just poll again.
+      continue;
+    }
+    if (response.status === 404) throw new Error("任务已过期");
+    if (!response.ok) continue;
+    current = await response.json();
+  }
+  throw new Error("任务等待超时");
+}
+
+export async function runServerJob(endpoint, body = {}, options = {}) {
+  const { fetchImpl = globalThis.fetch, errorMessage = "请求失败" } = options;
+  const response = await fetchImpl(endpoint, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Prefer: "respond-async" },
+    body: JSON.stringify({ ...body, async: true }),
+    cache: "no-store",
+  });
+  if (!response.ok) {
+    const payload = await response.json().catch(() => ({}));
+    throw new Error(payload.error || errorMessage);
+  }
+  // Older servers answer synchronously with the collector payload itself.
+  if (response.status !== 202) return response.json();
+  const job = await response.json();
+  return pollServerJob(job, { ...options, fetchImpl });
+}
@@ -1,5 +1,7 @@
+import json
 import os
 import sys
+import time
 import unittest
 import warnings
 from unittest.mock import patch, mock_open
@@ -12,6 +14,23 @@ import scripts.server as server
 
 
 class TestCollectorFetchJson(unittest.TestCase):
+    def _tmpdir(self):
+        import tempfile
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        return tmp.name
+
+    def setUp(self):
+        # Fetches that reach the real curl_fetch stamp per-host lock files and today's runs record
+        # captures; keep both out of run/.
+        limiter_dir = patch.object(collector.HOST_LIMITER, "directory", self._tmpdir())
+        limiter_dir.start()
+        self.addCleanup(limiter_dir.stop)
+        capture_dir = patch.object(collector.CAPTURES, "directory", self._tmpdir())
+        capture_dir.start()
+        self.addCleanup(capture_dir.stop)
+
     def test_fetch_json_returns_empty_on_http_error(self):
         def raise_http(*_args, **_kwargs):
             raise HTTPError("http://example.com", 400, "Bad Request", {}, None)
@@ -84,6 +103,55 @@ class TestCollectorFetchJson(unittest.TestCase):
         self.assertEqual(len(parsed), 2)
         self.assertEqual(parsed[0]["total"], -5.0)
 
+    def test_farside_flow_store_accumulates_and_serves_history(self):
+        from datetime import date, timedelta
+
+        start = date(2025, 1, 1)
+        lines = ["| Date | ETHA | FETH | Total |", "| --- | --- | --- | --- |"]
+        for offset in range(45):
+            day = (start + timedelta(days=offset)).strftime("%d %b %Y")
+            lines.append(f"| {day} | {offset} | (1.0) | {offset - 1} |")
+        lines.append("| 15 Feb 2025 | 5 | 5 | 99 |")
+        text = "\n".join(lines)
+        self.assertEqual(len(collector.parse_farside_table(text)), 46, "不应只保留最近 30 行")
+        flows = collector.parse_farside_flows(text)
+        self.assertEqual(flows[1], {"date": "2025-01-02", "total": 0.0, "components": {"ETHA": 1.0, "FETH": -1.0}, "sum": 0.0})
+
+        path = os.path.join(self._tmpdir(), "etf_flows.json")
+        store = collector.EtfFlowStore(path)
+        result = store.merge("ethereum", flows, "Farside", fetched_at="2025-02-16T08:00:00Z")
+        self.assertEqual((result["added"], result["mismatches"]), (46, ["2025-02-15"]))
+        fixed = [{"date": "2025-02-15", "total": 10.0, "components": {"ETHA": 5.0, "FETH": 5.0}, "sum": 10.0}]
+        self.assertEqual(store.merge("ethereum", fixed, "Farside")["updated"], 1, "同日期应去重并以新数据覆盖")
+        broken = [{"date": "2025-02-15", "total": 50.0, "components": {"ETHA": 5.0}, "sum": 5.0}]
+        store.merge("ethereum", broken, "Farside")
+        reopened = collector.EtfFlowStore(path)
+        self.assertEqual(reopened.window("ethereum", "2025-02-15", 1), [{"date": "2025-02-15", "total": 10.0}], "校验失败的新行不应覆盖已通过校验的行")
+        window = reopened.window("ethereum", "2025-01-10", 10)
+        self.assertEqual([row["date"] for row in window[:2]], ["2025-01-10", "2025-01-09"])
+        self.assertEqual(len(window), 10)
+        self.assertTrue(reopened.covers("ethereum", "2025-01-03"))
+        self.assertFalse(reopened.covers("ethereum", "2024-12-31"), "早于首行的日期不应命中")
+
+        with patch.object(collector, "ETF_FLOWS", reopened), \
+            patch("scripts.collector.fetch_text", side_effect=AssertionError("network")):
+            data, sources, missing, meta = collector.fetch_farside("2025-01-10")
+        self.assertEqual(missing, [])
+        self.assertEqual(data["etf1d"], 8.0)
+        self.assertEqual(data["etf5d"], sum(range(4, 9)))
+        self.assertEqual(data["etf10d"], sum(range(-1, 9)))
+        self.assertIn("local store", sources["etf1d"])
+        self.assertEqual(meta["observedAt"]["etf1d"], "2025-01-10T00:00:00Z")
+
+        btc_only = collector.EtfFlowStore(os.path.join(self._tmpdir(), "etf_flows.json"))
+        btc_only.merge("bitcoin", flows, "Farside", fetched_at="2025-02-16T08:00:00Z")
+        eth_page = "| Date | Total |\n| --- | --- |\n| 01 Feb 2025 | 3.0 |\n"
+        with patch.object(collector, "ETF_FLOWS", btc_only), \
+            patch("scripts.collector.fetch_text", return_value=eth_page):
+            data, sources, missing, meta = collector.fetch_farside("2025-01-10")
+        self.assertNotIn("bitcoin", json.dumps(sources), "ETH 覆盖缺口不应用 BTC 数据顶替")
+        self.assertIn("etf1d", missing)
+
     def test_farside_fallback_jina(self):
         cloudflare = "<title>Just a moment...</title>"
         jina_text = (
@@ -382,6 +450,1572 @@ class TestCollectorFetchJson(unittest.TestCase):
         self.assertIsNone(payload.get("data", {}).get("stablecoin30d"), "过期字段不应写入")
         self.assertIn("stablecoin30d", payload.get("missing", []), "过期字段仍应标记缺失")
 
+    def test_snapshot_delta_roundtrip(self):
+        base = {
+            "generatedAt": "2026-02-07T12:00:00Z",
+            "data": {"etf1d": 1.0, "ism": 49.0},
+            "sources": {"etf1d": "Farside", "ism": "FRED: NAPM"},
+            "missing": ["cexTvl"],
+        }
+        current = {
+            "generatedAt": "2026-02-08T12:00:00Z",
+            "data": {"etf1d": 2.0},
+            "sources": {"etf1d": "Farside", "ism": "FRED: NAPM"},
+            "missing": [],
+        }
+        delta = server.diff_snapshot(base, current)
+        self.assertEqual(delta.get("set", {}).get("data"), {"etf1d": 2.0}, "delta 只应包含变化字段")
+        self.assertNotIn("sources", delta.get("set", {}), "未变化的 section 不应出现在 delta")
+        self.assertEqual(delta.get("unset", {}).get("data"), ["ism"], "删除字段应记录在 unset")
+        self.assertEqual(server.apply_snapshot_delta(base, delta), current, "base + delta 应还原当前快照")
+
+    def test_snapshot_log_keyframes_and_reconstruct(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp, \
+            patch.object(server, "SNAPSHOT_DIR", tmp), \
+            patch.object(server, "SNAPSHOT_KEYFRAME_EVERY", 3), \
+            patch.dict(server._snapshot_cache, {}, clear=True):
+            versions = []
+            for idx in range(5):
+                payload = {"generatedAt": f"2026-02-0{idx + 1}T00:00:00Z", "data": {"etf1d": float(idx)}}
+                versions.append(server.record_snapshot(payload))
+            kinds = [entry["kind"] for entry in server._load_snapshot_index()]
+            server._snapshot_cache.clear()
+            rebuilt = server.load_snapshot(versions[4])
+        self.assertEqual(kinds, ["keyframe", "delta", "delta", "keyframe", "delta"], "应按周期写入关键帧")
+        self.assertEqual(rebuilt.get("data", {}).get("etf1d"), 4.0, "应从关键帧 + delta 还原快照")
+
+    def test_auto_delta_reuses_logged_version_until_snapshot_changes(self):
+        tmp = self._tmpdir()
+        path = os.path.join(tmp, "auto.json")
+        collector.write_json_atomic(path, {"generatedAt": "2026-02-01T00:00:00Z", "data": {"etf1d": 1.0}})
+        with patch.object(server, "SNAPSHOT_DIR", os.path.join(tmp, "snapshots")), \
+            patch.object(server, "AUTO_JSON_PATH", path), \
+            patch.object(server, "FILE_CACHE", server.FileCache()), \
+            patch.dict(server._snapshot_cache, {}, clear=True), \
+            patch.object(server, "record_snapshot", wraps=server.record_snapshot) as record:
+            first = server.build_snapshot_delta_response(None)
+            again = server.build_snapshot_delta_response(first["version"])
+            self.assertEqual(again["kind"], "unchanged")
+            self.assertEqual(record.call_count, 1, "快照未变化时不应重新哈希或写日志")
+            collector.write_json_atomic(path, {"generatedAt": "2026-02-02T00:00:00Z", "data": {"etf1d": 2.0}})
+            changed = server.build_snapshot_delta_response(first["version"])
+        self.assertEqual(record.call_count, 2, "快照变化后应记录新版本")
+        self.assertEqual(changed["kind"], "delta")
+        self.assertEqual(changed["set"]["data"], {"etf1d": 2.0})
+
+    def test_backfill_from_previous_uses_field_index(self):
+        payload = {
+            "generatedAt": "2026-02-08T12:00:00Z",
+            "targetDate": None,
+            "data": {"ism": None},
+            "sources": {},
+            "fieldObservedAt": {},
+            "fieldFetchedAt": {},
+            "fieldUpdatedAt": {},
+            "missing": ["ism"],
+            "errors": [],
+        }
+        previous = {"generatedAt": "2026-02-07T12:00:00Z", "data": {}, "missing": ["ism"]}
+        index = {}
+        collector.record_field_observation(index, "ism", 48.5, "2026-01-20T00:00:00Z", "FRED: NAPM")
+        collector.record_field_observation(index, "ism", 51.0, "2026-02-20T00:00:00Z", "FRED: NAPM")
+        filled = collector.backfill_from_previous(payload, previous, as_of_date="2026-02-08", field_index=index)
+        self.assertEqual(filled, ["ism"], "上一快照缺失时应从字段索引回填")
+        self.assertEqual(payload["data"]["ism"], 48.5, "不应使用 as-of 之后的观测值")
+        self.assertEqual(payload["fieldObservedAt"]["ism"], "2026-01-20T00:00:00Z", "应保留原始观测时间")
+        self.assertTrue(any("Field index" in item for item in payload["errors"]), "应记录索引回填")
+
+    def test_write_json_atomic_uses_per_thread_temp_files(self):
+        import threading
+
+        path = os.path.join(self._tmpdir(), "field_index.json")
+        temps = []
+        real_replace = os.replace
+        # Both writers have their temp file written before either renames it.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def record_replace(src, dst):
+            temps.append(src)
+            barrier.wait()
+            real_replace(src, dst)
+
+        with patch("os.replace", side_effect=record_replace):
+            threads = [
+                threading.Thread(target=collector.write_json_atomic, args=(path, {"n": n})) for n in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(len(set(temps)), 2, "同进程内并发写入不应共用临时文件")
+        with open(path, encoding="utf-8") as fp:
+            self.assertIn(json.load(fp)["n"], (0, 1))
+
+    def test_historical_run_does_not_touch_field_index(self):
+        path = os.path.join(self._tmpdir(), "field_index.json")
+        payload = {
+            "generatedAt": "2026-02-08T12:00:00Z",
+            "targetDate": "2025-06-01",
+            "data": {"liquidationUsd": 1.5e8},
+            "sources": {"liquidationUsd": "Coinglass"},
+            "fieldObservedAt": {},
+        }
+        collector.remember_observations(payload, path)
+        self.assertFalse(os.path.exists(path), "历史日期采集不应写入字段索引")
+        payload["targetDate"] = collector.today_key()
+        collector.remember_observations(payload, path)
+        self.assertIn("liquidationUsd", collector.load_field_index(path), "当日采集应写入字段索引")
+
+    def test_field_index_lookup_respects_half_life(self):
+        index = {}
+        collector.record_field_observation(index, "etf1d", 10.0, "2026-01-01T00:00:00Z")
+        self.assertIsNone(collector.lookup_field_index(index, "etf1d", "2026-02-08"), "过期观测不应命中")
+        for day in range(1, 15):
+            collector.record_field_observation(index, "etf1d", float(day), f"2026-02-{day:02d}T00:00:00Z")
+        self.assertEqual(len(index["etf1d"]), collector.FIELD_INDEX_DEPTH, "索引深度应有上限")
+        self.assertEqual(index["etf1d"][0]["value"], 14.0, "索引应按观测时间倒序")
+
+    def test_worker_pool_rejects_when_queue_full(self):
+        import threading
+
+        release = threading.Event()
+        pool = server.WorkerPool("test", 1, 1, retry_after=7)
+        first = pool.submit(release.wait, 5)
+        second = pool.submit(release.wait, 5)
+        with self.assertRaises(server.PoolSaturated) as ctx:
+            pool.submit(release.wait, 5)
+        self.assertEqual(ctx.exception.retry_after, 7, "拒绝时应携带 Retry-After")
+        self.assertEqual(pool.stats().get("queued"), 1, "应暴露排队深度")
+        release.set()
+        first.result(timeout=5)
+        second.result(timeout=5)
+        self.assertTrue(pool.submit(lambda: True).result(timeout=5), "释放后应恢复接收任务")
+
+    def test_priority_pool_orders_classes_and_caps_background(self):
+        import threading
+
+        release = threading.Event()
+        order = []
+        pool = server.PriorityWorkerPool("collector", 1, 8)
+        blockers = [pool.submit(release.wait, 5, priority=server.PRIORITY_BACKFILL)]
+        time.sleep(0.1)
+        queued = [
+            pool.submit(order.append, "backfill", priority=server.PRIORITY_BACKFILL),
+            pool.submit(order.append, "daily", priority=server.PRIORITY_DAILY),
+            pool.submit(order.append, "interactive", priority=server.PRIORITY_INTERACTIVE),
+        ]
+        late = pool.submit(order.append, "promoted", priority=server.PRIORITY_BACKFILL)
+        self.assertTrue(pool.promote(late, server.PRIORITY_INTERACTIVE))
+        stats = pool.stats()
+        self.assertEqual(stats["classes"]["backfill"]["queued"], 1, "应按优先级暴露排队深度")
+        self.assertEqual(stats["classes"]["interactive"]["queued"], 2)
+        release.set()
+        for future in blockers + queued + [late]:
+            future.result(timeout=5)
+        self.assertEqual(order, ["interactive", "promoted", "daily", "backfill"], "交互请求应先于日任务与回填执行")
+
+        hold = threading.Event()
+        capped = server.PriorityWorkerPool("collector", 2, 8, class_limits={server.PRIORITY_BACKFILL: 1})
+        first = capped.submit(hold.wait, 5, priority=server.PRIORITY_BACKFILL)
+        second = capped.submit(lambda: "second", priority=server.PRIORITY_BACKFILL)
+        interactive = capped.submit(lambda: "interactive")
+        self.assertEqual(interactive.result(timeout=5), "interactive", "回填达到上限时仍应留出交互槽位")
+        self.assertFalse(second.done(), "回填类不应超过并发上限")
+        hold.set()
+        self.assertEqual(second.result(timeout=5), "second")
+        first.result(timeout=5)
+        self.assertGreaterEqual(capped.stats()["classes"]["backfill"]["maxWaitMs"], 0)
+
+    def test_backfill_governor_requests_cooperative_pause_for_interactive_work(self):
+        import subprocess
+        import threading
+
+        import scripts.backfill_parallel as backfill_parallel
+
+        def wait_for(predicate, timeout=5):
+            deadline = time.time() + timeout
+            while not predicate() and time.time() < deadline:
+                time.sleep(0.02)
+            return predicate()
+
+        pause_path = os.path.join(self._tmpdir(), "backfill.pause")
+        pool = server.PriorityWorkerPool("collector", 2, 4)
+        governor = server.BackfillGovernor(
+            pool, poll_sec=0.02, daily_active=lambda: False, enabled=True, pause_path=pause_path
+        )
+        process = subprocess.Popen(["sleep", "30"])
+        release = threading.Event()
+        try:
+            governor.attach(process)
+            future = pool.submit(release.wait, 5)
+            self.assertTrue(wait_for(lambda: os.path.exists(pause_path)), "交互采集进行时应请求回填暂停")
+            self.assertTrue(governor.stats()["paused"])
+            with open(f"/proc/{process.pid}/stat", "r") as fp:
+                self.assertNotEqual(fp.read().rsplit(")", 1)[1].split()[0], "T", "不应再用 SIGSTOP 冻结进程")
+            waited = []
+            waiter = threading.Thread(
+                target=lambda: waited.append(backfill_parallel.wait_while_paused(pause_path, poll_sec=0.02))
+            )
+            waiter.start()
+            time.sleep(0.1)
+            self.assertTrue(waiter.is_alive(), "回填应在日期之间等待暂停解除")
+            release.set()
+            future.result(timeout=5)
+            self.assertTrue(wait_for(lambda: not os.path.exists(pause_path)), "交互采集结束后应解除暂停")
+            waiter.join(5)
+            self.assertGreaterEqual(waited[0], 0.1)
+            self.assertEqual(governor.stats()["pauses"], 1)
+        finally:
+            release.set()
+            governor.release()
+            process.kill()
+            process.wait()
+        with open(pause_path, "w") as fp:
+            fp.write("{}")
+        os.utime(pause_path, (time.time() - 120, time.time() - 120))
+        self.assertLess(backfill_parallel.wait_while_paused(pause_path, stale_sec=30), 0.1, "过期的暂停文件应忽略")
+
+    def test_http_server_rejects_connections_when_workers_are_held(self):
+        import http.client
+        import socket
+        import threading
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=4)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        port = httpd.server_address[1]
+        # Idle connections stand in for keep-alive clients and SSE streams holding every worker.
+        held = [socket.create_connection(("127.0.0.1", port), timeout=5) for _ in range(4)]
+        try:
+            time.sleep(0.2)
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/data/daily-status")
+            resp = conn.getresponse()
+            body = json.loads(resp.read())
+            conn.close()
+            self.assertEqual(resp.status, 503, "worker 占满时新连接应立即得到 503")
+            self.assertEqual(resp.getheader("Retry-After"), str(server.SERVER_BUSY_RETRY_AFTER))
+            self.assertIn("server busy", body["error"])
+            self.assertEqual(httpd.rejected, 1)
+            held.pop().close()
+            time.sleep(0.2)
+            with patch.object(server, "load_daily_status", return_value={"status": "ok"}):
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/data/daily-status")
+                resp = conn.getresponse()
+                resp.read()
+                conn.close()
+            self.assertEqual(resp.status, 200, "释放 worker 后应恢复服务")
+        finally:
+            for sock in held:
+                sock.close()
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_slow_collector_does_not_block_status(self):
+        import http.client
+        import threading
+
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_collector(_date=None, **_kwargs):
+            started.set()
+            release.wait(5)
+            return {"data": {}}
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=4)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        port = httpd.server_address[1]
+
+        def post_refresh(results):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("POST", "/data/history", body='{"date": "2026-02-01"}')
+            results.append(conn.getresponse().status)
+            conn.close()
+
+        try:
+            with patch.object(server, "COLLECTOR_POOL", server.WorkerPool("collector", 1, 0, retry_after=9)), \
+                patch.object(server, "HISTORY_CACHE", server.HistoryCache(root=self._tmpdir())), \
+                patch.object(server, "run_collector", slow_collector), \
+                patch.object(server, "load_daily_status", return_value={"status": "ok"}):
+                results = []
+                worker = threading.Thread(target=post_refresh, args=(results,))
+                worker.start()
+                self.assertTrue(started.wait(5), "第一个采集请求应已开始")
+
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/data/daily-status")
+                status_resp = conn.getresponse()
+                status_resp.read()
+                self.assertEqual(status_resp.status, 200, "慢请求运行时状态接口仍应可用")
+                conn.close()
+
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("POST", "/data/history", body='{"date": "2026-02-02"}')
+                busy = conn.getresponse()
+                busy.read()
+                self.assertEqual(busy.status, 503, "慢队列满时应返回 503")
+                self.assertEqual(busy.getheader("Retry-After"), "9", "503 应携带 Retry-After")
+                conn.close()
+
+                release.set()
+                worker.join(5)
+                self.assertEqual(results, [200], "第一个采集请求应正常完成")
+        finally:
+            release.set()
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_job_manager_dedupes_and_cancels(self):
+        import threading
+
+        release = threading.Event()
+        manager = server.JobManager(server.WorkerPool("jobs", 1, 2), ttl_sec=60)
+
+        def blocking(job):
+            while not release.wait(0.05):
+                if job.cancel_event.is_set():
+                    raise server.JobCancelled("cancelled")
+            return {"ok": True}
+
+        first, created = manager.submit("history", "history:2026-02-01", blocking)
+        again, created_again = manager.submit("history", "history:2026-02-01", blocking)
+        self.assertTrue(created, "首次提交应创建任务")
+        self.assertFalse(created_again, "相同的排队任务应复用")
+        self.assertIs(first, again, "相同请求应挂到同一任务")
+
+        other, _ = manager.submit("history", "history:2026-02-02", blocking)
+        manager.cancel(other.id)
+        manager.cancel(first.id)
+        self.assertTrue(first.done_event.wait(5), "运行中的任务应可取消")
+        self.assertTrue(other.done_event.wait(5), "排队中的任务应可取消")
+        self.assertEqual(first.status, "cancelled")
+        self.assertEqual(other.status, "cancelled")
+
+        release.set()
+        self.assertEqual(server.collector_job_key("history", "2026-02-01"), "history:2026-02-01")
+        self.assertEqual(server.collector_job_key("refresh", None), "refresh:")
+        self.assertNotEqual(
+            server.collector_job_key("history", "2026-02-01", force=True),
+            server.collector_job_key("history", "2026-02-01"),
+            "强制刷新不应挂到未强制的任务上",
+        )
+        done, _ = manager.submit("history", "history:2026-02-01", blocking)
+        self.assertTrue(done.done_event.wait(5))
+        self.assertEqual(manager.get(done.id).to_dict().get("result"), {"ok": True}, "完成后应可查询结果")
+
+    def test_async_history_request_returns_job(self):
+        import http.client
+        import threading
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=4)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        port = httpd.server_address[1]
+        manager = server.JobManager(server.WorkerPool("collector", 1, 2), ttl_sec=60)
+        try:
+            with patch.object(server, "JOBS", manager), \
+                patch.object(server, "HISTORY_CACHE", server.HistoryCache(root=self._tmpdir())), \
+                patch.object(server, "run_collector", return_value={"targetDate": "2026-02-01"}):
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("POST", "/data/history", body='{"date": "2026-02-01", "async": true}')
+                resp = conn.getresponse()
+                accepted = json.loads(resp.read())
+                conn.close()
+                self.assertEqual(resp.status, 202, "异步请求应立即返回 202")
+                self.assertTrue(accepted.get("jobId"), "应返回 jobId")
+                manager.get(accepted["jobId"]).done_event.wait(5)
+
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", accepted["statusUrl"])
+                resp = conn.getresponse()
+                status = json.loads(resp.read())
+                conn.close()
+            self.assertEqual(status.get("status"), "done")
+            self.assertEqual(status.get("result", {}).get("targetDate"), "2026-02-01", "任务结果应可通过 /jobs/<id> 读取")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_swr_refresh_serves_snapshot_and_attaches_job(self):
+        import os
+        import threading
+
+        release = threading.Event()
+        path = os.path.join(self._tmpdir(), "auto.json")
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(
+                {
+                    "generatedAt": "2026-02-10T00:00:00Z",
+                    "data": {"dxy": 100, "etfFlow": 1, "rsi": 50},
+                    "fieldObservedAt": {
+                        "dxy": "2026-02-09T00:00:00Z",
+                        "etfFlow": "2026-01-20T00:00:00Z",
+                        "rsi": "2026-02-01T00:00:00Z",
+                    },
+                },
+                fp,
+            )
+
+        def blocking_job(_date, persist, force=False):
+            def run(job):
+                release.wait(5)
+                return {"ok": True}
+            return run
+
+        with open(path, encoding="utf-8") as fp:
+            snapshot = json.load(fp)
+        staleness = server.snapshot_staleness(snapshot, now=collector.parse_date_like("2026-02-10T01:00:00Z"))
+        self.assertEqual(staleness.get("ageSec"), 3600, "应给出快照年龄")
+        self.assertIn("etfFlow", staleness.get("staleFields"), "超过两倍半衰期的字段应标记 stale")
+        self.assertNotIn("dxy", staleness.get("staleFields"), "新鲜字段不应标记 stale")
+
+        manager = server.JobManager(server.WorkerPool("collector", 1, 2), ttl_sec=60)
+        try:
+            with patch.object(server, "AUTO_JSON_PATH", path), \
+                patch.object(server, "JOBS", manager), \
+                patch.object(server, "collector_job", blocking_job):
+                first, refresh = server.build_swr_response()
+                second, again = server.build_swr_response()
+            self.assertEqual(first.get("data", {}).get("dxy"), 100, "应立即返回上次快照")
+            self.assertTrue(first.get("swr", {}).get("stale"), "应标记快照存在过期字段")
+            self.assertTrue(refresh.get("jobId"), "应返回后台刷新任务")
+            self.assertEqual(again.get("jobId"), refresh.get("jobId"), "刷新进行中时应挂到同一任务")
+            self.assertFalse(again.get("created"))
+        finally:
+            release.set()
+
+    def test_asset_manifest_versions_follow_imports(self):
+        import os
+
+        root = self._tmpdir()
+        os.makedirs(os.path.join(root, "ui"))
+        files = {
+            "app.js": 'import {\n  render,\n} from "./ui/render.js";\nrender();\n',
+            "ui/render.js": 'import { fmt } from "../utils.js?v=old";\nexport const render = () => fmt();\n',
+            "utils.js": "export const fmt = () => 1;\n",
+            "index.html": '<a href="#top">x</a><script type="module" src="app.js?v=20260219-1"></script>',
+        }
+        for name, body in files.items():
+            with open(os.path.join(root, name), "w", encoding="utf-8") as fp:
+                fp.write(body)
+        manifest = server.AssetManifest(root=root, scan_interval=0)
+        before = manifest.versions()
+        app = manifest.lookup("/app.js").body.decode("utf-8")
+        self.assertIn(f'"./ui/render.js?v={before["/ui/render.js"]}"', app, "多行 import 也应改写为带版本的 URL")
+        render = manifest.lookup("/ui/render.js").body.decode("utf-8")
+        self.assertIn(f'"../utils.js?v={before["/utils.js"]}"', render, "旧的手写版本号应替换为内容哈希")
+        html = manifest.lookup("/index.html").body.decode("utf-8")
+        self.assertIn(f'src="app.js?v={before["/app.js"]}"', html, "入口 HTML 应引用带哈希的 app.js")
+        self.assertIn('href="#top"', html, "锚点不应被改写")
+        self.assertEqual(
+            [url.split("?")[0] for url in manifest.lookup("/index.html").preload],
+            ["/app.js", "/ui/render.js", "/utils.js"],
+            "入口 HTML 应预加载整个模块依赖图",
+        )
+
+        with open(os.path.join(root, "utils.js"), "w", encoding="utf-8") as fp:
+            fp.write("export const fmt = () => 2;\n")
+        os.utime(os.path.join(root, "utils.js"), ns=(1, 1))
+        after = manifest.versions()
+        for url in ("/utils.js", "/ui/render.js", "/app.js"):
+            self.assertNotEqual(before[url], after[url], f"{url} 的版本应随依赖变化")
+
+    def test_hashed_static_cache_headers(self):
+        import http.client
+        import socket
+        import threading
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        port = httpd.server_address[1]
+
+        def get(path, headers=None):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", path, headers=headers or {})
+            resp = conn.getresponse()
+            body = resp.read()
+            conn.close()
+            return resp, body
+
+        try:
+            with patch.object(server, "STATIC_CACHE_MODE", "hashed"):
+                version = server.ASSETS.versions()["/app.js"]
+                resp, body = get("/")
+                self.assertIn("no-store", resp.getheader("Cache-Control"), "入口 HTML 仍应禁止缓存")
+                self.assertIn(f"app.js?v={version}".encode(), body)
+                self.assertIn(f"</app.js?v={version}>; rel=modulepreload", resp.getheader("Link"), "应带 modulepreload Link 头")
+                self.assertIn(b'<link rel="modulepreload" href="/ui/render.js?v=', body)
+                with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+                    sock.sendall(b"GET / HTTP/1.1\r\nHost: x\r\nSec-Fetch-Mode: navigate\r\nConnection: close\r\n\r\n")
+                    raw = b""
+                    while b"HTTP/1.1 200" not in raw:
+                        chunk = sock.recv(65536)
+                        if not chunk:
+                            break
+                        raw += chunk
+                self.assertTrue(raw.startswith(b"HTTP/1.1 103 Early Hints\r\nLink: </app.js"), "浏览器导航应先收到 103")
+                resp, _ = get(f"/app.js?v={version}")
+                self.assertIn("immutable", resp.getheader("Cache-Control"), "带哈希的模块应长期缓存")
+                resp, _ = get("/app.js")
+                self.assertEqual(resp.getheader("Cache-Control"), "no-cache", "无版本的模块应每次验证")
+                resp, _ = get("/data/ai.seed.json")
+                etag = resp.getheader("ETag")
+                self.assertTrue(etag, "数据 JSON 应带强 ETag")
+                resp, body = get("/data/ai.seed.json", {"If-None-Match": etag})
+                self.assertEqual(resp.status, 304, "ETag 命中应返回 304")
+                self.assertEqual(body, b"")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_gzip_negotiation_and_precompressed_sibling(self):
+        import gzip
+        import os
+
+        self.assertTrue(server.accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(server.accepts_gzip("*"))
+        self.assertFalse(server.accepts_gzip("gzip;q=0, *"), "显式 q=0 应拒绝 gzip")
+        self.assertFalse(server.accepts_gzip(""), "未声明时不压缩")
+
+        path = os.path.join(self._tmpdir(), "seed.json")
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(json.dumps({"history": [{"v": 1}] * 200}))
+        memo = server.GzipMemo(max_bytes=1 << 20)
+        body, etag = memo.get(path)
+        self.assertEqual(json.loads(gzip.decompress(body)), {"history": [{"v": 1}] * 200})
+        self.assertEqual(memo.get(path), (body, etag), "未修改时应命中内存缓存")
+
+        with open(path + ".gz", "wb") as fp:
+            fp.write(gzip.compress(b'{"precompressed": true}'))
+        os.utime(path + ".gz", ns=(os.stat(path).st_mtime_ns + 10, os.stat(path).st_mtime_ns + 10))
+        os.utime(path, ns=(os.stat(path).st_mtime_ns + 5, os.stat(path).st_mtime_ns + 5))
+        body, _ = memo.get(path)
+        self.assertEqual(json.loads(gzip.decompress(body)), {"precompressed": True}, "较新的 .gz 副本应直接使用")
+        os.utime(path, ns=(os.stat(path + ".gz").st_mtime_ns + 10, os.stat(path + ".gz").st_mtime_ns + 10))
+        body, _ = memo.get(path)
+        self.assertIn("history", json.loads(gzip.decompress(body)), "源文件更新后应忽略过期的 .gz 副本")
+
+    def test_gzip_responses_over_http(self):
+        import gzip
+        import http.client
+        import threading
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        port = httpd.server_address[1]
+
+        def get(path, headers=None):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", path, headers=headers or {})
+            resp = conn.getresponse()
+            body = resp.read()
+            conn.close()
+            return resp, body
+
+        big_status = {"status": "ok", "log": ["x" * 40] * 100}
+        try:
+            with patch.object(server, "load_daily_status", return_value=big_status):
+                resp, body = get("/data/ai.seed.json", {"Accept-Encoding": "gzip"})
+                self.assertEqual(resp.getheader("Content-Encoding"), "gzip", "静态 JSON 应按协商压缩")
+                self.assertEqual(resp.getheader("Vary"), "Accept-Encoding")
+                with open(server.os.path.join(server.ROOT, "data", "ai.seed.json"), "rb") as fp:
+                    self.assertEqual(gzip.decompress(body), fp.read())
+                resp, body = get("/data/ai.seed.json")
+                self.assertIsNone(resp.getheader("Content-Encoding"), "未声明 gzip 时应返回原文")
+                resp, body = get("/data/daily-status", {"Accept-Encoding": "gzip"})
+                self.assertEqual(resp.getheader("Content-Encoding"), "gzip", "较大的 JSON 接口响应应压缩")
+                self.assertEqual(json.loads(gzip.decompress(body)), big_status)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_keep_alive_and_byte_ranges(self):
+        import http.client
+        import threading
+
+        self.assertEqual(server.parse_byte_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(server.parse_byte_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(server.parse_byte_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(server.parse_byte_range("bytes=50-500", 100), (50, 99), "结束位置应截断到文件末尾")
+        self.assertIsNone(server.parse_byte_range("bytes=0-1,5-6", 100), "多段 Range 按整文件返回")
+        with self.assertRaises(ValueError):
+            server.parse_byte_range("bytes=100-", 100)
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        port = httpd.server_address[1]
+        with open(server.os.path.join(server.ROOT, "data", "ai.seed.json"), "rb") as fp:
+            seed = fp.read()
+        try:
+            with patch.object(server, "load_daily_status", return_value={"status": "ok"}):
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/data/ai.seed.json")
+                resp = conn.getresponse()
+                body = resp.read()
+                sock = conn.sock
+                self.assertEqual(resp.version, 11, "应使用 HTTP/1.1")
+                self.assertEqual(body, seed, "sendfile 输出应与文件一致")
+                self.assertEqual(resp.getheader("Accept-Ranges"), "bytes")
+
+                conn.request("POST", "/nope", body='{"x": 1}')
+                resp = conn.getresponse()
+                self.assertEqual(resp.status, 404)
+                self.assertTrue(resp.getheader("Content-Length"), "404 也应带 Content-Length")
+                resp.read()
+
+                conn.request("GET", "/data/ai.seed.json", headers={"Range": "bytes=10-19"})
+                resp = conn.getresponse()
+                self.assertEqual(resp.status, 206)
+                self.assertEqual(resp.getheader("Content-Range"), f"bytes 10-19/{len(seed)}")
+                self.assertEqual(resp.read(), seed[10:20])
+
+                conn.request("GET", "/data/ai.seed.json", headers={"Range": "bytes=-16", "Accept-Encoding": "gzip"})
+                resp = conn.getresponse()
+                self.assertEqual(resp.status, 206, "Range 请求应返回原始字节区间")
+                self.assertEqual(resp.read(), seed[-16:])
+
+                conn.request("GET", "/data/ai.seed.json", headers={"Range": f"bytes={len(seed) + 10}-"})
+                resp = conn.getresponse()
+                resp.read()
+                self.assertEqual(resp.status, 416)
+
+                conn.request("GET", "/data/daily-status")
+                resp = conn.getresponse()
+                self.assertEqual(json.loads(resp.read()), {"status": "ok"})
+                self.assertIs(conn.sock, sock, "多个请求应复用同一连接")
+                conn.close()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_event_hub_publishes_status_changes(self):
+        import http.client
+        import os
+        import threading
+
+        run_root = self._tmpdir()
+        status_path = os.path.join(run_root, "backfill_status.json")
+        with open(status_path, "w", encoding="utf-8") as fp:
+            json.dump({"status": "running", "processed": 1, "total": 10}, fp)
+        hub = server.EventHub(poll_sec=0.05, heartbeat_sec=1, max_subscribers=1)
+        with patch.object(server, "RUN_ROOT", run_root), \
+            patch.object(server, "AUTO_JSON_PATH", os.path.join(run_root, "auto.json")):
+            subscriber = hub.subscribe()
+            initial = {}
+            while not subscriber.empty():
+                _seq, name, payload = subscriber.get_nowait()
+                initial[name] = payload
+            self.assertEqual(initial["backfill"].get("processed"), 1, "订阅时应先推送当前状态")
+            self.assertEqual(initial["auto"].get("status"), "missing")
+            with self.assertRaises(server.TooManySubscribers):
+                hub.subscribe()
+
+            with open(status_path, "w", encoding="utf-8") as fp:
+                json.dump({"status": "running", "processed": 7, "total": 10}, fp)
+            os.utime(status_path, ns=(1, 1))
+            _seq, name, payload = subscriber.get(timeout=5)
+            self.assertEqual((name, payload.get("processed")), ("backfill", 7), "文件变化后应推送新状态")
+            hub.publish("job", {"jobId": "x"})
+            self.assertEqual(subscriber.get(timeout=5)[1], "job")
+            hub.unsubscribe(subscriber)
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        stream_hub = server.EventHub(
+            sources={"daily": (lambda: 1, lambda: {"status": "ok"})}, poll_sec=0.05, heartbeat_sec=1
+        )
+        try:
+            with patch.object(server, "EVENTS", stream_hub):
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                conn.request("GET", "/events")
+                resp = conn.getresponse()
+                self.assertEqual(resp.getheader("Content-Type"), "text/event-stream; charset=utf-8")
+                lines = [resp.fp.readline() for _ in range(5)]
+                self.assertIn(b"event: daily\n", lines, "SSE 流应推送 daily 事件")
+                self.assertIn(b'data: {"status": "ok"}\n', lines)
+                conn.close()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_file_cache_skips_reads_until_file_changes(self):
+        import http.client
+        import os
+        import threading
+
+        run_root = self._tmpdir()
+        status_path = os.path.join(run_root, "daily_status.json")
+        env_path = os.path.join(run_root, ".env")
+        with open(status_path, "w", encoding="utf-8") as fp:
+            json.dump({"status": "ok", "date": "2026-02-01"}, fp)
+        with open(env_path, "w", encoding="utf-8") as fp:
+            fp.write("DOUBAO_API_KEY=k\nDOUBAO_MODEL=m\n")
+        with patch.object(server, "RUN_ROOT", run_root), patch.object(server, "FILE_CACHE", server.FileCache()):
+            self.assertEqual(server.load_daily_status().get("date"), "2026-02-01")
+            self.assertEqual(server.load_env(env_path).get("DOUBAO_MODEL"), "m")
+            with patch("builtins.open", side_effect=AssertionError("should not read")):
+                self.assertEqual(server.load_daily_status().get("date"), "2026-02-01", "文件未变化时不应重新读取")
+                self.assertEqual(server.load_env(env_path).get("DOUBAO_API_KEY"), "k", ".env 未变化时不应重新读取")
+            server.load_daily_status()["date"] = "mutated"
+            self.assertEqual(server.load_daily_status().get("date"), "2026-02-01", "调用方修改不应污染缓存")
+            with open(status_path, "w", encoding="utf-8") as fp:
+                json.dump({"status": "running", "date": "2026-02-02"}, fp)
+            os.utime(status_path, ns=(1, 1))
+            self.assertEqual(server.load_daily_status().get("date"), "2026-02-02", "mtime 变化后应重新读取")
+
+            httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+            thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+            thread.start()
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                conn.request("GET", "/data/daily-status")
+                resp = conn.getresponse()
+                resp.read()
+                etag = resp.getheader("ETag")
+                self.assertTrue(etag, "状态接口应带 ETag")
+                conn.request("GET", "/data/daily-status", headers={"If-None-Match": etag})
+                resp = conn.getresponse()
+                self.assertEqual(resp.status, 304, "状态未变化时应返回 304")
+                self.assertEqual(resp.read(), b"")
+                conn.close()
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+    def _start_fake_doubao(self, chunks, delay=0.0, record=None):
+        """Local stand-in for the chat completions endpoint; streams `chunks` as SSE when asked to."""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class FakeDoubao(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                return
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                if record is not None:
+                    record.append(body)
+                if not body.get("stream"):
+                    payload = json.dumps({"choices": [{"message": {"content": "".join(chunks)}}]}).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                sent = 0
+                try:
+                    for chunk in chunks:
+                        event = {"choices": [{"delta": {"content": chunk}}]}
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                        self.wfile.flush()
+                        sent += 1
+                        time.sleep(delay)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except OSError:
+                    pass
+                finally:
+                    self.server.sent = sent
+
+        upstream = ThreadingHTTPServer(("127.0.0.1", 0), FakeDoubao)
+        upstream.daemon_threads = True
+        upstream.sent = None
+        threading.Thread(target=upstream.serve_forever, daemon=True).start()
+        return upstream
+
+    def test_ai_stream_relays_upstream_tokens(self):
+        import http.client
+        import threading
+
+        record = []
+        upstream = self._start_fake_doubao(["以太", "坊", "偏多"], record=record)
+        url = f"http://127.0.0.1:{upstream.server_address[1]}/chat"
+        deltas = list(server.call_doubao_stream("p", "m", "k", ["direct"], "sys", url=url))
+        self.assertEqual(deltas, ["以太", "坊", "偏多"], "应解析 SSE data 行直到 [DONE]")
+        self.assertTrue(record[-1].get("stream"), "上游请求应带 stream: true")
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        env = {"DOUBAO_API_KEY": "k", "DOUBAO_MODEL": "m", "DOUBAO_DIRECT": "1", "DOUBAO_API_URL": url}
+        try:
+            with patch.object(server, "load_env", return_value=env), \
+                patch.object(server, "AI_CACHE", server.AiCache(root=self._tmpdir())):
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                conn.request("POST", "/ai/gate", body=json.dumps({"id": "G1", "prompt": "p", "stream": True}))
+                resp = conn.getresponse()
+                self.assertEqual(resp.getheader("Transfer-Encoding"), "chunked")
+                events = [json.loads(line) for line in resp.read().decode().splitlines()]
+                self.assertEqual([e["text"] for e in events if e["type"] == "delta"], ["以太", "坊", "偏多"])
+                self.assertEqual(events[-1], {"type": "done", "text": "以太坊偏多", "id": "G1"})
+                conn.request("POST", "/ai/summary", body=json.dumps({"prompt": "p"}))
+                resp = conn.getresponse()
+                self.assertEqual(json.loads(resp.read()), {"summary": "以太坊偏多"}, "非流式请求保持原行为")
+                conn.close()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            upstream.shutdown()
+            upstream.server_close()
+
+    def test_ai_stream_cancels_upstream_when_client_leaves(self):
+        import socket
+        import threading
+
+        upstream = self._start_fake_doubao(["x"] * 200, delay=0.02)
+        url = f"http://127.0.0.1:{upstream.server_address[1]}/chat"
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        env = {"DOUBAO_API_KEY": "k", "DOUBAO_MODEL": "m", "DOUBAO_DIRECT": "1", "DOUBAO_API_URL": url}
+        try:
+            with patch.object(server, "load_env", return_value=env), \
+                patch.object(server, "AI_CACHE", server.AiCache(root=self._tmpdir())):
+                body = json.dumps({"prompt": "p", "stream": True}).encode()
+                with socket.create_connection(("127.0.0.1", httpd.server_address[1]), timeout=5) as sock:
+                    sock.sendall(
+                        b"POST /ai/summary HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+                    )
+                    received = b""
+                    while b'"delta"' not in received:
+                        received += sock.recv(4096)
+                deadline = time.time() + 5
+                while upstream.sent is None and time.time() < deadline:
+                    time.sleep(0.05)
+            self.assertIsNotNone(upstream.sent, "客户端断开后应关闭上游连接")
+            self.assertLess(upstream.sent, 200, "客户端断开后不应继续读完上游")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            upstream.shutdown()
+            upstream.server_close()
+
+    def test_ai_batch_fans_out_over_pooled_connections(self):
+        import http.client
+        import threading
+
+        record = []
+        upstream = self._start_fake_doubao(["批量", "解读"], delay=0.0, record=record)
+        url = f"http://127.0.0.1:{upstream.server_address[1]}/chat"
+        env = {"DOUBAO_API_KEY": "k", "DOUBAO_MODEL": "m", "DOUBAO_DIRECT": "1", "DOUBAO_API_URL": url}
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        pool = server.HttpConnectionPool(max_idle=4)
+        items = [{"id": f"G{index}", "prompt": f"gate {index}"} for index in range(6)]
+        try:
+            with patch.object(server, "load_env", return_value=env), \
+                patch.object(server, "AI_CACHE", server.AiCache(root=self._tmpdir())), \
+                patch.object(server, "AI_HTTP_POOL", pool):
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+                conn.request("POST", "/ai/batch", body=json.dumps({"items": items, "concurrency": 2}))
+                resp = conn.getresponse()
+                self.assertEqual(resp.getheader("Transfer-Encoding"), "chunked")
+                events = [json.loads(line) for line in resp.read().decode().splitlines()]
+                conn.request("POST", "/ai/batch", body=json.dumps({"items": []}))
+                empty = conn.getresponse()
+                empty.read()
+                conn.request("POST", "/ai/batch", body=json.dumps({"items": items[:2]}))
+                cached = [json.loads(line) for line in conn.getresponse().read().decode().splitlines()]
+                conn.close()
+            results = [event for event in events if event["type"] == "item"]
+            self.assertEqual(sorted(event["id"] for event in results), [item["id"] for item in items], "每个条目应返回一行")
+            self.assertTrue(all(event["text"] == "批量解读" and "latencyMs" in event for event in results))
+            self.assertEqual(events[-1]["type"], "done")
+            self.assertEqual(events[-1]["count"], len(items))
+            self.assertEqual(len(record), len(items))
+            self.assertGreater(pool.stats()["reused"], 0, "上游连接应被复用")
+            self.assertEqual(empty.status, 400, "空批次应返回 400")
+            self.assertEqual([event.get("cache") for event in cached if event["type"] == "item"], ["hit", "hit"])
+            self.assertEqual(len(record), len(items), "重复批次应命中缓存")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            upstream.shutdown()
+            upstream.server_close()
+
+    def test_ai_precompute_queue_runs_when_idle_and_survives_restart(self):
+        import os
+
+        root = self._tmpdir()
+        path = os.path.join(root, "ai_queue.json")
+        env = {"DOUBAO_API_KEY": "k", "DOUBAO_MODEL": "m", "DOUBAO_DIRECT": "1"}
+        calls = []
+
+        def complete(prompt, model, api_key, proxies, system_prompt, url=None):
+            calls.append(prompt)
+            return f"答:{prompt}"
+
+        items = [
+            {"kind": "gate", "id": "V1", "prompt": "gate V1"},
+            {"kind": "summary", "id": "summary", "prompt": "summary"},
+            {"kind": "overall", "id": "overall", "prompt": "overall"},
+        ]
+
+        def prompt_source(payload, date=None):
+            return {"date": "2026-02-11", "promptVersion": "pv", "items": items}
+
+        def wait_for(predicate, timeout=5):
+            deadline = time.time() + timeout
+            while not predicate() and time.time() < deadline:
+                time.sleep(0.02)
+            return predicate()
+
+        with patch.object(server, "load_env", return_value=env), \
+            patch.object(server, "AI_CACHE", server.AiCache(root=self._tmpdir())):
+            queue = server.AiPrecomputeQueue(path=path, idle_sec=0.3, prompt_source=prompt_source, complete=complete)
+            queue.touch()
+            self.assertTrue(queue.schedule_snapshot({"data": {}}))
+            self.assertTrue(wait_for(lambda: queue.stats()["queued"] == 3), "快照持久化后应排入全部提示词")
+            time.sleep(0.1)
+            self.assertEqual(calls, [], "交互请求刚发生时不应占用上游")
+            self.assertTrue(wait_for(lambda: queue.stats()["done"] == 3), "空闲后应依次生成")
+            self.assertEqual(calls[:2], ["summary", "overall"], "总览与全局总结应先于闸门生成")
+            self.assertEqual(queue.enqueue("2026-02-11", items, "m"), 0, "相同提示词应去重")
+
+            reopened = server.AiPrecomputeQueue(path=path, complete=complete)
+            result = reopened.for_date("2026-02-11")
+            self.assertEqual(result["summary"], "答:summary", "重启后应从持久化队列找到已生成文本")
+            self.assertEqual(result["gates"], [{"id": "V1", "text": "答:gate V1"}])
+            self.assertEqual(result.get("promptVersion"), "pv")
+
+            with open(path, "r", encoding="utf-8") as fp:
+                state = json.load(fp)
+            state["entries"].append(
+                {"key": "interrupted", "prompt": "gate V2", "kind": "gate", "id": "V2", "date": "2026-02-12", "state": "running", "attempts": 1}
+            )
+            with open(path, "w", encoding="utf-8") as fp:
+                json.dump(state, fp)
+            restarted = server.AiPrecomputeQueue(path=path, idle_sec=0, complete=complete)
+            self.assertEqual(restarted.stats()["queued"], 1, "中断的任务重启后应重新排队")
+            restarted.resume()
+            self.assertTrue(wait_for(lambda: restarted.stats()["done"] == 4), "重启后应继续未完成的任务")
+            self.assertEqual(calls.count("gate V2"), 1)
+
+    def test_daily_scheduler_sleeps_until_due_and_catches_up(self):
+        import os
+        from datetime import datetime
+
+        state_path = os.path.join(self._tmpdir(), "scheduler_state.json")
+        now = {"value": datetime(2026, 2, 11, 7, 0)}
+        calls = []
+        tasks = [
+            {"name": "daily", "at": (8, 5), "run": lambda today: calls.append(("daily", today)) or "launched"},
+            {"name": "prewarm", "at": (7, 45), "until": (8, 5), "run": lambda today: calls.append(("prewarm", today)) or "warmed"},
+        ]
+        scheduler = server.DailyScheduler(tasks, state_path=state_path, max_sleep_sec=86400, clock=lambda: now["value"])
+        self.assertEqual(scheduler.run_pending(), [])
+        self.assertEqual(scheduler.seconds_until_next(), 45 * 60, "应睡到下一个到期时间而非轮询")
+
+        now["value"] = datetime(2026, 2, 11, 7, 46)
+        self.assertEqual(scheduler.run_pending(), ["prewarm"])
+        self.assertEqual(scheduler.seconds_until_next(), 19 * 60)
+        now["value"] = datetime(2026, 2, 11, 8, 5)
+        self.assertEqual(scheduler.run_pending(), ["daily"])
+        self.assertEqual(scheduler.run_pending(), [], "同一天不应重复执行")
+        self.assertEqual(scheduler.next_due(), datetime(2026, 2, 12, 7, 45))
+
+        restarted = server.DailyScheduler(tasks, state_path=state_path, clock=lambda: now["value"])
+        self.assertEqual(restarted.run_pending(), [], "重启后应读取持久化状态，不重复当天任务")
+
+        # Server down over the next morning: the daily run catches up, the stale pre-warm is skipped.
+        now["value"] = datetime(2026, 2, 12, 11, 30)
+        caught_up = server.DailyScheduler(tasks, state_path=state_path, clock=lambda: now["value"])
+        self.assertEqual(caught_up.run_pending(), ["daily"], "停机错过的日任务应补跑")
+        with open(state_path, "r", encoding="utf-8") as fp:
+            state = json.load(fp)
+        self.assertEqual(state["prewarm"], {"lastDate": "2026-02-12", "lastRunAt": "2026-02-12T11:30:00", "result": "skipped: missed window"})
+        self.assertEqual(calls[-1], ("daily", "2026-02-12"))
+        self.assertEqual(server.parse_clock("07:45"), (7, 45))
+        self.assertIsNone(server.parse_clock("off"))
+        self.assertEqual(server.parse_clock("25:00", (8, 5)), (8, 5))
+
+    def test_daily_prewarm_collects_slow_sources_in_background(self):
+        calls = []
+
+        def fake_collect(target_date, options):
+            calls.append((target_date, options))
+            return {}
+
+        with patch.object(server.collector, "prewarm_dns", return_value={"a.example": {"system": True, "doh": None}}), \
+            patch.object(server.collector, "collect", side_effect=fake_collect), \
+            patch.object(server.collector, "remember_observations") as remember, \
+            patch.object(server.COLLECTOR_POOL, "run", side_effect=AssertionError("pool")):
+            result = server.run_daily_prewarm("2026-02-13")
+            server._prewarm_thread.join(5)
+        self.assertTrue(result.startswith("started"))
+        self.assertTrue(result.endswith("dns 1/1"))
+        self.assertEqual(len(calls), 1)
+        target_date, options = calls[0]
+        self.assertIsNone(target_date, "预热应采集当日（UTC）而非本地日期")
+        self.assertFalse(options["probe"])
+        self.assertIsNone(options["captures"])
+        self.assertIn("ism", options["fields"], "FRED 属于慢来源")
+        self.assertNotIn("fearGreed", options["fields"], "廉价来源不必预热")
+        self.assertFalse(remember.called, "预热不应写入字段索引")
+        self.assertEqual(server.PREWARM_STATE["result"], "warmed")
+
+    def test_dns_cache_persists_between_processes(self):
+        import os
+
+        path = os.path.join(self._tmpdir(), "dns_cache.json")
+        with patch.dict(collector.DNS_CACHE, {}, clear=True), \
+            patch.dict(collector.DNS_RESOLVED_AT, {}, clear=True), \
+            patch("socket.getaddrinfo", return_value=[]), \
+            patch.object(collector, "resolve_host", side_effect=lambda host: collector.DNS_CACHE.setdefault(host, "1.2.3.4") if host == "a.example" else None):
+            result = collector.prewarm_dns(("a.example", "b.example"), path=path)
+            self.assertEqual(result["a.example"], {"system": True, "doh": "1.2.3.4"})
+            self.assertNotIn("b.example", collector.DNS_CACHE, "解析失败不应缓存为空结果")
+        with patch.dict(collector.DNS_CACHE, {}, clear=True), patch.dict(collector.DNS_RESOLVED_AT, {}, clear=True):
+            self.assertEqual(collector.load_dns_cache(path), 1)
+            self.assertEqual(collector.DNS_CACHE.get("a.example"), "1.2.3.4", "新进程应复用已解析的地址")
+        with patch.dict(collector.DNS_CACHE, {}, clear=True), patch.dict(collector.DNS_RESOLVED_AT, {}, clear=True):
+            self.assertEqual(collector.load_dns_cache(path, ttl_sec=-1), 0, "过期记录应忽略")
+
+    def test_host_rate_limiter_spaces_requests_across_instances(self):
+        directory = self._tmpdir()
+        # Two limiters stand in for two worker processes sharing the same lock directory.
+        first = collector.HostRateLimiter(directory, {"slow.example": 0.08}, default_sec=0)
+        second = collector.HostRateLimiter(directory, {"slow.example": 0.08}, default_sec=0)
+        started = time.monotonic()
+        for limiter in (first, second, first, second):
+            limiter.wait("slow.example")
+        self.assertGreaterEqual(time.monotonic() - started, 0.24, "同一主机的请求应按最小间隔排队")
+        self.assertEqual(first.wait("fast.example"), 0.0, "未配置间隔的主机不应等待")
+        self.assertFalse(os.path.exists(os.path.join(directory, "fast.example.lock")))
+
+    def test_host_rate_limiter_sleeps_without_holding_lock(self):
+        import subprocess
+        import threading
+
+        directory = self._tmpdir()
+        limiter = collector.HostRateLimiter(directory, {"slow.example": 0.6}, default_sec=0)
+        limiter.wait("slow.example")
+        done = threading.Event()
+        waiter = threading.Thread(target=lambda: (limiter.wait("slow.example"), done.set()))
+        waiter.start()
+        time.sleep(0.1)
+        # A stopped backfill child holding the lock must not block waiters that already reserved a slot.
+        holder = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import fcntl, os, sys, time\n"
+                "fd = os.open(sys.argv[1], os.O_RDWR)\n"
+                "fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+                "print('locked', flush=True)\n"
+                "time.sleep(3)\n",
+                os.path.join(directory, "slow.example.lock"),
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        try:
+            self.assertEqual(holder.stdout.readline().strip(), "locked", "等待期间锁应已释放")
+            self.assertTrue(done.wait(2), "持锁进程不应阻塞已预约时段的等待者")
+        finally:
+            holder.kill()
+            holder.wait()
+            holder.stdout.close()
+            waiter.join()
+
+    def test_parallel_backfill_checkpoints_shards_and_resumes(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        import scripts.backfill_parallel as backfill_parallel
+
+        tmp = self._tmpdir()
+        payload_dir = os.path.join(tmp, "payloads")
+        checkpoint_dir = os.path.join(tmp, "shards")
+        dates = backfill_parallel.build_backfill_dates(6, "2024-01-20", 2, 1)
+        self.assertEqual(dates[0], "2024-01-12")
+        self.assertEqual(dates[-1], "2024-01-18")
+        calls = []
+        lock = threading.Lock()
+        flaky = {"2024-01-15"}
+
+        def fake_collect(date, options):
+            self.assertIn("deadline", options)
+            with lock:
+                calls.append(date)
+            if date in flaky:
+                flaky.discard(date)
+                raise RuntimeError("upstream 502")
+            return {"targetDate": date, "data": {"etf1d": 1.0}}
+
+        def run():
+            return backfill_parallel.run_backfill(
+                dates,
+                workers=3,
+                shard_size=2,
+                payload_dir=payload_dir,
+                checkpoint_dir=checkpoint_dir,
+                timeout_sec=5,
+                collect=fake_collect,
+                executor_factory=ThreadPoolExecutor,
+            )
+
+        first = run()
+        self.assertEqual((first["total"], first["shards"]), (7, 4))
+        self.assertEqual((first["collected"], first["failed"]), (6, 1))
+        self.assertIn("2024-01-15", first["failures"])
+        self.assertGreater(first["datesPerMin"], 0, "应报告 dates/min 吞吐")
+        self.assertEqual(len(os.listdir(checkpoint_dir)), 4, "每个分片应有独立检查点")
+        checkpoint = backfill_parallel.load_checkpoint(
+            backfill_parallel.checkpoint_path(checkpoint_dir, "2024-01-14_2024-01-15")
+        )
+        self.assertEqual(checkpoint["done"], ["2024-01-14"])
+        self.assertIn("2024-01-15", checkpoint["failed"])
+
+        calls.clear()
+        second = run()
+        self.assertEqual(calls, ["2024-01-15"], "重跑应只补齐中断/失败的日期")
+        self.assertEqual((second["collected"], second["skipped"], second["failed"]), (1, 6, 0))
+        self.assertEqual(second["pendingShards"], 1)
+        with open(os.path.join(payload_dir, "2024-01-15.json"), encoding="utf-8") as fp:
+            self.assertEqual(json.load(fp)["targetDate"], "2024-01-15")
+
+    def test_ai_cache_hits_skip_upstream(self):
+        import http.client
+        import os
+        import threading
+
+        cache = server.AiCache(root=self._tmpdir(), memory_size=2, ttl_sec=60, max_bytes=10**6)
+        key = server.ai_cache_key("m", "sys", "prompt")
+        self.assertNotEqual(key, server.ai_cache_key("m", "sys", "prompt", temperature=0.9), "温度应参与缓存键")
+        calls = []
+        text, state = cache.get_or_compute(key, lambda: calls.append(1) or "答复")
+        self.assertEqual((text, state), ("答复", "miss"))
+        text, state = cache.get_or_compute(key, lambda: calls.append(1) or "新答复")
+        self.assertEqual((text, state, len(calls)), ("答复", "hit", 1), "相同提示词应命中缓存")
+
+        reopened = server.AiCache(root=cache.root, ttl_sec=60)
+        self.assertEqual(reopened.lookup(key), "答复", "磁盘缓存应跨重启保留")
+        expired = server.AiCache(root=cache.root, ttl_sec=60)
+        with patch.object(server.time, "time", return_value=time.time() + 120):
+            self.assertIsNone(expired.lookup(key), "超过 TTL 应失效")
+
+        small = server.AiCache(root=self._tmpdir(), ttl_sec=60, max_bytes=200)
+        for index in range(5):
+            small.put(server.ai_cache_key("m", "sys", str(index)), "x" * 60)
+            path = small._disk_path(server.ai_cache_key("m", "sys", str(index)))
+            os.utime(path, (1000 + index, 1000 + index))
+        with patch.object(server.time, "time", return_value=1030):
+            removed = small.prune()
+        self.assertGreater(removed, 0, "超出容量时应淘汰最旧条目")
+        self.assertTrue(os.path.exists(small._disk_path(server.ai_cache_key("m", "sys", "4"))), "最新条目应保留")
+        self.assertEqual(small.stats().get("evictions"), removed)
+
+        record = []
+        upstream = self._start_fake_doubao(["门槛", "解释"], record=record)
+        url = f"http://127.0.0.1:{upstream.server_address[1]}/chat"
+        env = {"DOUBAO_API_KEY": "k", "DOUBAO_MODEL": "m", "DOUBAO_DIRECT": "1", "DOUBAO_API_URL": url}
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            with patch.object(server, "load_env", return_value=env), \
+                patch.object(server, "AI_CACHE", server.AiCache(root=self._tmpdir())):
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                states = []
+                for _ in range(2):
+                    conn.request("POST", "/ai/gate", body=json.dumps({"id": "G2", "prompt": "gate"}))
+                    resp = conn.getresponse()
+                    self.assertEqual(json.loads(resp.read()), {"id": "G2", "text": "门槛解释"})
+                    states.append(resp.getheader("X-AI-Cache"))
+                conn.request("POST", "/ai/gate", body=json.dumps({"id": "G2", "prompt": "gate", "stream": True}))
+                events = [json.loads(line) for line in conn.getresponse().read().decode().splitlines()]
+                conn.request("GET", "/ai/status")
+                status = json.loads(conn.getresponse().read())
+                conn.close()
+            self.assertEqual(states, ["miss", "hit"])
+            self.assertEqual(len(record), 1, "命中缓存时不应请求上游")
+            self.assertTrue(events[-1].get("cached"), "流式请求也应直接回放缓存")
+            self.assertEqual(status.get("cache", {}).get("hits"), 2, "/ai/status 应暴露命中计数")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            upstream.shutdown()
+            upstream.server_close()
+
+    def _patch_all_sources(self):
+        from contextlib import ExitStack
+
+        stack = ExitStack()
+        for name in (
+            "fetch_macro",
+            "fetch_defillama",
+            "fetch_stablecoin_eth",
+            "fetch_farside",
+            "fetch_coingecko_market",
+            "fetch_coinglass_liquidations",
+            "fetch_defillama_cex",
+            "fetch_coingecko_ohlc",
+            "fetch_bitfinex_market",
+            "fetch_bitfinex_ohlc",
+            "fetch_rwa_protocols",
+            "fetch_eth_fees",
+            "fetch_fear_greed",
+            "fetch_distribution_gate",
+        ):
+            stack.enter_context(patch(f"scripts.collector.{name}", return_value=({}, {}, [])))
+        stack.enter_context(patch("scripts.collector.probe_proxy", return_value=[]))
+        return stack
+
+    def test_collect_returns_payload_without_writing(self):
+        calls = []
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_macro", return_value=({"ism": 50.0}, {"ism": "FRED: NAPM"}, [])), \
+            patch("scripts.collector.save_field_index") as save_index:
+            payload = collector.collect("2026-02-01", {"progress": lambda *args: calls.append(args)})
+        self.assertEqual(payload.get("data", {}).get("ism"), 50.0, "collect 应直接返回 payload")
+        self.assertFalse(save_index.called, "collect 不应写文件")
+        self.assertTrue(calls, "collect 应回报进度")
+        self.assertEqual(calls[-1][1], calls[-1][2], "最后一次进度应到达总数")
+
+    def test_source_plan_runs_only_sources_behind_requested_fields(self):
+        full = collector.plan_collection(None, "2026-02-01")
+        names = [spec["name"] for spec in full["sources"]]
+        self.assertIn("Bitfinex(OHLC)", names, "历史日期应走 Bitfinex")
+        # RWA stays in historical plans only to be answered from captures; it is never fetched.
+        self.assertIn("DefiLlama(RWA)", names)
+        self.assertNotIn("CoinGecko(market)", names)
+
+        plan = collector.plan_collection(["lstcScore", "sentimentThreshold", "nope"], "2026-02-01")
+        self.assertEqual([spec["name"] for spec in plan["sources"]], ["DefiLlama(Fees)", "AltMe(FNG)"])
+        self.assertEqual(plan["derived"], {"potentials": ["sentimentThreshold"], "feeScores": ["lstcScore"]})
+        self.assertEqual(plan["unresolved"], ["nope"])
+        today = collector.plan_collection(["exchBalanceTrend"], None)
+        self.assertEqual(
+            [spec["name"] for spec in today["sources"]],
+            ["DefiLlama(CEX)", "CoinGecko(CEX proxy)"],
+            "回退来源应随主来源一起进入计划",
+        )
+
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_eth_fees", return_value=({"fee7d": 10.0, "fee30d": 40.0}, {}, [])), \
+            patch("scripts.collector.fetch_fear_greed", return_value=({"fearGreed": 50.0}, {}, [])), \
+            patch("scripts.collector.load_previous_snapshot", return_value=None), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            payload = collector.collect("2026-02-01", {"fields": ["lstcScore", "sentimentThreshold"]})
+            self.assertFalse(collector.fetch_macro.called, "未请求的来源不应执行")
+            self.assertFalse(collector.fetch_farside.called)
+        data = payload["data"]
+        self.assertEqual(data.get("lstcScore"), 10.0)
+        self.assertAlmostEqual(data.get("sentimentThreshold"), 0.6)
+        self.assertNotIn("cognitivePotential", data, "未请求的派生字段不应用默认输入计算")
+        self.assertNotIn("fee7d", data, "中间字段不应写入快照")
+
+    def test_stale_only_refresh_fetches_due_fields_and_carries_the_rest(self):
+        from datetime import datetime, timedelta, timezone
+
+        now = datetime.now(timezone.utc)
+        fresh = (now - timedelta(hours=6)).isoformat().replace("+00:00", "Z")
+        old = (now - timedelta(days=3)).isoformat().replace("+00:00", "Z")
+        previous = {
+            "data": {key: 1.0 for key in collector.SNAPSHOT_FIELDS},
+            "sources": {key: f"prev:{key}" for key in collector.SNAPSHOT_FIELDS},
+            "fieldObservedAt": {key: fresh for key in collector.SNAPSHOT_FIELDS},
+            "fieldFetchedAt": {key: fresh for key in collector.SNAPSHOT_FIELDS},
+        }
+        # etf1d: 3d old with a 2d half-life -> due; ism: 3d old with a 45d half-life -> carried.
+        previous["fieldObservedAt"]["etf1d"] = old
+        previous["fieldObservedAt"]["ism"] = old
+        self.assertEqual(collector.fields_due_for_refresh(previous), ["etf1d"])
+
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_farside", return_value=({"etf1d": 5.0}, {"etf1d": "Farside"}, [])), \
+            patch("scripts.collector.load_previous_snapshot", return_value=previous), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            payload = collector.collect(None, {"refresh_policy": "stale-only"})
+            self.assertFalse(collector.fetch_macro.called, "仍新鲜的字段不应触发抓取")
+            self.assertFalse(collector.fetch_coingecko_market.called)
+        self.assertEqual(payload["refresh"]["sources"], ["Farside(ETF)"])
+        self.assertEqual(payload["refresh"]["refreshed"], ["etf1d"])
+        self.assertIn("ism", payload["refresh"]["carried"])
+        self.assertEqual(payload["data"]["etf1d"], 5.0)
+        self.assertEqual(payload["data"]["ism"], 1.0)
+        self.assertEqual(payload["sources"]["ism"], "prev:ism")
+        self.assertEqual(payload["fieldObservedAt"]["ism"], old, "沿用字段应保留原观测时间")
+        self.assertEqual(payload["fieldFetchedAt"]["ism"], fresh, "沿用字段不应伪装成本次抓取")
+        self.assertFalse(
+            any("Local cache fallback" in err for err in payload["errors"]), "按策略沿用不应记为降级"
+        )
+        self.assertEqual(payload["proxyTrace"], [])
+
+        with self._patch_all_sources(), \
+            patch("scripts.collector.load_previous_snapshot", return_value=previous), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            payload = collector.collect(None, {"refresh_policy": "stale-only"})
+        self.assertEqual(payload["refresh"]["refreshed"], [], "抓取失败的字段不应记为已刷新")
+        self.assertEqual(payload["refresh"]["failed"], ["etf1d"])
+
+    def test_cadence_slots_and_collector_daemon_publishes_incrementally(self):
+        from datetime import datetime, timedelta, timezone
+
+        friday = datetime(2026, 2, 6, 22, 0, tzinfo=timezone.utc)
+        self.assertEqual(
+            collector.next_cadence_run({"at": ["21:30"], "weekdays": True}, friday),
+            datetime(2026, 2, 9, 21, 30, tzinfo=timezone.utc),
+            "工作日节奏应跳过周末",
+        )
+        self.assertEqual(
+            collector.next_cadence_run({"at": ["22:30", "07:30"]}, friday),
+            datetime(2026, 2, 6, 22, 30, tzinfo=timezone.utc),
+        )
+        self.assertEqual(collector.next_cadence_run({"every": 3600}, friday), friday + timedelta(hours=1))
+
+        start = friday - timedelta(hours=2)
+        now = [start]
+        stamp = start.isoformat().replace("+00:00", "Z")
+        path = os.path.join(self._tmpdir(), "auto.json")
+        live = {
+            "generatedAt": stamp,
+            "data": {key: 1.0 for key in collector.SNAPSHOT_FIELDS},
+            "sources": {key: "prev" for key in collector.SNAPSHOT_FIELDS},
+            "fieldObservedAt": {key: stamp for key in collector.SNAPSHOT_FIELDS},
+            "errors": ["Farside(ETF): old failure", "GDELT(Distribution): keep me"],
+        }
+        live["fieldObservedAt"]["etf1d"] = (start - timedelta(days=3)).isoformat().replace("+00:00", "Z")
+        collector.write_json_atomic(path, live)
+        daemon = collector.CollectorDaemon(path, clock=lambda: now[0], log=lambda _msg: None)
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_farside", return_value=({"etf1d": 7.0, "etf5d": 9.0}, {"etf1d": "Farside"}, [])), \
+            patch("scripts.collector.fetch_coingecko_market", return_value=({"trendMomentum": 0.5, "divergence": 0.0}, {}, [])), \
+            patch("scripts.collector.load_field_index", return_value={}), \
+            patch("scripts.collector.remember_observations"):
+            self.assertEqual(daemon.bootstrap(), ["Farside(ETF)"], "启动时只立即刷新临近过期字段的来源")
+            self.assertEqual(daemon.tick(), ["etf1d", "etf5d"])
+            published = collector.load_previous_snapshot(path)
+            self.assertEqual(published["data"]["etf1d"], 7.0)
+            self.assertEqual(published["data"]["ism"], 1.0, "未刷新的字段应原样保留")
+            self.assertEqual(published["errors"], ["GDELT(Distribution): keep me"], "只替换本次来源的错误")
+            self.assertEqual(published["refresh"]["sources"], ["Farside(ETF)"])
+            self.assertEqual(daemon.tick(), [], "未到期不应重复抓取")
+
+            now[0] = start + timedelta(hours=1)
+            self.assertIn("CoinGecko(market)", daemon.due())
+            self.assertNotIn("Farside(ETF)", daemon.due())
+            updated = daemon.tick()
+            self.assertEqual(collector.fetch_farside.call_count, 1)
+        self.assertIn("trendMomentum", updated)
+        self.assertIn("cognitivePotential", updated, "输入全部刷新的派生字段应一并重算")
+        self.assertNotIn("liquidityPotential", updated)
+        self.assertFalse([name for name in os.listdir(os.path.dirname(path)) if ".tmp-" in name])
+
+    def test_collector_daemon_rederives_fields_with_inputs_on_separate_ticks(self):
+        stamp = "2026-02-06T20:00:00Z"
+        path = os.path.join(self._tmpdir(), "auto.json")
+        collector.write_json_atomic(
+            path,
+            {
+                "generatedAt": stamp,
+                "data": {key: 1.0 for key in collector.SNAPSHOT_FIELDS},
+                "sources": {key: "prev" for key in collector.SNAPSHOT_FIELDS},
+                "fieldObservedAt": {key: stamp for key in collector.SNAPSHOT_FIELDS},
+            },
+        )
+        daemon = collector.CollectorDaemon(path, log=lambda _msg: None)
+        stable = {"stablecoin30d": -10.0, "totalStableNow": 100.0, "totalStableAgo": 100.0}
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_farside", return_value=({"etf10d": 500.0}, {}, [])), \
+            patch("scripts.collector.fetch_defillama", return_value=(stable, {}, [])), \
+            patch("scripts.collector.fetch_stablecoin_eth", return_value=({"ethStableNow": 40.0, "ethStableAgo": 50.0}, {}, [])), \
+            patch("scripts.collector.load_field_index", return_value={}), \
+            patch("scripts.collector.remember_observations"):
+            self.assertIn("liquidityPotential", daemon.run_sources(["Farside(ETF)"]), "单一输入刷新也应重算派生字段")
+            self.assertIn("liquidityPotential", daemon.run_sources(["DefiLlama(stablecoin)"]))
+            published = collector.load_previous_snapshot(path)
+            expected = collector.compute_potentials({"stablecoin30d": -10.0, "etf10d": 500.0, "rrpChange": 1.0})
+            self.assertAlmostEqual(published["data"]["liquidityPotential"], expected["liquidityPotential"])
+            self.assertEqual(published["sources"]["liquidityPotential"], "Derived: stablecoin/ETF/RRP")
+            self.assertNotEqual(published["fieldFetchedAt"]["liquidityPotential"], stamp)
+            self.assertEqual(published["data"]["cognitivePotential"], 1.0, "输入未变的派生字段不应重算")
+            updated = daemon.run_sources(["DefiLlama(stablecoin_eth)"])
+        self.assertIn("rsdScore", updated, "应结合先前 tick 的中间值重算")
+        self.assertTrue(collector.load_previous_snapshot(path)["data"]["mappingRatioDown"])
+        self.assertIn("rsdScore", collector.load_previous_snapshot(path)["refresh"]["refreshed"])
+
+    def test_capture_store_answers_latest_only_sources_for_past_dates(self):
+        store = collector.CaptureStore(self._tmpdir())
+        spec = {item["name"]: item for item in collector.SOURCES}
+        cex = {"exchBalanceTrend": 11.0, "exchStableDelta": 3.0, "cexTvl": 90.0}
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_defillama_cex", return_value=(cex, {"cexTvl": "DefiLlama: /cexs"}, [])), \
+            patch("scripts.collector.fetch_rwa_protocols", return_value=({"rwaShareEth": 0.4}, {}, [])), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            collector.collect(None, {"captures": store})
+        today = collector.today_key()
+        self.assertEqual(store.lookup(spec["DefiLlama(CEX)"], today)[1]["data"], cex, "当日运行应记录仅最新来源")
+        self.assertEqual(store.lookup(spec["DefiLlama(RWA)"], today)[1]["data"], {"rwaShareEth": 0.4})
+        self.assertIsNone(store.lookup(spec["GDELT(Distribution)"], today), "空结果不应记录")
+
+        store.record(spec["DefiLlama(CEX)"], "2026-02-01", {**cex, "extra": 1}, {}, "2026-02-01T08:05:00Z")
+        store.record(spec["DefiLlama(RWA)"], "2026-02-01", {"rwaShareEth": 0.2}, {}, "2026-02-01T08:05:00Z")
+        store.record(spec["Coinglass(liquidation)"], "2026-01-20", {"liquidationUsd": 5.0}, {}, "2026-01-20T08:05:00Z")
+        self.assertIsNone(store.lookup(spec["DefiLlama(CEX)"], "2026-01-31"), "不应使用未来的采集")
+        self.assertIsNone(store.lookup(spec["Coinglass(liquidation)"], "2026-02-03"), "超出半衰期的采集不应使用")
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_defillama", return_value=({"totalStableNow": 100.0, "totalStableAgo": 100.0}, {}, [])), \
+            patch("scripts.collector.fetch_stablecoin_eth", return_value=({"ethStableNow": 50.0, "ethStableAgo": 50.0}, {}, [])), \
+            patch("scripts.collector.load_previous_snapshot", return_value=None), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            payload = collector.collect("2026-02-03", {"captures": store})
+            self.assertFalse(collector.fetch_defillama_cex.called, "有采集记录时历史运行不应联网")
+            self.assertFalse(collector.fetch_rwa_protocols.called)
+            self.assertTrue(collector.fetch_coinglass_liquidations.called, "无可用采集时按原逻辑抓取")
+        self.assertEqual(payload["data"]["exchBalanceTrend"], 11.0)
+        self.assertNotIn("extra", payload["data"], "只保存来源声明的字段")
+        self.assertIn("captured 2026-02-01", payload["sources"]["cexTvl"])
+        self.assertEqual(payload["fieldObservedAt"]["cexTvl"], "2026-02-01T08:05:00Z")
+        self.assertAlmostEqual(payload["data"]["rsdScore"], ((0.5 + 0.2) / 2) * 10, msg="采集的 RWA 份额应参与历史 rsdScore")
+
+        coinglass = spec["Coinglass(liquidation)"]
+        store.record(coinglass, "2026-02-02", {"liquidationUsd": 6.0}, {}, "2026-02-02T08:05:00Z")
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_coinglass_liquidations", return_value=({"liquidationUsd": 9.0}, {}, [])), \
+            patch("scripts.collector.load_previous_snapshot", return_value=None), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            payload = collector.collect("2026-02-03", {"captures": store, "fields": ["liquidationUsd"]})
+        self.assertEqual(payload["data"]["liquidationUsd"], 9.0, "有 as-of 接口时不应先用相邻日期的采集")
+        with self._patch_all_sources(), \
+            patch("scripts.collector.fetch_coinglass_liquidations", return_value=({}, {}, ["liquidationUsd"])), \
+            patch("scripts.collector.load_previous_snapshot", return_value=None), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            payload = collector.collect("2026-02-03", {"captures": store, "fields": ["liquidationUsd"]})
+        self.assertEqual(payload["data"]["liquidationUsd"], 6.0, "as-of 接口失败时才回退到相邻日期的采集")
+        self.assertIn("captured 2026-02-02", payload["sources"]["liquidationUsd"])
+        store.record(coinglass, "2026-02-03", {"liquidationUsd": 7.0}, {}, "2026-02-03T08:05:00Z")
+        with self._patch_all_sources(), \
+            patch("scripts.collector.load_previous_snapshot", return_value=None), \
+            patch("scripts.collector.load_field_index", return_value={}):
+            payload = collector.collect("2026-02-03", {"captures": store, "fields": ["liquidationUsd"]})
+            self.assertFalse(collector.fetch_coinglass_liquidations.called, "同日采集可直接使用")
+        self.assertEqual(payload["data"]["liquidationUsd"], 7.0)
+
+    def test_collect_cancel_maps_to_job_cancelled(self):
+        import threading
+
+        cancel = threading.Event()
+        cancel.set()
+        with self._patch_all_sources():
+            with self.assertRaises(collector.CollectCancelled):
+                collector.collect(None, {"cancel_event": cancel})
+            with patch.object(server, "COLLECTOR_SUBPROCESS", False):
+                with self.assertRaises(server.JobCancelled):
+                    server.run_collector(None, cancel_event=cancel)
+
+    def test_history_final_rules(self):
+        from datetime import date
+
+        today = date(2026, 3, 1)
+        payload = {
+            "missing": [],
+            "errors": [],
+            "fieldObservedAt": {"ism": "2026-01-31T00:00:00Z", "cexTvl": "2026-03-01T08:00:00Z"},
+        }
+        self.assertTrue(server.is_history_final("2026-02-01", payload, today=today), "已沉淀的历史日期应为 final")
+        self.assertFalse(server.is_history_final("2026-02-27", payload, today=today), "近期日期可能仍有修订")
+        late = dict(payload, fieldObservedAt={"ism": "2026-02-10T00:00:00Z"})
+        self.assertFalse(server.is_history_final("2026-02-01", late, today=today), "晚于目标日的非 latest-only 字段不应 final")
+        borrowed = dict(payload, errors=["Local cache fallback: ism"])
+        self.assertFalse(server.is_history_final("2026-02-01", borrowed, today=today), "本地回填结果不应 final")
+        self.assertFalse(server.is_history_final("2026-02-01", dict(payload, missing=["ism"]), today=today))
+
+    def test_history_cache_tiers_and_single_flight(self):
+        import threading
+
+        root = self._tmpdir()
+        cache = server.HistoryCache(root=root, memory_size=4)
+        gate = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            gate.wait(5)
+            return {"targetDate": "2025-01-01", "missing": [], "errors": [], "fieldObservedAt": {}}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("2025-01-01", compute)))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1, "并发请求同一日期只应计算一次")
+        self.assertEqual(sorted(state for _payload, state in results), ["miss", "shared", "shared"])
+
+        reloaded = server.HistoryCache(root=root, memory_size=4)
+        payload, state = reloaded.get_or_compute("2025-01-01", lambda: self.fail("final 结果应从磁盘读取"))
+        self.assertEqual(state, "hit", "final 结果应写入压缩磁盘缓存")
+        self.assertEqual(payload.get("targetDate"), "2025-01-01")
+
+    def test_history_cache_hits_skip_pool_and_waiters_cancel_independently(self):
+        import threading
+
+        cache = server.HistoryCache(root=self._tmpdir(), memory_size=4)
+        final = {"targetDate": "2025-01-01", "missing": [], "errors": [], "fieldObservedAt": {}}
+        cache.store("2025-01-01", final)
+        busy_pool = server.WorkerPool("collector", 1, 0, retry_after=9)
+        release = threading.Event()
+        busy_pool.submit(release.wait, 5)
+        try:
+            with patch.object(server, "HISTORY_CACHE", cache):
+                payload, state = server.collect_history("2025-01-01", pool=busy_pool)
+                self.assertEqual(state, "hit", "缓存命中不应占用采集 worker")
+                self.assertIs(server.HISTORY_CACHE.get("2025-01-01"), payload)
+                with self.assertRaises(server.PoolSaturated):
+                    server.collect_history("2025-01-02", pool=busy_pool)
+        finally:
+            release.set()
+
+        gate = threading.Event()
+        owner_cancel = threading.Event()
+
+        def owner_compute():
+            gate.wait(5)
+            if owner_cancel.is_set():
+                raise server.JobCancelled("owner cancelled")
+            return dict(final, targetDate="2025-01-03")
+
+        owner = threading.Thread(target=lambda: self.assertRaises(server.JobCancelled, cache.get_or_compute, "2025-01-03", owner_compute))
+        owner.start()
+        time.sleep(0.05)
+        own_cancel = threading.Event()
+        own_cancel.set()
+        with self.assertRaises(server.JobCancelled, msg="等待者应响应自己的取消"):
+            cache.get_or_compute("2025-01-03", lambda: self.fail("不应重复计算"), cancel_event=own_cancel)
+        waiter_result = []
+        waiter = threading.Thread(
+            target=lambda: waiter_result.append(
+                cache.get_or_compute("2025-01-03", lambda: {"targetDate": "retried"}, cancel_event=threading.Event())
+            )
+        )
+        waiter.start()
+        time.sleep(0.05)
+        owner_cancel.set()
+        gate.set()
+        owner.join(5)
+        waiter.join(5)
+        self.assertEqual(waiter_result[0], ({"targetDate": "retried"}, "miss"), "发起者被取消时等待者应重试而非继承取消")
+
     def test_eth_price_seed_payload_shape(self):
         import importlib
 
@@ -23,6 +23,9 @@ import { deriveFieldTrend } from "../src/ui/fieldTrend.js";
 import { buildCombinedInput, refreshMissingFields } from "../src/ui/inputBuilder.js";
 import { createEtaTimer } from "../src/ui/etaTimer.js";
 import { parseDeepLink } from "../src/ui/deepLink.js";
+import { runServerJob } from "../src/ui/jobs.js";
+import { subscribeServerEvents } from "../src/ui/events.js";
+import { runAiBatch, streamAiText } from "../src/ui/aiStream.js";
 import { buildOverallPrompt, PROMPT_VERSION } from "../src/ai/prompts.js";
 import { buildAiPayload } from "../src/ai/payload.js";
 import { computePredictionEvaluation, deriveDriftSignal, renderPredictionEvaluation } from "../src/ui/eval.js";
@@ -1395,6 +1398,150 @@ function wait(ms = 0) {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
 
+async function testStreamAiTextAccumulatesDeltas() {
+  const encoder = new TextEncoder();
+  const pieces = ['{"type":"delta","text":"以太"}\n{"type":"del', 'ta","text":"坊"}\n', '{"type":"done","text":"以太坊","id":"G1"}\n'];
+  const seen = [];
+  let requestBody = null;
+  const result = await streamAiText("/ai/gate", { id: "G1", prompt: "p" }, {
+    fetchImpl: async (_url, init) => {
+      requestBody = JSON.parse(init.body);
+      return {
+        ok: true,
+        headers: { get: () => "application/x-ndjson; charset=utf-8" },
+        body: {
+          getReader: () => ({
+            read: async () => (pieces.length ? { value: encoder.encode(pieces.shift()), done: false } : { done: true }),
+          }),
+        },
+      };
+    },
+    onDelta: (text) => seen.push(text),
+  });
+  assert(requestBody.stream === true, "流式请求应带 stream 标记");
+  assert(seen.join("|") === "以太|以太坊", "跨分片的 NDJSON 行应正确拼接");
+  assert(result.text === "以太坊" && result.id === "G1", "应返回最终 done 事件");
+
+  const legacy = await streamAiText("/ai/summary", { prompt: "p" }, {
+    fetchImpl: async () => ({ ok: true, headers: { get: () => "application/json" }, json: async () => ({ summary: "旧版" }) }),
+  });
+  assert(legacy.text === "旧版", "非流式响应应回退为 JSON");
+}
+
+async function testRunAiBatchDispatchesItems() {
+  const encoder = new TextEncoder();
+  const pieces = [
+    '{"type":"item","id":"gate:G1","text":"一","latencyMs":5}\n{"type":"ite',
+    'm","id":"field:etf","error":"ai request failed","latencyMs":7}\n',
+    '{"type":"done","count":2,"elapsedMs":9}\n',
+  ];
+  const seen = [];
+  let requestBody = null;
+  const missing = await runAiBatch(
+    [
+      { id: "gate:G1", prompt: "a" },
+      { id: "field:etf", prompt: "b" },
+      { id: "gate:G2", prompt: "c" },
+    ],
+    {
+      fetchImpl: async (url, init) => {
+        assert(url === "/ai/batch", "应请求批量接口");
+        requestBody = JSON.parse(init.body);
+        return {
+          ok: true,
+          headers: { get: () => "application/x-ndjson" },
+          body: {
+            getReader: () => ({
+              read: async () => (pieces.length ? { value: encoder.encode(pieces.shift()), done: false } : { done: true }),
+            }),
+          },
+        };
+      },
+      onItem: (event) => seen.push(event.id),
+    }
+  );
+  assert(requestBody.items.length === 3, "批量请求应包含全部条目");
+  assert(seen.join("|") === "gate:G1|field:etf", "每个 item 事件都应回调");
+  assert(missing.length === 1 && missing[0] === "gate:G2", "未返回的条目应交给调用方回退");
+
+  let failed = false;
+  try {
+    await runAiBatch([{ id: "x", prompt: "p" }], {
+      fetchImpl: async () => ({ ok: false, json: async () => ({ error: "not found" }) }),
+    });
+  } catch (error) {
+    failed = error.message === "not found";
+  }
+  assert(failed, "批量接口不可用时应抛错以便回退");
+}
+
+function testSubscribeServerEventsDispatchesAndFallsBack() {
+  const sources = [];
+  class FakeEventSource {
+    constructor(url) {
+      this.url = url;
+      this.listeners = {};
+      sources.push(this);
+    }
+    addEventListener(name, fn) {
+      this.listeners[name] = fn;
+    }
+    close() {
+      this.closed = true;
+    }
+  }
+  const received = [];
+  const openStates = [];
+  const events = subscribeServerEvents(
+    { backfill: (payload) => received.push(payload) },
+    { EventSourceImpl: FakeEventSource, onOpenChange: (open) => openStates.push(open) }
+  );
+  const source = sources[0];
+  assert(source.url === "/events", "应订阅 /events");
+  assert(!events.isOpen(), "连接建立前应视为未连接（继续轮询）");
+  source.onopen();
+  assert(events.isOpen(), "连接建立后应停止轮询");
+  source.listeners.backfill({ data: JSON.stringify({ status: "running", processed: 3 }) });
+  source.listeners.backfill({ data: "not json" });
+  assert(received.length === 1 && received[0].processed === 3, "应解析并分发事件数据");
+  source.onerror();
+  assert(!events.isOpen() && openStates.join(",") === "true,false", "断线时应回退到轮询");
+
+  const fallback = subscribeServerEvents({}, { EventSourceImpl: null });
+  assert(!fallback.isOpen(), "不支持 EventSource 时应始终轮询");
+}
+
+async function testRunServerJobPollsUntilDone() {
+  const calls = [];
+  const states = [
+    { jobId: "abc", status: "running", statusUrl: "/jobs/abc" },
+    { jobId: "abc", status: "done", statusUrl: "/jobs/abc", result: { data: { etf1d: 1 } } },
+  ];
+  let dropped = false;
+  const fetchImpl = async (url, init = {}) => {
+    calls.push(url);
+    if (url === "/data/history") {
+      const body = JSON.parse(init.body);
+      assert(body.async === true && body.date === "2026-02-01", "任务请求应带 async 标记与日期");
+      return { ok: true, status: 202, json: async () => ({ jobId: "abc", status: "queued", statusUrl: "/jobs/abc" }) };
+    }
+    if (!dropped) {
+      dropped = true;
+      throw new Error("network lost");
+    }
+    const next = states.shift();
+    return { ok: true, status: 200, json: async () => next };
+  };
+  const result = await runServerJob("/data/history", { date: "2026-02-01" }, { fetchImpl, intervalMs: 0, sleep: async () => {} });
+  assert(result?.data?.etf1d === 1, "任务完成后应返回采集结果");
+  assert(calls.filter((url) => url.startsWith("/jobs/abc")).length === 3, "网络中断后应继续轮询任务状态");
+
+  const syncResult = await runServerJob("/data/refresh", {}, {
+    fetchImpl: async () => ({ ok: true, json: async () => ({ data: { ism: 50 } }) }),
+  });
+  assert(syncResult?.data?.ism === 50, "旧版同步响应应直接返回");
+}
+
 async function testRunTodayCompletesBeforeAi() {
   const { doc, nodes } = createAppDom();
   global.document = doc;
@@ -1555,6 +1702,10 @@ async function run() {
   testRenderOutputPassesPriceSeedToEval();
   testPipelineAppliesDriftAndCostControls();
   testEvalPanelRenders();
+  await testRunServerJobPollsUntilDone();
+  testSubscribeServerEventsDispatchesAndFallsBack();
+  await testStreamAiTextAccumulatesDeltas();
+  await testRunAiBatchDispatchesItems();
   await testRunTodayCompletesBeforeAi();
   console.log("All tests passed.");
 }